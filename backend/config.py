@@ -0,0 +1,53 @@
+# backend/config.py
+"""共用設定：104 地區/產業代碼對照表（API 與排程器共用）。"""
+
+# 簡易對照表（前端下拉選單 key -> 104 代碼）
+AREA_MAP = {
+    # 北部
+    "台北市": "6001001000",
+    "新北市": "6001002000",
+    "基隆市": "6001003000",
+    "桃園市": "6001004000",
+    "新竹市": "6001005000",
+    "新竹縣": "6001006000",
+    "宜蘭縣": "6001007000",
+
+    # 中部
+    "台中市": "6001008000",
+    "苗栗縣": "6001009000",
+    "彰化縣": "6001010000",
+    "南投縣": "6001011000",
+    "雲林縣": "6001012000",
+
+    # 南部
+    "嘉義市": "6001013000",
+    "嘉義縣": "6001014000",
+    "台南市": "6001015000",
+    "高雄市": "6001016000",
+    "屏東縣": "6001018000",
+
+    # 東部 & 離島
+    "花蓮縣": "6001019000",
+    "台東縣": "6001020000",
+    "澎湖縣": "6001021000",
+    "金門縣": "6001022000",
+    "連江縣": "6001023000",
+}
+INDUSTRY_MAP = {
+    "批發／零售／傳直銷業": "1003000000",
+    "文教相關業": "1005000000",
+    "大眾傳播相關業": "1006000000",
+    "旅遊／休閒／運動業": "1007000000",
+    "一般服務業": "1009000000",
+    "電子資訊／軟體／半導體相關業": "1001000000",
+    "一般製造業": "1002000000",
+    "農林漁牧水電資源業": "1014000000",
+    "運輸物流及倉儲": "1010000000",
+    "政治宗教及社福相關業": "1013000000",
+    "金融投顧及保險業": "1004000000",
+    "法律／會計／顧問／研發／設計業": "1008000000",
+    "建築工程、空間設計與不動產業": "1011000000",
+    "醫療保健及環境衛生業": "1012000000",
+    "礦業及土石採取業": "1015000000",
+    "住宿／餐飲服務業": "1016000000",
+}
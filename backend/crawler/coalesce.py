@@ -0,0 +1,128 @@
+# backend/crawler/coalesce.py
+# -*- coding: utf-8 -*-
+"""
+相同爬取請求的 single-flight 合併 + 短 TTL 記憶體快取
+
+同一組 key 同時只會有一個 leader 真的去爬，其他同時進來的呼叫（follower）等 leader 的結果；
+完成後結果放進 cachetools.TTLCache，TTL 內同 key 直接拿快取。
+
+- leader 失敗：follower 拿到同一個例外
+- leader 中途放棄（例如串流被呼叫端關掉）：follower 收到 LeaderAborted，自己重新搶 leader
+- follower 等超過 wait_timeout_s：收到 WaitTimeout，由呼叫端決定自己做或放棄（leader 照常跑完）
+- 空結果不快取（多半是 104 那邊出錯）
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from cachetools import TTLCache
+
+__all__ = ["LeaderAborted", "SingleFlight", "WaitTimeout"]
+
+
+class LeaderAborted(Exception):
+    """leader 沒做完就放棄了，follower 應該重新 acquire。"""
+
+
+class WaitTimeout(Exception):
+    """follower 等 leader 等太久（leader 卡住或上游很慢）。"""
+
+
+class SingleFlight:
+    def __init__(self, *, ttl_s: float = 60.0, maxsize: int = 128, wait_timeout_s: float | None = None) -> None:
+        self.ttl_s = float(ttl_s)
+        # follower 最多等 leader 幾秒；None / <=0 = 一直等
+        self.wait_timeout_s = wait_timeout_s if wait_timeout_s and wait_timeout_s > 0 else None
+        self._cache: TTLCache | None = TTLCache(maxsize=maxsize, ttl=self.ttl_s) if self.ttl_s > 0 else None
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._counters = {"leader_runs": 0, "coalesced": 0, "cache_hits": 0, "errors": 0, "aborted": 0, "wait_timeouts": 0}
+
+    def acquire(self, key: Hashable) -> Tuple[str, Any]:
+        """
+        回傳 ("cached", 值) / ("wait", leader 的 Future) / ("lead", 自己的 Future)。
+        拿到 "lead" 的呼叫端必須在結束時呼叫 complete / fail / abort 其中之一。
+        """
+        with self._lock:
+            if self._cache is not None and key in self._cache:
+                self._counters["cache_hits"] += 1
+                return "cached", self._cache[key]
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self._counters["coalesced"] += 1
+                return "wait", fut
+            fut = Future()
+            self._inflight[key] = fut
+            self._counters["leader_runs"] += 1
+            return "lead", fut
+
+    def wait(self, fut: Future) -> Any:
+        """follower 等 leader 的結果；超過 wait_timeout_s 丟 WaitTimeout。"""
+        try:
+            return fut.result(timeout=self.wait_timeout_s)
+        except FutureTimeout:
+            with self._lock:
+                self._counters["wait_timeouts"] += 1
+            raise WaitTimeout(f"waited {self.wait_timeout_s}s for in-flight leader") from None
+
+    def complete(self, key: Hashable, fut: Future, value: Any) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            if self._cache is not None and value:
+                self._cache[key] = value
+        fut.set_result(value)
+
+    def fail(self, key: Hashable, fut: Future, exc: BaseException) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._counters["errors"] += 1
+        fut.set_exception(exc)
+
+    def abort(self, key: Hashable, fut: Future) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._counters["aborted"] += 1
+        fut.set_exception(LeaderAborted(str(key)))
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """非串流版：同 key 同時只跑一次 fn()，其他人共用結果。"""
+        while True:
+            kind, obj = self.acquire(key)
+            if kind == "cached":
+                return obj
+            if kind == "wait":
+                try:
+                    return self.wait(obj)
+                except LeaderAborted:
+                    continue
+                except WaitTimeout:
+                    # leader 卡住：自己跑一次，不佔 leader 也不寫快取
+                    return fn()
+            try:
+                value = fn()
+            except BaseException as e:
+                self.fail(key, obj, e)
+                raise
+            self.complete(key, obj, value)
+            return value
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        with self._lock:
+            if self._cache is None:
+                return
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["in_flight"] = len(self._inflight)
+            out["cached_keys"] = len(self._cache) if self._cache is not None else 0
+        out["ttl_s"] = self.ttl_s
+        return out
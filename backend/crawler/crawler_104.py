@@ -5,7 +5,9 @@
 
 主要方法
 --------
-get_jobs_data(keyword="資料分析", pages=1, area=None, industry=None, fetch_detail=True)
+iter_jobs_data(...)  # 同參數，邊爬邊 yield 每筆職缺
+get_jobs_data(keyword="資料分析", pages=1, area=None, industry=None, fetch_detail=True,
+              max_workers=DEFAULT_MAX_WORKERS)
 
 參數
 ----
@@ -19,11 +21,17 @@ industry : Optional[str]
     產業代碼（例如：軟體/網路相關 "1002000000"）
 fetch_detail : bool
     是否補抓內頁 Ajax 以取得完整職缺描述＋條件（較慢，但資訊完整）
+max_workers : int
+    同時抓內頁的執行緒數（1 = 逐筆抓）；實際請求頻率由全域 token bucket 控制
+reuse_known : bool
+    增量爬取：job.db 已有且 update_date（104 的 appearDate）沒變的職缺，
+    直接沿用已存的描述＋條件，不再打內頁
 
 回傳
 ----
 List[Dict]，每筆至少包含：
 {
+  "job_no": str | None,
   "job_title": str,
   "description": str,
   "job_url": str | None,
@@ -32,43 +40,185 @@ List[Dict]，每筆至少包含：
   "salary": str | None,
   "update_date": str | None,
   "condition": Dict[str, Any],   # 104 內頁的條件區塊（學歷、年資等），若無則 {}
+  "detail_fetched": bool,        # description / condition 是否來自內頁（或 job.db 已存的內頁資料）
 }
 
 注意
 ----
-- 請尊重網站使用條款，控制請求頻率。
+- 請尊重網站使用條款，控制請求頻率：所有進行中的爬取共用同一個 token bucket
+  （RATE_LIMIT_PER_SEC / RATE_LIMIT_BURST，可用 set_rate_limit() 調整）。
 - 若遇到 429/5xx 會自動重試；仍失敗則略過該筆。
+- 搜尋清單與內頁回應會存進 SQLite 快取（見 http_cache.py），TTL 分開設定；
+  命中快取不連網、也不消耗 token bucket。
 """
 
 from __future__ import annotations
 
-import random
+import os
+import threading
 import time
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 import requests
-from requests.adapters import HTTPAdapter, Retry
+from requests.adapters import Retry
+
+from backend.crawler.coalesce import LeaderAborted, SingleFlight, WaitTimeout
+from backend.crawler.http_cache import CachingHTTPAdapter, ResponseCache
+from backend.dataframe import JobFrame
+from backend.db import DB_DIR, load_known_jobs
+from backend.metrics import CRAWLER_RESPONSES, CRAWLER_RETRIES, stage
+
+# 104 搜尋清單與內頁 Ajax 端點；RESUMATE_104_BASE_URL 可指到本機的假 104（bench/mock_104.py）
+API_BASE_URL = os.environ.get("RESUMATE_104_BASE_URL", "https://www.104.com.tw").rstrip("/")
+SEARCH_API = f"{API_BASE_URL}/jobs/search/list"
+DETAIL_API = f"{API_BASE_URL}/job/ajax/content/{{jobNo}}"
+
+# HTTP 回應快取（SQLite）；RESUMATE_HTTP_CACHE=off 關閉
+# RESUMATE_HTTP_CACHE_OFFLINE=1 時只重播已錄下的回應（離線 benchmark 用）
+HTTP_CACHE_PATH = os.environ.get("RESUMATE_HTTP_CACHE", str(DB_DIR / "http_cache.db"))
+HTTP_CACHE_OFFLINE = os.environ.get("RESUMATE_HTTP_CACHE_OFFLINE", "0") == "1"
+SEARCH_CACHE_TTL = float(os.environ.get("RESUMATE_SEARCH_CACHE_TTL", "600"))      # 清單 10 分鐘
+DETAIL_CACHE_TTL = float(os.environ.get("RESUMATE_DETAIL_CACHE_TTL", "86400"))    # 內頁 1 天
+HTTP_CACHE_MAX_ENTRIES = int(os.environ.get("RESUMATE_HTTP_CACHE_MAX_ENTRIES", "20000"))
+
+# 禮貌性節流：全程序共用的請求速率（每秒幾個請求、最多可瞬間連發幾個）
+RATE_LIMIT_PER_SEC = float(os.environ.get("RESUMATE_RATE_LIMIT_PER_SEC", "2.0"))
+RATE_LIMIT_BURST = int(os.environ.get("RESUMATE_RATE_LIMIT_BURST", "4"))
+# 內頁預設同時抓幾筆
+DEFAULT_MAX_WORKERS = 4
+# 相同條件同時爬取只跑一次（coalesce=True），結果在記憶體留幾秒；0 = 只合併同時進行中的
+CRAWL_COALESCE_TTL_S = float(os.environ.get("RESUMATE_CRAWL_COALESCE_TTL_S", "60"))
+# 合併到別人的爬取時最多等幾秒，超過就自己爬（leader 卡住時不會拖住所有人）；0 = 一直等
+CRAWL_COALESCE_WAIT_S = float(os.environ.get("RESUMATE_CRAWL_COALESCE_WAIT_S", "120"))
+
+__all__ = [
+    "get_jobs_data",
+    "get_jobs_frame",
+    "iter_jobs_data",
+    "set_rate_limit",
+    "TokenBucket",
+    "get_http_cache",
+    "crawl_coalescing_stats",
+]
 
-# 104 搜尋清單與內頁 Ajax 端點
-SEARCH_API = "https://www.104.com.tw/jobs/search/list"
-DETAIL_API = "https://www.104.com.tw/job/ajax/content/{jobNo}"
 
-__all__ = ["get_jobs_data"]
+# ---------------------------
+# Rate limiting
+# ---------------------------
+class TokenBucket:
+    """
+    執行緒安全的 token bucket。
+    每秒補充 rate 個 token，最多累積 burst 個；acquire() 拿不到就睡到夠為止。
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._lock = threading.Lock()
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+
+    def configure(self, rate: float, burst: int) -> None:
+        with self._lock:
+            self.rate = float(rate)
+            self.burst = max(1, int(burst))
+            self._tokens = min(self._tokens, float(self.burst))
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate if self.rate > 0 else 0.1
+            time.sleep(wait)
+
+
+# 所有 get_jobs_data 呼叫（不同 request / 執行緒）共用這一個
+_RATE_LIMITER = TokenBucket(RATE_LIMIT_PER_SEC, RATE_LIMIT_BURST)
+
+
+def set_rate_limit(rate: float, burst: int) -> None:
+    """調整全域請求速率（rate: 每秒請求數, burst: 可瞬間連發數）。"""
+    _RATE_LIMITER.configure(rate, burst)
 
 
 # ---------------------------
 # Session / HTTP utilities
 # ---------------------------
-def _build_session() -> requests.Session:  # requests.Session 使用 TCP 連線重用
+_HTTP_CACHE: Optional[ResponseCache] = None
+_HTTP_CACHE_LOCK = threading.Lock()
+
+
+def get_http_cache() -> Optional[ResponseCache]:
+    """全程序共用的回應快取（第一次用到才開檔）；關閉或開檔失敗時回 None。"""
+    global _HTTP_CACHE
+    if HTTP_CACHE_PATH.lower() in ("", "0", "off", "none"):
+        return None
+    with _HTTP_CACHE_LOCK:
+        if _HTTP_CACHE is None:
+            try:
+                _HTTP_CACHE = ResponseCache(
+                    HTTP_CACHE_PATH,
+                    ttls={
+                        SEARCH_API: SEARCH_CACHE_TTL,
+                        DETAIL_API.split("{", 1)[0]: DETAIL_CACHE_TTL,
+                    },
+                    max_entries=HTTP_CACHE_MAX_ENTRIES,
+                    offline=HTTP_CACHE_OFFLINE,
+                )
+            except Exception as e:
+                print("[104] http cache disabled:", e)
+                return None
+        return _HTTP_CACHE
+
+
+def _endpoint_of(url: str) -> str:
+    """metrics 的 endpoint label：search / detail / other。"""
+    if "/jobs/search/" in url:
+        return "search"
+    if "/job/ajax/content" in url:
+        return "detail"
+    return "other"
+
+
+class _CountingRetry(Retry):
+    """
+    urllib3 每次決定重試都會呼叫 increment()，順便記進 resumate_crawler_retries_total。
+    重試是在 adapter 的 send 裡面發生的，不會經過 throttle，所以每次重試也要在這裡扣一個 token，
+    不然 104 回一串 429 / 5xx 時實際速率會變成設定的好幾倍。
+    """
+
+    def increment(self, method=None, url=None, *args, **kwargs):  # type: ignore[override]
+        CRAWLER_RETRIES.inc(endpoint=_endpoint_of(url or ""))
+        retry = super().increment(method, url, *args, **kwargs)  # 次數用完會直接丟 MaxRetryError
+        _RATE_LIMITER.acquire()
+        return retry
+
+
+def _build_session(pool_size: int = 10) -> requests.Session:  # requests.Session 使用 TCP 連線重用
     s = requests.Session()
-    retries = Retry(
+    retries = _CountingRetry(
         total=3,
         backoff_factor=0.6,
         status_forcelist=[429, 500, 502, 503, 504],
         allowed_methods=frozenset({"GET"}),
     )
-    s.mount("https://", HTTPAdapter(max_retries=retries))
-    s.mount("http://", HTTPAdapter(max_retries=retries))
+    # 連線池要跟同時抓內頁的執行緒數一樣大，不然多出來的連線用完就丟
+    # 快取命中不連網，所以 token bucket 只在真的要送出請求時才扣
+    adapter = CachingHTTPAdapter(
+        get_http_cache(),
+        throttle=_RATE_LIMITER.acquire,
+        max_retries=retries,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+    )
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
     s.headers.update(
         {
             "User-Agent": (
@@ -106,9 +256,10 @@ def _search_page(
         params["area"] = area
     if industry:
         params["indcat"] = industry
-    print(f"[104] using indcat = {industry}")
 
-    r = session.get(SEARCH_API, params=params, timeout=12)
+    with stage("search"):
+        r = session.get(SEARCH_API, params=params, timeout=12)
+    CRAWLER_RESPONSES.inc(endpoint="search", status=r.status_code)
     if not r.ok:
         print(f"[104] search non-200: {r.status_code}")
         return {"data": {"list": []}}
@@ -138,11 +289,13 @@ def _fetch_detail(
     回傳 (description: str, condition: Dict[str, Any])
     """
     try:
-        r = session.get(
-            DETAIL_API.format(jobNo=job_no),
-            headers={"Referer": f"https://www.104.com.tw/job/{job_no}"},
-            timeout=12,
-        )
+        with stage("detail"):
+            r = session.get(
+                DETAIL_API.format(jobNo=job_no),
+                headers={"Referer": f"https://www.104.com.tw/job/{job_no}"},
+                timeout=12,
+            )
+        CRAWLER_RESPONSES.inc(endpoint="detail", status=r.status_code)
         if not r.ok:
             print("[104] detail non-200:", r.status_code)
             return "", {}
@@ -197,10 +350,206 @@ def _fetch_detail(
         return "", {}
 
 
+def _parse_item(it: Dict[str, Any]) -> Dict[str, Any]:
+    """把搜尋清單的一筆轉成結果 dict（描述先用清單摘要，之後再由內頁覆蓋）。"""
+    # ---- 1) 解析 job_no & 正確 job_url ----
+    link_info = it.get("link") or {}
+    job_path = link_info.get("job", "") or ""
+
+    job_no: Optional[str] = None
+
+    # 優先從 link.job 拿真正網址用的那段（例如 /job/7y92b?jobsource=xxx）
+    if job_path:
+        # 去掉 query string，只留 /job/7y92b
+        job_path_no_q = job_path.split("?", 1)[0]
+        # 取最後一段當 job_no：7y92b
+        job_no = job_path_no_q.rstrip("/").split("/")[-1]
+
+    # 如果 link.job 抓不到，再退回用 jobNo（通常是數字 ID）
+    if not job_no:
+        raw_no = it.get("jobNo")
+        if raw_no is not None:
+            job_no = str(raw_no).strip() or None
+
+    job_url = f"https://www.104.com.tw/job/{job_no}" if job_no else None
+
+    # ---- 2) 組裝結果（description / condition 待內頁補上） ----
+    return {
+        "job_no": job_no,
+        "job_title": it.get("jobName"),
+        "description": it.get("description") or it.get("jobDescription") or "",
+        "job_url": job_url,
+        "company": it.get("custName"),
+        "location": it.get("jobAddrNoDesc"),
+        "salary": it.get("salaryDesc"),
+        "update_date": it.get("appearDate"),
+        "condition": {},
+        "detail_fetched": False,
+    }
+
+
 # ---------------------------
 # Public API
 # ---------------------------
 
+# ---------------------------
+# 相同爬取的合併（single-flight）
+# ---------------------------
+_CRAWL_FLIGHT = SingleFlight(ttl_s=CRAWL_COALESCE_TTL_S, wait_timeout_s=CRAWL_COALESCE_WAIT_S)
+
+
+def crawl_coalescing_stats() -> Dict[str, Any]:
+    """leader_runs = 真的去爬的次數、coalesced = 等別人結果的次數、cache_hits = 直接用 TTL 快取。"""
+    return _CRAWL_FLIGHT.stats()
+
+
+def _iter_coalesced(key: tuple, crawl: Callable[[], Iterator[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """
+    同 key 只有 leader 真的爬（照樣邊爬邊 yield），其他人等 leader 爬完再一次吐出。
+    follower 等超過 RESUMATE_CRAWL_COALESCE_WAIT_S 秒就自己爬（不當 leader、結果不進快取）。
+    每個呼叫端拿到的都是各自的 dict 複本（matcher 會在職缺上寫 score）。
+    """
+    while True:
+        kind, obj = _CRAWL_FLIGHT.acquire(key)
+        if kind == "cached":
+            yield from (dict(j) for j in obj)
+            return
+        if kind == "wait":
+            try:
+                jobs = _CRAWL_FLIGHT.wait(obj)
+            except LeaderAborted:
+                continue
+            except WaitTimeout:
+                yield from crawl()
+                return
+            yield from (dict(j) for j in jobs)
+            return
+
+        collected: List[Dict[str, Any]] = []
+        try:
+            for j in crawl():
+                collected.append(j)
+                yield dict(j)
+        except GeneratorExit:
+            _CRAWL_FLIGHT.abort(key, obj)
+            raise
+        except BaseException as e:
+            _CRAWL_FLIGHT.fail(key, obj, e)
+            raise
+        _CRAWL_FLIGHT.complete(key, obj, collected)
+        return
+
+
+def iter_jobs_data(
+    keyword: str = "資料分析",
+    pages: int = 1,
+    *,
+    area: Optional[str] = None,
+    industry: Optional[str] = None,
+    fetch_detail: bool = True,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    reuse_known: bool = True,
+    on_page: Optional[Callable[[int, int], None]] = None,
+    coalesce: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """
+    get_jobs_data 的串流版：每筆職缺一解析完（內頁抓完）就 yield，
+    讓呼叫端可以邊爬邊做後續處理（例如邊爬邊 encode）。
+
+    每頁的內頁請求會一次丟進執行緒池，但依清單順序 yield；
+    參數與每筆的欄位同 get_jobs_data。
+    on_page(page, n_items)：每爬完一頁清單呼叫一次（回報進度用；合併到別人的爬取時不會呼叫）。
+    coalesce=True：同樣 (keyword, pages, area, industry, fetch_detail) 的並行呼叫只爬一次，
+    結果在記憶體保留 RESUMATE_CRAWL_COALESCE_TTL_S 秒（給 API 用；排程器要拿最新資料就不要開）。
+    """
+    crawl = lambda: _iter_jobs_raw(  # noqa: E731
+        keyword,
+        pages,
+        area=area,
+        industry=industry,
+        fetch_detail=fetch_detail,
+        max_workers=max_workers,
+        reuse_known=reuse_known,
+        on_page=on_page,
+    )
+    if not coalesce:
+        return crawl()
+    return _iter_coalesced((keyword, pages, area, industry, bool(fetch_detail)), crawl)
+
+
+def _iter_jobs_raw(
+    keyword: str,
+    pages: int,
+    *,
+    area: Optional[str],
+    industry: Optional[str],
+    fetch_detail: bool,
+    max_workers: int,
+    reuse_known: bool,
+    on_page: Optional[Callable[[int, int], None]],
+) -> Iterator[Dict[str, Any]]:
+    workers = max(1, int(max_workers or 1))
+    session = _build_session(pool_size=max(10, workers))
+
+    # 安全上限，避免打太多
+    pages = max(1, min(int(pages or 1), 10))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="104-detail") as pool:
+        for p in range(1, pages + 1):
+            try:
+                payload = _search_page(session, keyword, p, area=area, industry=industry)
+            except Exception as e:
+                print(f"[104] search page {p} error: {e}")
+                continue
+
+            data = (payload or {}).get("data", {}) or {}
+            items = data.get("list", []) or []
+
+            jobs: List[Dict[str, Any]] = []
+            for it in items:
+                try:
+                    jobs.append(_parse_item(it))
+                except Exception as e:
+                    print(f"[104] parse item error: {e}")
+                    continue
+            if on_page is not None:
+                on_page(p, len(jobs))
+
+            if not fetch_detail:
+                yield from jobs
+                continue
+
+            # 增量：job.db 已有、且 appearDate 沒變的職缺直接沿用（沒有 appearDate 的一律重抓）
+            known = load_known_jobs([j["job_no"] for j in jobs]) if reuse_known else {}
+            for j in jobs:
+                hit = known.get(j["job_no"]) if j["job_no"] else None
+                if hit and j["update_date"] and hit["update_date"] == j["update_date"]:
+                    j["description"] = hit["description"]
+                    j["condition"] = hit["condition"]
+                    j["detail_fetched"] = True
+
+            # 先全部丟進 pool，再依原順序取結果 → 保持清單順序
+            futures = [
+                pool.submit(_fetch_detail, session, j["job_no"])
+                if j["job_no"] and not j["detail_fetched"]
+                else None
+                for j in jobs
+            ]
+            for j, fut in zip(jobs, futures):
+                if fut is not None:
+                    try:
+                        desc, cond = fut.result()
+                    except Exception as e:
+                        print(f"[104] detail {j['job_no']} error: {e}")
+                    else:
+                        # 內頁抓不到描述就保留清單摘要當備援
+                        if desc:
+                            j["description"] = desc
+                            j["detail_fetched"] = True
+                        j["condition"] = cond or {}
+                yield j
+
+
 def get_jobs_data(
     keyword: str = "資料分析",
     pages: int = 1,
@@ -208,14 +557,22 @@ def get_jobs_data(
     area: Optional[str] = None,
     industry: Optional[str] = None,
     fetch_detail: bool = True,
-    per_item_delay: float = 0.4,
-    per_page_delay: float = 0.6,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    reuse_known: bool = True,
+    coalesce: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     以關鍵字（可含地區/產業過濾）抓取 104 職缺清單，並可選擇補抓內頁描述與條件。
 
+    內頁以 max_workers 個執行緒同時抓取，請求頻率由全域 token bucket 控制；
+    回傳順序與搜尋清單相同，單筆失敗只會退回清單摘要，不影響其他筆。
+    reuse_known=True 時，job.db 已有且 update_date 沒變的職缺不會再打內頁。
+    coalesce=True 時相同條件的並行呼叫共用同一次爬取（見 iter_jobs_data）。
+    （實作上就是把 iter_jobs_data 收成 list。）
+
     回傳每筆至少包含：
     {
+      "job_no": str | None,
       "job_title": str,
       "description": str,
       "job_url": str | None,
@@ -224,92 +581,27 @@ def get_jobs_data(
       "salary": str | None,
       "update_date": str | None,
       "condition": Dict[str, Any],
+      "detail_fetched": bool,
     }
     """
-    session = _build_session()
-    results: List[Dict[str, Any]] = []
-
-    # 安全上限，避免打太多
-    pages = max(1, min(int(pages or 1), 10))
-
-    for p in range(1, pages + 1):
-        try:
-            payload = _search_page(session, keyword, p, area=area, industry=industry)
-        except Exception as e:
-            print(f"[104] search page {p} error: {e}")
-            continue
-
-        data = (payload or {}).get("data", {}) or {}
-        items = data.get("list", []) or []
-
-        for it in items:
-            try:
-                # ---- 1) 解析 job_no & 正確 job_url ----
-                link_info = it.get("link") or {}
-                job_path = link_info.get("job", "") or ""
-
-                job_no: Optional[str] = None
-
-                # 優先從 link.job 拿真正網址用的那段（例如 /job/7y92b?jobsource=xxx）
-                if job_path:
-                    # 去掉 query string，只留 /job/7y92b
-                    job_path_no_q = job_path.split("?", 1)[0]
-                    # 取最後一段當 job_no：7y92b
-                    job_no = job_path_no_q.rstrip("/").split("/")[-1]
-
-                # 如果 link.job 抓不到，再退回用 jobNo（通常是數字 ID）
-                if not job_no:
-                    raw_no = it.get("jobNo")
-                    if raw_no is not None:
-                        job_no = str(raw_no).strip() or None
-
-                job_url = f"https://www.104.com.tw/job/{job_no}" if job_no else None
-
-                # ---- 2) 先嘗試抓完整描述 + 條件；失敗則用清單摘要備援 ----
-                description = ""
-                condition: Dict[str, Any] = {}
-
-                if fetch_detail and job_no:
-                    desc, cond = _fetch_detail(session, job_no)
-                    description = desc or ""
-                    condition = cond or {}
-
-                if not description:
-                    description = (
-                        it.get("description")
-                        or it.get("jobDescription")
-                        or ""
-                    )
-
-                # ---- 3) 組裝結果 ----
-                results.append(
-                    {
-                        "job_title": it.get("jobName"),
-                        "description": description or "",
-                        "job_url": job_url,
-                        "company": it.get("custName"),
-                        "location": it.get("jobAddrNoDesc"),
-                        "salary": it.get("salaryDesc"),
-                        "update_date": it.get("appearDate"),
-                        "condition": condition or {},
-                    }
-                )
-
-                # 禮貌性節流（每筆）
-                time.sleep(per_item_delay + random.random() * 0.4)
-
-            except Exception as e:
-                print(f"[104] parse item error: {e}")
-                continue
-
-        # 換頁再等一下
-        time.sleep(per_page_delay + random.random() * 0.5)
-
-    return results
-
-
-
-
-
+    return list(
+        iter_jobs_data(
+            keyword,
+            pages,
+            area=area,
+            industry=industry,
+            fetch_detail=fetch_detail,
+            max_workers=max_workers,
+            reuse_known=reuse_known,
+            coalesce=coalesce,
+        )
+    )
 
 
+def get_jobs_frame(
+    keyword: str = "資料分析",
+    pages: int = 1,
+    **kwargs: Any,
+) -> JobFrame:
+    """get_jobs_data 的欄式版：同樣的參數，結果直接裝成 JobFrame（matcher / upsert_jobs 可直接吃）。"""
+    return JobFrame.from_records(iter_jobs_data(keyword, pages, **kwargs))
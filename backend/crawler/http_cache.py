@@ -0,0 +1,317 @@
+# backend/crawler/http_cache.py
+# -*- coding: utf-8 -*-
+"""
+104 API 的持久化 HTTP 回應快取（SQLite）
+
+用法
+----
+掛在 requests.Session 底下的 HTTPAdapter：
+
+    cache = ResponseCache(path, ttls={SEARCH_API: 600, DETAIL_PREFIX: 86400})
+    session.mount("https://", CachingHTTPAdapter(cache, max_retries=retries))
+
+行為
+----
+- 只快取 GET、status 200、content-type 符合的回應；key = 完整 URL（含 query string）
+- TTL 依 URL 前綴決定（搜尋清單、內頁可分開設定）
+- 過期但有 ETag / Last-Modified 的項目會帶 If-None-Match / If-Modified-Since 重新驗證，
+  伺服器回 304 就沿用舊內容並刷新時間
+- 超過 max_entries 依 last_access 做 LRU 淘汰；命中時的 last_access 先記在記憶體，
+  累積 access_flush_every 筆、超過 access_flush_s 秒或寫入 / 淘汰前才一次寫回（命中不必每次 commit）
+- offline=True：不連網，只重播已錄下的回應（不管 TTL），沒錄到的回 504；
+  可用來做可重現的 benchmark
+- stats() 提供 hits / misses / revalidated / stores / evictions 計數
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+__all__ = ["ResponseCache", "CachingHTTPAdapter"]
+
+# 回應 body 是 urllib3 解壓後的內容，這些 header 重播時不能帶
+_DROP_HEADERS = ("content-encoding", "transfer-encoding", "content-length")
+
+
+class ResponseCache:
+    """執行緒安全的 SQLite 回應快取（單一連線 + lock）。"""
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 600.0,
+        max_entries: int = 5000,
+        offline: bool = False,
+        access_flush_every: int = 256,
+        access_flush_s: float = 30.0,
+    ) -> None:
+        self.path = str(path)
+        # 長的前綴先比對，避免被短前綴吃掉
+        self.ttls = sorted((ttls or {}).items(), key=lambda kv: len(kv[0]), reverse=True)
+        self.default_ttl = float(default_ttl)
+        self.max_entries = max(1, int(max_entries))
+        self.offline = bool(offline)
+        self.access_flush_every = max(1, int(access_flush_every))
+        self.access_flush_s = float(access_flush_s)
+
+        self._lock = threading.Lock()
+        # 還沒寫回的 last_access：{url: 時間}
+        self._pending_access: Dict[str, float] = {}
+        self._last_flush = time.monotonic()
+        self._counters = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_cache(
+                url           TEXT PRIMARY KEY,
+                status        INTEGER,
+                headers       TEXT,
+                body          BLOB,
+                etag          TEXT,
+                last_modified TEXT,
+                stored_at     REAL,
+                last_access   REAL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_http_cache_access ON http_cache(last_access)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+
+    # ---------- 查詢 ----------
+    def ttl_for(self, url: str) -> float:
+        for prefix, ttl in self.ttls:
+            if url.startswith(prefix):
+                return float(ttl)
+        return self.default_ttl
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """取出快取項目（不論是否過期），並更新 last_access；沒有則回 None。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, etag, last_modified, stored_at "
+                "FROM http_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._pending_access[url] = time.time()
+            if (
+                len(self._pending_access) >= self.access_flush_every
+                or time.monotonic() - self._last_flush >= self.access_flush_s
+            ):
+                self._flush_access_locked()
+                self._conn.commit()
+        status, headers, body, etag, last_modified, stored_at = row
+        return {
+            "status": status,
+            "headers": json.loads(headers or "{}"),
+            "body": body or b"",
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": stored_at,
+        }
+
+    def is_fresh(self, url: str, entry: Dict[str, Any]) -> bool:
+        return (time.time() - (entry.get("stored_at") or 0.0)) < self.ttl_for(url)
+
+    # ---------- 寫入 ----------
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        headers = {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS}
+        lower = {k.lower(): v for k, v in headers.items()}
+        now = time.time()
+        with self._lock:
+            # 先寫回命中紀錄，淘汰才看得到最新的 last_access
+            self._flush_access_locked()
+            self._pending_access.pop(url, None)
+            existed = self._conn.execute(
+                "SELECT 1 FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO http_cache(
+                    url, status, headers, body, etag, last_modified, stored_at, last_access
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    url,
+                    status,
+                    json.dumps(headers, ensure_ascii=False),
+                    sqlite3.Binary(body),
+                    lower.get("etag"),
+                    lower.get("last-modified"),
+                    now,
+                    now,
+                ),
+            )
+            if not existed:
+                self._size += 1
+            self._counters["stores"] += 1
+            self._evict_locked()
+            self._conn.commit()
+
+    def touch(self, url: str) -> None:
+        """304 重新驗證成功：把項目視為剛存入。"""
+        now = time.time()
+        with self._lock:
+            self._pending_access.pop(url, None)
+            self._conn.execute(
+                "UPDATE http_cache SET stored_at = ?, last_access = ? WHERE url = ?",
+                (now, now, url),
+            )
+            self._conn.commit()
+
+    def flush(self) -> None:
+        """把記憶體裡的 last_access 寫回 SQLite（關機前或多 worker 共用時可手動呼叫）。"""
+        with self._lock:
+            if self._pending_access:
+                self._flush_access_locked()
+                self._conn.commit()
+
+    def _flush_access_locked(self) -> None:
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE http_cache SET last_access = ? WHERE url = ?",
+                [(ts, url) for url, ts in self._pending_access.items()],
+            )
+            self._pending_access.clear()
+        self._last_flush = time.monotonic()
+
+    def _evict_locked(self) -> None:
+        overflow = self._size - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            """
+            DELETE FROM http_cache WHERE url IN (
+                SELECT url FROM http_cache ORDER BY last_access ASC LIMIT ?
+            )
+            """,
+            (overflow,),
+        )
+        self._size -= overflow
+        self._counters["evictions"] += overflow
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending_access.clear()
+            self._conn.execute("DELETE FROM http_cache")
+            self._conn.commit()
+            self._size = 0
+
+    # ---------- 統計 ----------
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["entries"] = self._size
+        lookups = out["hits"] + out["misses"] + out["revalidated"]
+        out["hit_ratio"] = (out["hits"] + out["revalidated"]) / lookups if lookups else 0.0
+        return out
+
+
+def _cached_response(
+    request: requests.PreparedRequest,
+    status: int,
+    headers: Dict[str, str],
+    body: bytes,
+) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp.reason = "OK" if status == 200 else "Cached"
+    resp.headers = CaseInsensitiveDict(headers)
+    resp._content = body
+    resp.url = request.url or ""
+    resp.request = request
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp.from_cache = True  # type: ignore[attr-defined]
+    return resp
+
+
+class CachingHTTPAdapter(HTTPAdapter):
+    """
+    先查 ResponseCache，沒有（或過期）才真的發請求。
+    throttle：每次真的要連網前呼叫（例如 token bucket 的 acquire），快取命中不消耗額度。
+    """
+
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        *,
+        throttle: Optional[Callable[[], None]] = None,
+        content_types: Tuple[str, ...] = ("application/json",),
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.throttle = throttle
+        self.content_types = content_types
+
+    def _cacheable(self, resp: requests.Response) -> bool:
+        if resp.status_code != 200:
+            return False
+        ctype = resp.headers.get("content-type", "")
+        return any(t in ctype for t in self.content_types)
+
+    def _network(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        if self.throttle:
+            self.throttle()
+        return super().send(request, **kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore[override]
+        cache = self.cache
+        if cache is None or request.method != "GET":
+            return self._network(request, **kwargs)
+
+        url = request.url or ""
+        entry = cache.get(url)
+
+        if cache.offline:
+            if entry is None:
+                cache.count("misses")
+                return _cached_response(request, 504, {"content-type": "text/plain"}, b"offline cache miss")
+            cache.count("hits")
+            return _cached_response(request, entry["status"], entry["headers"], entry["body"])
+
+        if entry is not None and cache.is_fresh(url, entry):
+            cache.count("hits")
+            return _cached_response(request, entry["status"], entry["headers"], entry["body"])
+
+        # 過期：有驗證資訊就帶條件式 header 問伺服器
+        if entry is not None:
+            if entry.get("etag"):
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = self._network(request, **kwargs)
+
+        if resp.status_code == 304 and entry is not None:
+            cache.count("revalidated")
+            cache.touch(url)
+            return _cached_response(request, entry["status"], entry["headers"], entry["body"])
+
+        cache.count("misses")
+        if self._cacheable(resp):
+            try:
+                cache.put(url, resp.status_code, dict(resp.headers), resp.content)
+            except Exception as e:
+                print("[http_cache] store error:", e)
+        return resp
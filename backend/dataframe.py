@@ -0,0 +1,215 @@
+# backend/dataframe.py
+# -*- coding: utf-8 -*-
+"""
+JobFrame：一批職缺的欄式容器（pandas DataFrame + 對齊的向量矩陣）
+
+職缺在系統裡原本是一串 dict：排序時每筆寫 j["score"]、整串 sorted()、存 DB 再逐筆走一次。
+JobFrame 把同一批職缺放成欄：
+- assign_scores()：一次把整個分數向量寫進 score 欄
+- top_k()：np.argpartition 取前 k 再只排這 k 筆，不用整串排序
+- project()：只挑 API 回應要的欄位轉成 dict
+- top_k_indices()：同一套取前 k 的邏輯也給 dict list 用（一次性的小批次不值得先建 DataFrame）
+- vectors / with_vectors()：跟列對齊的 (n, dim) float32 矩陣；已經是連續 float32 就不複製，
+  take() 時跟著列一起取；to_arrow() / from_arrow() 轉成 FixedSizeList 欄也不複製向量 buffer
+
+欄位同 get_jobs_data 的每筆 dict（見 JOB_COLUMNS），另外帶的 key 會變成額外的欄。
+文字欄一律用 object dtype（pandas 3 預設的 str dtype 會把 None 變 NaN）。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["JOB_COLUMNS", "VECTOR_COLUMN", "JobFrame", "top_k_indices"]
+
+JOB_COLUMNS: Tuple[str, ...] = (
+    "job_no",
+    "job_title",
+    "description",
+    "job_url",
+    "company",
+    "location",
+    "salary",
+    "update_date",
+    "condition",
+    "detail_fetched",
+)
+VECTOR_COLUMN = "embedding"
+
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    values 由大到小的前 k 個索引：argpartition O(n) 挑出 k 個，只排這 k 個。
+    同分時保持原本的順序（同 sorted(..., reverse=True) 的穩定排序）。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    k = max(0, min(int(k), n))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    idx = np.arange(n) if k == n else np.sort(np.argpartition(-values, k - 1)[:k])
+    return idx[np.argsort(-values[idx], kind="stable")]
+
+
+def _object_series(values: Sequence[Any]) -> pd.Series:
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return pd.Series(arr, dtype=object, copy=False)
+
+
+class JobFrame:
+    __slots__ = ("df", "_vectors")
+
+    def __init__(self, df: pd.DataFrame, vectors: Optional[np.ndarray] = None) -> None:
+        self.df = df
+        self._vectors: Optional[np.ndarray] = None
+        if vectors is not None:
+            self._set_vectors(vectors)
+
+    # ---------- 建立 ----------
+    @classmethod
+    def from_records(cls, jobs: Iterable[Dict[str, Any]]) -> "JobFrame":
+        jobs = list(jobs)
+        columns: List[str] = list(JOB_COLUMNS)
+        seen = set(columns)
+        for j in jobs:
+            for k in j:
+                if k not in seen:
+                    seen.add(k)
+                    columns.append(k)
+        data: Dict[str, Any] = {}
+        for c in columns:
+            values = [j.get(c) for j in jobs]
+            if c == "detail_fetched":
+                data[c] = np.fromiter((bool(v) for v in values), dtype=bool, count=len(values))
+            elif c == "score":
+                data[c] = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+            else:
+                data[c] = _object_series(values)
+        return cls(pd.DataFrame(data, copy=False))
+
+    @classmethod
+    def empty(cls) -> "JobFrame":
+        return cls.from_records([])
+
+    @classmethod
+    def concat(cls, frames: Sequence["JobFrame"]) -> "JobFrame":
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return cls.empty()
+        df = pd.concat([f.df for f in frames], ignore_index=True)
+        vectors = None
+        if all(f._vectors is not None for f in frames):
+            vectors = np.concatenate([f._vectors for f in frames])
+        return cls(df, vectors)
+
+    # ---------- 基本 ----------
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.df.columns)
+
+    def col(self, name: str) -> np.ndarray:
+        """欄位的 numpy 陣列（object 欄是 view，不複製）。"""
+        return self.df[name].to_numpy()
+
+    def iter_dicts(self, columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, Any]]:
+        """逐列產生只含指定欄位的 dict（給 DB 寫入用，不用先整個 to_records）。"""
+        cols = [c for c in (columns or self.columns) if c in self.df.columns]
+        arrays = [self.col(c) for c in cols]
+        for values in zip(*arrays):
+            yield dict(zip(cols, values))
+
+    # ---------- 向量 ----------
+    def _set_vectors(self, vectors: np.ndarray) -> None:
+        if vectors.ndim != 2 or vectors.shape[0] != len(self.df):
+            raise ValueError(f"vectors shape {vectors.shape} does not match {len(self.df)} rows")
+        # 已經是 C-contiguous float32 時不會複製
+        self._vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    def with_vectors(self, vectors: np.ndarray) -> "JobFrame":
+        """掛上跟列對齊的向量（就地），回傳自己方便串接。"""
+        self._set_vectors(vectors)
+        return self
+
+    @property
+    def vectors(self) -> Optional[np.ndarray]:
+        """(n, dim) float32，直接拿去做內積 / 存 embedding，不複製。"""
+        return self._vectors
+
+    # ---------- 分數 / 排序 ----------
+    def assign_scores(self, scores: np.ndarray, *, decimals: int = 4) -> "JobFrame":
+        if len(scores) != len(self.df):
+            raise ValueError(f"{len(scores)} scores for {len(self.df)} rows")
+        self.df["score"] = np.round(np.asarray(scores, dtype=np.float64), decimals)
+        return self
+
+    def take(self, idx: np.ndarray) -> "JobFrame":
+        idx = np.asarray(idx, dtype=np.intp)
+        vectors = self._vectors[idx] if self._vectors is not None else None
+        return JobFrame(self.df.take(idx).reset_index(drop=True), vectors)
+
+    def top_k(self, k: int, by: str = "score") -> "JobFrame":
+        """依 by 欄由大到小取前 k 筆（見 top_k_indices）。"""
+        return self.take(top_k_indices(self.df[by].to_numpy(dtype=np.float64), k))
+
+    # ---------- 輸出 ----------
+    def project(self, columns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """轉成 API 回應用的 dict list；columns=None 時全部欄位。"""
+        cols = list(self.df.columns) if columns is None else [c for c in columns if c in self.df.columns]
+        # tolist() 把 numpy 純量轉回 Python 型別（float / bool），JSON 直接可用
+        arrays = [self.df[c].to_numpy().tolist() for c in cols]
+        return [dict(zip(cols, row)) for row in zip(*arrays)]
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return self.project(None)
+
+    def to_arrow(self, *, include_vectors: bool = True):
+        """
+        pyarrow.Table。condition（dict）存成 JSON 字串，免得各筆 key 不同被推成稀疏的 struct；
+        向量存成 FixedSizeList<float32> 欄（從 numpy buffer 直接包，不複製）。
+        """
+        import pyarrow as pa
+
+        arrays = []
+        for c in self.df.columns:
+            values = self.col(c)
+            if c == "condition":
+                values = [json.dumps(v, ensure_ascii=False) if v else None for v in values]
+            arrays.append(pa.array(values, from_pandas=True))
+        table = pa.Table.from_arrays(arrays, names=list(self.df.columns))
+        if include_vectors and self._vectors is not None:
+            dim = self._vectors.shape[1]
+            flat = pa.array(self._vectors.reshape(-1))
+            table = table.append_column(VECTOR_COLUMN, pa.FixedSizeListArray.from_arrays(flat, dim))
+        return table
+
+    @classmethod
+    def from_arrow(cls, table) -> "JobFrame":
+        """to_arrow() 的反向；embedding 欄直接 view 成 numpy（單一 chunk 時不複製）。"""
+        import pyarrow as pa
+
+        vectors = None
+        if VECTOR_COLUMN in table.column_names:
+            col = table.column(VECTOR_COLUMN)
+            chunk = col.chunk(0) if col.num_chunks == 1 else col.combine_chunks()
+            dim = chunk.type.list_size
+            values = chunk.values.slice(chunk.offset * dim, len(chunk) * dim)
+            vectors = values.to_numpy(zero_copy_only=True).reshape(-1, dim)
+            table = table.drop_columns([VECTOR_COLUMN])
+
+        data: Dict[str, Any] = {}
+        for name, col in zip(table.column_names, table.columns):
+            if pa.types.is_boolean(col.type) or pa.types.is_floating(col.type):
+                data[name] = col.to_numpy()
+            elif name == "condition":
+                data[name] = _object_series([json.loads(v) if v else {} for v in col.to_pylist()])
+            else:
+                data[name] = _object_series(col.to_pylist())
+        return cls(pd.DataFrame(data, copy=False), vectors)
@@ -1,97 +1,285 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from datetime import datetime, timedelta
+
+from backend.dataframe import JobFrame
+from backend.metrics import timed
+from backend.utils.compression import DescriptionCodec, build_zlib_dict, build_zstd_dict
 
 BASE_DIR = Path(__file__).resolve().parent  # 這個資料夾的絕對路徑
 
-# 定義三個資料庫的完整路徑
-RESUME_DB_PATH = BASE_DIR / "resume.db"
-JOB_DB_PATH    = BASE_DIR / "job.db"
-MATCH_DB_PATH  = BASE_DIR / "match.db"
+# 定義三個資料庫的完整路徑；RESUMATE_DB_DIR 可改放別的資料夾（benchmark 用暫存資料夾）
+DB_DIR = Path(os.environ.get("RESUMATE_DB_DIR", str(BASE_DIR)))
+RESUME_DB_PATH = DB_DIR / "resume.db"
+JOB_DB_PATH    = DB_DIR / "job.db"
+MATCH_DB_PATH  = DB_DIR / "match.db"
 
 
-def get_resume_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(RESUME_DB_PATH)
+# ---------------------------
+# 連線管理
+# ---------------------------
+# separate：三個 DB 檔各自連線（預設）
+# attached：以 resume.db 為主連線，ATTACH job.db / match.db，
+#           同一個 transaction() 可以一起寫三個 DB 的資料
+DB_MODE = os.environ.get("RESUMATE_DB_MODE", "separate")
+# WAL 讓讀寫可以並行；注意 WAL 下跨 ATTACH 檔案的 transaction 只對各檔個別原子，
+# 需要三檔整體原子性時把 journal mode 設成 TRUNCATE / DELETE
+JOURNAL_MODE = os.environ.get("RESUMATE_SQLITE_JOURNAL", "WAL")
+BUSY_TIMEOUT_MS = int(os.environ.get("RESUMATE_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",      # WAL 下 NORMAL 就不會壞檔，少很多 fsync
+    "PRAGMA cache_size = -20000",       # 約 20MB page cache
+    "PRAGMA mmap_size = 268435456",     # 256MB memory-mapped I/O
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA foreign_keys = ON",
+)
+_ATTACH_ALIASES = {"job": "jobdb", "match": "matchdb"}
+
+# 每個執行緒各自保留連線（sqlite3 連線不適合跨執行緒共用），用完不關
+_local = threading.local()
+
+
+def _configure(conn: sqlite3.Connection, schema: str = "main") -> None:
+    conn.execute(f"PRAGMA {schema}.journal_mode = {JOURNAL_MODE}")
+    for pragma in _PRAGMAS:
+        name, value = pragma[len("PRAGMA "):].split(" = ")
+        if name in ("temp_store", "foreign_keys"):
+            if schema == "main":
+                conn.execute(pragma)
+        else:
+            conn.execute(f"PRAGMA {schema}.{name} = {value}")
+
+
+def _open(path: Path | str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000)
     conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    _configure(conn)
     return conn
 
-def get_job_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(JOB_DB_PATH)
-    conn.row_factory = sqlite3.Row
+
+def _thread_conns() -> Dict[str, sqlite3.Connection]:
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    return conns
+
+
+def _file_conn(path: Path | str) -> sqlite3.Connection:
+    """這個執行緒對某個 DB 檔的持久連線（依路徑區分）。"""
+    conns = _thread_conns()
+    key = str(path)
+    conn = conns.get(key)
+    if conn is None:
+        conn = conns[key] = _open(path)
     return conn
 
-def get_match_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(MATCH_DB_PATH)
-    conn.row_factory = sqlite3.Row
+
+def _attached_conn() -> sqlite3.Connection:
+    """attached 模式：resume.db 為 main，再掛上 job.db / match.db。"""
+    conns = _thread_conns()
+    key = f"attached:{RESUME_DB_PATH}:{JOB_DB_PATH}:{MATCH_DB_PATH}"
+    conn = conns.get(key)
+    if conn is None:
+        conn = _open(RESUME_DB_PATH)
+        for path, alias in ((JOB_DB_PATH, _ATTACH_ALIASES["job"]), (MATCH_DB_PATH, _ATTACH_ALIASES["match"])):
+            conn.execute("ATTACH DATABASE ? AS " + alias, (str(path),))
+            _configure(conn, alias)
+        conns[key] = conn
     return conn
 
 
+def get_resume_conn() -> sqlite3.Connection:
+    return _attached_conn() if DB_MODE == "attached" else _file_conn(RESUME_DB_PATH)
+
+def get_job_conn() -> sqlite3.Connection:
+    return _attached_conn() if DB_MODE == "attached" else _file_conn(JOB_DB_PATH)
+
+def get_match_conn() -> sqlite3.Connection:
+    return _attached_conn() if DB_MODE == "attached" else _file_conn(MATCH_DB_PATH)
+
+
+def close_thread_connections() -> None:
+    """關掉目前執行緒保留的所有連線（worker 執行緒結束前可呼叫）。"""
+    conns = _thread_conns()
+    for conn in conns.values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    conns.clear()
+
+
+@contextmanager
+def _tx(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    寫入用的 transaction：正常結束 commit、例外 rollback。
+    若外層已有 transaction()（attached 模式），就併進外層，不自己 commit。
+    """
+    if getattr(_local, "tx_conn", None) is conn:
+        yield conn
+        return
+    outer, _local.tx_conn = getattr(_local, "tx_conn", None), conn
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _local.tx_conn = outer
+
+
+@contextmanager
+def transaction() -> Iterator[None]:
+    """
+    把一個 request 對 resume / job / match 的寫入包成同一個 transaction。
+    只有 attached 模式才有跨檔效果；separate 模式下各函式照舊各自 commit。
+
+        with transaction():
+            rid = save_parsed_resume(...)
+            save_jobs(...)
+            save_match_results(rid, ranked)
+    """
+    if DB_MODE != "attached":
+        yield
+        return
+    with _tx(_attached_conn()):
+        yield
+
+
+def _ensure_columns(conn: sqlite3.Connection, table: str, columns: Dict[str, str]) -> None:
+    """簡易 migration：表裡缺哪些欄位就 ALTER TABLE 補上。"""
+    existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, decl in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
 def init_resume_db() -> None:
-    conn = get_resume_conn()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS resumes(
-            id           INTEGER PRIMARY KEY AUTOINCREMENT,
-            filename     TEXT,
-            uploaded_at  TEXT, 
-            content      TEXT
+    # 建表一律直接連該檔（attached 模式下 get_*_conn 的 main 是 resume.db）
+    conn = _file_conn(RESUME_DB_PATH)
+    with _tx(conn):
+        cur = conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resumes(
+                id           INTEGER PRIMARY KEY AUTOINCREMENT,
+                filename     TEXT,
+                uploaded_at  TEXT, 
+                content      TEXT
+            )
+            """
+        )
+        # 上傳檔案的 SHA-256 → resume_id：同一份檔案重傳時直接重用解析結果
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resume_files(
+                sha256      TEXT PRIMARY KEY,  -- 原始上傳 bytes 的 SHA-256
+                resume_id   INTEGER,           -- 對應 resumes.id（content 就是解析快取）
+                filename    TEXT,
+                size        INTEGER,
+                first_seen  TEXT,
+                last_seen   TEXT,
+                uploads     INTEGER DEFAULT 1
+            )
+            """
         )
-        """
-    )
-    conn.commit()
-    conn.close()
 
 
 def init_job_db() -> None:
-    conn = get_job_conn()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS jobs(
-            id             INTEGER PRIMARY KEY AUTOINCREMENT,
-            job_no         TEXT UNIQUE,   -- 104 的 job ID
-            job_title      TEXT,
-            company        TEXT,
-            location       TEXT,
-            salary         TEXT,
-            update_date    TEXT,
-            job_url        TEXT,
-            keyword        TEXT,
-            area           TEXT,
-            industry       TEXT,
-            condition_json TEXT,          -- 之後要存條件 JSON
-            crawled_at     TEXT
+    conn = _file_conn(JOB_DB_PATH)
+    with _tx(conn):
+        cur = conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs(
+                id             INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_no         TEXT UNIQUE,   -- 104 的 job ID
+                job_title      TEXT,
+                company        TEXT,
+                location       TEXT,
+                salary         TEXT,
+                update_date    TEXT,
+                job_url        TEXT,
+                keyword        TEXT,
+                area           TEXT,
+                industry       TEXT,
+                condition_json TEXT,          -- 之後要存條件 JSON
+                crawled_at     TEXT,
+                description    BLOB,          -- 內頁完整描述（壓縮存放，見 pack_description；增量爬取時直接重用）
+                content_hash   TEXT           -- 內容欄位的 hash，upsert 時判斷有沒有變
+            )
+            """
+        )
+        # 舊版 job.db 沒有 description / content_hash 欄位 → 補上
+        _ensure_columns(conn, "jobs", {"description": "TEXT", "content_hash": "TEXT"})
+        # 排程器每次預爬的紀錄（也記下該次清單的 job_no 順序，/match 可直接從本地重建結果）
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS crawl_runs(
+                id           INTEGER PRIMARY KEY AUTOINCREMENT,
+                keyword      TEXT,
+                area         TEXT,
+                industry     TEXT,
+                pages        INTEGER,
+                started_at   TEXT,
+                duration_s   REAL,
+                jobs_seen    INTEGER,
+                new_jobs     INTEGER,
+                errors       INTEGER,
+                error_msg    TEXT,
+                job_nos_json TEXT
+            )
+            """
+        )
+        # 每頁各有幾個 job_no（JSON list），pages 較少的請求只取前面幾頁
+        _ensure_columns(conn, "crawl_runs", {"page_counts_json": "TEXT"})
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_jobs_crawled_at ON jobs(crawled_at)")
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_crawl_runs_filter "
+            "ON crawl_runs(keyword, area, industry, started_at)"
+        )
+        # 描述壓縮用的共用字典（train_description_dict 產生，最新一份給寫入用）
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS description_dicts(
+                id         INTEGER PRIMARY KEY AUTOINCREMENT,
+                codec      TEXT,
+                dict       BLOB,
+                samples    INTEGER,
+                created_at TEXT
+            )
+            """
         )
-        """
-    )
-    conn.commit()
-    conn.close()
 
 
 def init_match_db() -> None:
-    conn = get_match_conn()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS matches(
-            id         INTEGER PRIMARY KEY AUTOINCREMENT,
-            resume_id  INTEGER,   -- 對應 resumes.id
-            job_no     TEXT,      -- 對應 jobs.job_no
-            job_title  TEXT,      -- 對應 jobs.job_title
-            company    TEXT,      -- 對應 jobs.company
-            score      REAL,
-            rank       INTEGER,
-            matched_at TEXT
+    conn = _file_conn(MATCH_DB_PATH)
+    with _tx(conn):
+        cur = conn.cursor()
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS matches(
+                id         INTEGER PRIMARY KEY AUTOINCREMENT,
+                resume_id  INTEGER,   -- 對應 resumes.id
+                job_no     TEXT,      -- 對應 jobs.job_no
+                job_title  TEXT,      -- 對應 jobs.job_title
+                company    TEXT,      -- 對應 jobs.company
+                score      REAL,
+                rank       INTEGER,
+                matched_at TEXT
+            )
+            """
         )
-        """
-    )
-    conn.commit()
-    conn.close()
 
 
 def init_all_dbs() -> None:
@@ -101,113 +289,627 @@ def init_all_dbs() -> None:
 
 
 # 把解析後的履歷文字存進 resume.db
-def save_parsed_resume(filename: str, resume_text: str) -> int:
+@timed("db_resume")
+def save_parsed_resume(
+    filename: str,
+    resume_text: str,
+    *,
+    sha256: Optional[str] = None,
+    size: Optional[int] = None,
+) -> int:
+    """
+    存一份解析後的履歷，回傳 resume_id。
+    有給 sha256 時同時登記到 resume_files；同一份檔案已經存過（例如併發重傳）就回傳原本的 id。
+    """
+    now = datetime.utcnow().isoformat()
+    conn = get_resume_conn()
+    with _tx(conn):
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO resumes (filename, uploaded_at, content)
+            VALUES (?, ?, ?)
+            """,
+            (
+                filename,
+                now,
+                resume_text,
+            ),
+        )
+        resume_id = cur.lastrowid
+        if sha256:
+            cur.execute(
+                """
+                INSERT INTO resume_files (sha256, resume_id, filename, size, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(sha256) DO NOTHING
+                """,
+                (sha256, resume_id, filename, size, now, now),
+            )
+            if cur.rowcount == 0:
+                cur.execute("DELETE FROM resumes WHERE id = ?", (resume_id,))
+                resume_id = conn.execute(
+                    "SELECT resume_id FROM resume_files WHERE sha256 = ?", (sha256,)
+                ).fetchone()["resume_id"]
+    return resume_id
+
+
+def load_resume_by_hash(sha256: str) -> Optional[Dict[str, Any]]:
+    """
+    依上傳檔案的 SHA-256 找之前解析過的履歷：回傳 {"resume_id", "content"}，沒有則 None。
+    命中時順便更新 last_seen / uploads。
+    """
     conn = get_resume_conn()
-    cur = conn.cursor()
-    cur.execute(
+    row = conn.execute(
         """
-        INSERT INTO resumes (filename, uploaded_at, content)
-        VALUES (?, ?, ?)
+        SELECT f.resume_id, r.content
+          FROM resume_files f
+          JOIN resumes r ON r.id = f.resume_id
+         WHERE f.sha256 = ?
         """,
-        (
-            filename,
-            datetime.utcnow().isoformat(),
-            resume_text,
-        ),
-    )
-    conn.commit()
-    resume_id = cur.lastrowid
-    conn.close()
-    return resume_id
+        (sha256,),
+    ).fetchone()
+    if row is None:
+        return None
+    with _tx(conn):
+        conn.execute(
+            "UPDATE resume_files SET last_seen = ?, uploads = uploads + 1 WHERE sha256 = ?",
+            (datetime.utcnow().isoformat(), sha256),
+        )
+    return {"resume_id": row["resume_id"], "content": row["content"]}
 
 
-def save_jobs(
-    jobs: List[Dict[str, Any]],
+# ---------------------------
+# 職缺描述壓縮
+# ---------------------------
+# zlib（預設）/ zstd（需 zstandard）/ off（存純文字）；讀取一律自動判斷，新舊格式可混存
+DESCRIPTION_CODEC = os.environ.get("RESUMATE_DESC_CODEC", "zlib")
+_codec: Optional[DescriptionCodec] = None
+_codec_lock = threading.Lock()
+_dict_cache: Dict[int, bytes] = {}
+
+
+def _load_description_dict(dict_id: int) -> Optional[bytes]:
+    data = _dict_cache.get(dict_id)
+    if data is None:
+        row = get_job_conn().execute(
+            "SELECT dict FROM description_dicts WHERE id = ?", (dict_id,)
+        ).fetchone()
+        if row is not None:
+            data = _dict_cache[dict_id] = row["dict"]
+    return data
+
+
+def _get_codec() -> DescriptionCodec:
+    global _codec
+    if _codec is None:
+        with _codec_lock:
+            if _codec is None:
+                codec = DescriptionCodec(
+                    DESCRIPTION_CODEC if DESCRIPTION_CODEC != "off" else "zlib",
+                    dict_loader=_load_description_dict,
+                )
+                try:
+                    row = get_job_conn().execute(
+                        "SELECT id, dict FROM description_dicts WHERE codec = ? ORDER BY id DESC LIMIT 1",
+                        (codec.codec,),
+                    ).fetchone()
+                except sqlite3.OperationalError:   # 還沒 init_job_db
+                    row = None
+                if row is not None:
+                    codec.use_dict(row["id"], row["dict"])
+                _codec = codec
+    return _codec
+
+
+def pack_description(text: Optional[str]) -> Union[bytes, str, None]:
+    """寫進 jobs.description 前呼叫（RESUMATE_DESC_CODEC=off 時原樣回傳）。"""
+    if not text or DESCRIPTION_CODEC == "off":
+        return text or None
+    return _get_codec().compress(text)
+
+
+def unpack_description(value: Union[bytes, str, None]) -> Optional[str]:
+    """jobs.description 的值 → 文字（舊的純文字資料原樣回傳）。"""
+    return _get_codec().decompress(value) if isinstance(value, bytes) else value
+
+
+def train_description_dict(sample_size: int = 2000) -> Optional[int]:
+    """
+    從 job.db 最近的描述訓練一份共用字典，存進 description_dicts 並改用它寫入。
+    舊資料照樣讀得到（每筆都記著自己用的字典 id）；樣本太少時回 None。
+    """
+    rows = get_job_conn().execute(
+        """
+        SELECT description FROM jobs
+         WHERE description IS NOT NULL
+         ORDER BY crawled_at DESC
+         LIMIT ?
+        """,
+        (sample_size,),
+    ).fetchall()
+    samples = [unpack_description(r["description"]) for r in rows]
+    if len(samples) < 10:
+        return None
+
+    codec = _get_codec()
+    data = build_zstd_dict(samples) if codec.codec == "zstd" else build_zlib_dict(samples)
+    if not data:
+        return None
+    conn = get_job_conn()
+    with _tx(conn):
+        cur = conn.execute(
+            "INSERT INTO description_dicts (codec, dict, samples, created_at) VALUES (?, ?, ?, ?)",
+            (codec.codec, data, len(samples), datetime.utcnow().isoformat()),
+        )
+    dict_id = cur.lastrowid
+    _dict_cache[dict_id] = data
+    codec.use_dict(dict_id, data)
+    return dict_id
+
+
+def recompress_descriptions(batch_size: int = 500) -> int:
+    """
+    把還是純文字的舊描述改存成壓縮格式（分批，每批一個 transaction）。
+    回傳改寫筆數。RESUMATE_DESC_CODEC=off 時不做事。
+    """
+    if DESCRIPTION_CODEC == "off":
+        return 0
+    conn = get_job_conn()
+    done = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT id, description FROM jobs
+             WHERE id > ? AND typeof(description) = 'text'
+             ORDER BY id
+             LIMIT ?
+            """,
+            (last_id, batch_size),
+        ).fetchall()
+        if not rows:
+            return done
+        with _tx(conn):
+            conn.executemany(
+                "UPDATE jobs SET description = ? WHERE id = ?",
+                [(pack_description(r["description"]), r["id"]) for r in rows],
+            )
+        done += len(rows)
+        last_id = rows[-1]["id"]
+
+
+# 判斷職缺內容有沒有變的欄位（keyword / area / industry / crawled_at 不算內容）
+_JOB_CONTENT_FIELDS = (
+    "job_title", "company", "location", "salary", "update_date",
+    "job_url", "condition_json", "description",
+)
+# upsert_jobs 會讀到的輸入欄位
+_JOB_INPUT_FIELDS = (
+    "job_no", "job_title", "company", "location", "salary", "update_date",
+    "job_url", "condition", "description", "detail_fetched",
+)
+# SQLite 一個 statement 最多 999 個參數（舊版預設），IN (...) 查詢要分段
+_SQLITE_MAX_VARS = 900
+
+
+def _select_in(conn: sqlite3.Connection, sql: str, values: Sequence[Any]) -> List[sqlite3.Row]:
+    """
+    sql 裡的 {placeholders} 換成 IN (...) 的 ?，values 每 _SQLITE_MAX_VARS 個查一次再合併。
+    sql 其他參數不支援（只有 IN 這一組）；回傳順序不保證，呼叫端自己依 key 排。
+    """
+    rows: List[sqlite3.Row] = []
+    for i in range(0, len(values), _SQLITE_MAX_VARS):
+        chunk = list(values[i : i + _SQLITE_MAX_VARS])
+        rows.extend(conn.execute(sql.format(placeholders=",".join("?" * len(chunk))), chunk).fetchall())
+    return rows
+
+
+def _content_hash(row: Dict[str, Any]) -> str:
+    payload = json.dumps([row.get(f) for f in _JOB_CONTENT_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+@timed("db_jobs")
+def upsert_jobs(
+    jobs: Union[List[Dict[str, Any]], JobFrame],
     *,
     keyword: str,
     area: Optional[str],
     industry: Optional[str],
-) -> int:
-    conn = get_job_conn()
-    cur = conn.cursor()
+) -> Dict[str, int]:
+    """
+    批次寫入職缺：一個 transaction、executemany，
+    INSERT ... ON CONFLICT(job_no) DO UPDATE，只改寫內容 hash 有變的列。
+
+    沒抓內頁的職缺（detail_fetched=False）不會蓋掉之前存的描述 / 條件。
+    jobs 也可以直接給 JobFrame（只讀需要的欄，不先轉成完整 dict）。
+    回傳 {"inserted": n, "updated": n, "unchanged": n}。
+    """
+    if isinstance(jobs, JobFrame):
+        jobs = jobs.iter_dicts(_JOB_INPUT_FIELDS)
     now = datetime.utcnow().isoformat()
-    inserted = 0
+    rows: Dict[Any, Dict[str, Any]] = {}
+    anonymous: List[Dict[str, Any]] = []   # 沒有 job_no 的職缺無法比對，一律新增
 
     for j in jobs:
         job_url = j.get("job_url") or ""
-        job_no = job_url.split("/")[-1] if job_url else None
-
+        job_no = j.get("job_no") or (job_url.split("/")[-1] if job_url else None)
         condition = j.get("condition") or {}
-        condition_json = json.dumps(condition, ensure_ascii=False) if condition else None
+        row = {
+            "job_no": job_no,
+            "job_title": j.get("job_title"),
+            "company": j.get("company"),
+            "location": j.get("location"),
+            "salary": j.get("salary"),
+            "update_date": j.get("update_date"),
+            "job_url": job_url,
+            "condition_json": json.dumps(condition, ensure_ascii=False) if condition else None,
+            # 只存內頁抓回來的完整描述；清單摘要不存，免得下次被當成內頁重用
+            "description": (j.get("description") or None) if j.get("detail_fetched") else None,
+        }
+        if job_no:
+            rows[job_no] = row   # 同一批重複的 job_no 以最後一筆為準
+        else:
+            anonymous.append(row)
 
-        try:
-            cur.execute(
+    conn = get_job_conn()
+    existing: Dict[str, sqlite3.Row] = {
+        r["job_no"]: r
+        for r in _select_in(
+            conn,
+            """
+            SELECT job_no, content_hash, condition_json, description
+              FROM jobs
+             WHERE job_no IN ({placeholders})
+            """,
+            list(rows),
+        )
+    }
+
+    counts = {"inserted": len(anonymous), "updated": 0, "unchanged": 0}
+    params = []
+    for job_no, row in list(rows.items()) + [(None, r) for r in anonymous]:
+        old = existing.get(job_no) if job_no else None
+        if old is not None:
+            # 這次沒抓內頁 → 沿用已存的描述 / 條件再比對
+            row["description"] = row["description"] or unpack_description(old["description"])
+            row["condition_json"] = row["condition_json"] or old["condition_json"]
+        row["content_hash"] = _content_hash(row)
+        if old is not None:
+            if old["content_hash"] == row["content_hash"]:
+                counts["unchanged"] += 1
+                continue
+            counts["updated"] += 1
+        elif job_no:
+            counts["inserted"] += 1
+        params.append(
+            (
+                row["job_no"], row["job_title"], row["company"], row["location"],
+                row["salary"], row["update_date"], row["job_url"], keyword, area,
+                industry, row["condition_json"], now, pack_description(row["description"]),
+                row["content_hash"],
+            )
+        )
+
+    if params:
+        with _tx(conn):
+            conn.executemany(
                 """
-                INSERT OR IGNORE INTO jobs(
+                INSERT INTO jobs(
                     job_no, job_title, company, location, salary,
                     update_date, job_url, keyword, area, industry,
-                    condition_json, crawled_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    condition_json, crawled_at, description, content_hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(job_no) DO UPDATE SET
+                    job_title      = excluded.job_title,
+                    company        = excluded.company,
+                    location       = excluded.location,
+                    salary         = excluded.salary,
+                    update_date    = excluded.update_date,
+                    job_url        = excluded.job_url,
+                    condition_json = excluded.condition_json,
+                    description    = excluded.description,
+                    content_hash   = excluded.content_hash,
+                    crawled_at     = excluded.crawled_at
+                WHERE jobs.content_hash IS NOT excluded.content_hash
                 """,
+                params,
+            )
+    return counts
+
+
+def save_jobs(
+    jobs: List[Dict[str, Any]],
+    *,
+    keyword: str,
+    area: Optional[str],
+    industry: Optional[str],
+) -> int:
+    """舊介面：同 upsert_jobs，只回傳新增筆數。"""
+    return upsert_jobs(jobs, keyword=keyword, area=area, industry=industry)["inserted"]
+
+
+@timed("db_matches")
+def save_match_results_bulk(
+    results: List[Tuple[int, List[Dict[str, Any]]]],
+) -> int:
+    """批次版 save_match_results：[(resume_id, ranked_jobs), ...] 一個 transaction、executemany 寫完。"""
+    now = datetime.utcnow().isoformat()
+    rows = []
+    for resume_id, ranked_jobs in results:
+        for rank, job in enumerate(ranked_jobs, start=1):
+            job_url = job.get("job_url") or ""
+            rows.append(
                 (
-                    job_no,
-                    j.get("job_title"),
-                    j.get("company"),
-                    j.get("location"),
-                    j.get("salary"),
-                    j.get("update_date"),
-                    job_url,
-                    keyword,
-                    area,
-                    industry,
-                    condition_json,
+                    resume_id,
+                    job.get("job_no") or (job_url.split("/")[-1] if job_url else None),
+                    job.get("job_title"),
+                    job.get("company"),
+                    float(job.get("score") or 0.0),
+                    rank,
                     now,
-                ),
+                )
             )
-            if cur.rowcount > 0:
-                inserted += 1
-        except Exception as e:
-            print("[job.db insert error]", e)
-            continue
+    if not rows:
+        return 0
 
-    conn.commit()
-    conn.close()
-    return inserted
+    conn = get_match_conn()
+    with _tx(conn):
+        conn.executemany(
+            """
+            INSERT INTO matches (resume_id, job_no, job_title, company, score, rank, matched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+    return len(rows)
+
+
+def load_known_jobs(job_nos: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    依 job_no 查 job.db 已存的職缺，給爬蟲做增量抓取用。
+    回傳 {job_no: {"update_date": str | None, "description": str, "condition": Dict}}，
+    只包含有存到描述的職缺；查詢失敗時回空 dict（爬蟲就全部重抓）。
+    """
+    job_nos = [n for n in dict.fromkeys(job_nos) if n]
+    if not job_nos:
+        return {}
+
+    conn = get_job_conn()
+    try:
+        rows = _select_in(
+            conn,
+            """
+            SELECT job_no, update_date, description, condition_json
+              FROM jobs
+             WHERE job_no IN ({placeholders})
+               AND description IS NOT NULL AND description != ''
+            """,
+            job_nos,
+        )
+    except sqlite3.Error as e:
+        print("[job.db] load_known_jobs error:", e)
+        return {}
+
+    known: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        try:
+            condition = json.loads(row["condition_json"]) if row["condition_json"] else {}
+        except ValueError:
+            condition = {}
+        known[row["job_no"]] = {
+            "update_date": row["update_date"],
+            "description": unpack_description(row["description"]),
+            "condition": condition,
+        }
+    return known
 
 
 def save_match_results(
     resume_id: int,
     ranked_jobs: List[Dict[str, Any]],
 ) -> int:
-    conn = get_match_conn()
-    cur = conn.cursor()
-    now = datetime.utcnow().isoformat()
-    inserted = 0
+    return save_match_results_bulk([(resume_id, ranked_jobs)])
 
-    for rank, job in enumerate(ranked_jobs, start=1):
-        job_url = job.get("job_url") or ""
-        job_no = job_url.split("/")[-1] if job_url else None
-        score = float(job.get("score") or 0.0)
 
+def save_crawl_run(
+    *,
+    keyword: str,
+    area: Optional[str],
+    industry: Optional[str],
+    pages: int,
+    started_at: str,
+    duration_s: float,
+    jobs_seen: int,
+    new_jobs: int,
+    errors: int,
+    error_msg: Optional[str],
+    job_nos: List[str],
+    page_counts: Optional[List[int]] = None,
+) -> int:
+    conn = get_job_conn()
+    with _tx(conn):
+        cur = conn.cursor()
         cur.execute(
             """
-            INSERT INTO matches (resume_id, job_no, job_title, company, score, rank, matched_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO crawl_runs(
+                keyword, area, industry, pages, started_at, duration_s,
+                jobs_seen, new_jobs, errors, error_msg, job_nos_json, page_counts_json
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
-                resume_id,
-                job_no,
-                job.get("job_title"),
-                job.get("company"),
-                score,
-                rank,
-                now,
+                keyword,
+                area,
+                industry,
+                pages,
+                started_at,
+                duration_s,
+                jobs_seen,
+                new_jobs,
+                errors,
+                error_msg,
+                json.dumps(job_nos),
+                json.dumps(page_counts) if page_counts is not None else None,
             ),
         )
-        inserted += 1
+    run_id = cur.lastrowid
+    return run_id
 
-    conn.commit()
-    conn.close()
-    return inserted
 
+def load_recent_crawl_runs(limit: int = 50) -> List[Dict[str, Any]]:
+    rows = get_job_conn().execute(
+        """
+        SELECT id, keyword, area, industry, pages, started_at, duration_s,
+               jobs_seen, new_jobs, errors, error_msg
+          FROM crawl_runs
+         ORDER BY id DESC
+         LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+    return [dict(r) for r in rows]
 
+
+def load_crawled_jobs(
+    *,
+    keyword: str,
+    area: Optional[str],
+    industry: Optional[str],
+    pages: int,
+    max_age_s: float,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    找同一組 (keyword, area, industry) 最近一次成功、且夠新的預爬紀錄，
+    依當時清單順序從 job.db 組回 get_jobs_data 格式的職缺。
+    預爬頁數比 pages 多時只取前 pages 頁（要有 page_counts 才切得出來，舊紀錄只接受頁數相同的），
+    結果跟同參數即時爬取一致。
+    沒有可用紀錄時回 None（呼叫端就改成即時爬取）。
+    """
+    since = (datetime.utcnow() - timedelta(seconds=max_age_s)).isoformat()
+    conn = get_job_conn()
+    try:
+        run = conn.execute(
+            """
+            SELECT pages, job_nos_json, page_counts_json
+              FROM crawl_runs
+             WHERE keyword = ? AND area IS ? AND industry IS ?
+               AND (pages = ? OR (pages > ? AND page_counts_json IS NOT NULL))
+               AND started_at >= ? AND jobs_seen > 0
+             ORDER BY started_at DESC
+             LIMIT 1
+            """,
+            (keyword, area, industry, pages, pages, since),
+        ).fetchone()
+        if run is None:
+            return None
+
+        job_nos = json.loads(run["job_nos_json"] or "[]")
+        if run["pages"] > pages:
+            job_nos = job_nos[: sum(json.loads(run["page_counts_json"])[:pages])]
+        if not job_nos:
+            return None
+        rows = _select_in(
+            conn,
+            """
+            SELECT job_no, job_title, company, location, salary, update_date,
+                   job_url, condition_json, description
+              FROM jobs
+             WHERE job_no IN ({placeholders})
+            """,
+            [n for n in dict.fromkeys(job_nos) if n],
+        )
+    except sqlite3.Error as e:
+        print("[job.db] load_crawled_jobs error:", e)
+        return None
+
+    by_no = {r["job_no"]: r for r in rows}
+    jobs = [_row_to_job(by_no[no]) for no in job_nos if no in by_no]
+    return jobs or None
+
+
+def _row_to_job(r: sqlite3.Row) -> Dict[str, Any]:
+    """jobs 表的一列 → get_jobs_data 格式的 dict。"""
+    try:
+        condition = json.loads(r["condition_json"]) if r["condition_json"] else {}
+    except ValueError:
+        condition = {}
+    return {
+        "job_no": r["job_no"],
+        "job_title": r["job_title"],
+        "description": unpack_description(r["description"]) or "",
+        "job_url": r["job_url"],
+        "company": r["company"],
+        "location": r["location"],
+        "salary": r["salary"],
+        "update_date": r["update_date"],
+        "condition": condition,
+        "detail_fetched": bool(r["description"]),
+    }
+
+
+_JOB_COLUMNS = """
+    job_no, job_title, company, location, salary, update_date,
+    job_url, condition_json, description, area, industry, crawled_at
+"""
+
+
+def load_jobs_by_nos(job_nos: List[str]) -> List[Dict[str, Any]]:
+    """依 job_no 從 job.db 讀職缺，回傳順序同 job_nos（查不到的略過）。"""
+    job_nos = [n for n in dict.fromkeys(job_nos) if n]
+    if not job_nos:
+        return []
+    rows = _select_in(
+        get_job_conn(),
+        "SELECT " + _JOB_COLUMNS + " FROM jobs WHERE job_no IN ({placeholders})",
+        job_nos,
+    )
+    by_no = {r["job_no"]: r for r in rows}
+    return [_row_to_job(by_no[no]) for no in job_nos if no in by_no]
+
+
+def iter_job_corpus(
+    *,
+    batch_size: int = 500,
+    after: Optional[Tuple[str, int]] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    分批讀出整個 job.db 語料（給重新 embedding / 建索引用），不會一次載入整張表。
+    依 (crawled_at, id) 排序；after：只讀排在這個位置之後的職缺（嚴格大於，新進或重新爬到的），
+    做增量更新用——拿上次最後一筆的 (crawled_at, row_id) 傳進來，就不會重讀已經處理過的列。
+    每筆為 get_jobs_data 格式（description 已解壓），另外帶 area / industry / crawled_at / row_id 欄位。
+    """
+    # 舊資料的 crawled_at 可能是 NULL（排在最前面）：游標停在 NULL 列時要另外寫條件，
+    # 不然 (NULL, id) 的比較結果是 NULL，後面的列全部讀不到
+    if after is None:
+        where, params = "", ()
+    elif after[0] is None:
+        where, params = "AND ((crawled_at IS NULL AND id > ?) OR crawled_at IS NOT NULL)", (after[1],)
+    else:
+        where, params = "AND (crawled_at, id) > (?, ?)", (after[0], after[1])
+    # 連線是執行緒共用的持久連線，這裡只關自己的 cursor
+    cur = get_job_conn().execute(
+        f"""
+        SELECT id, {_JOB_COLUMNS}
+          FROM jobs
+         WHERE job_no IS NOT NULL {where}
+         ORDER BY crawled_at, id
+        """,
+        params,
+    )
+    try:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            batch = []
+            for r in rows:
+                job = _row_to_job(r)
+                job["area"] = r["area"]
+                job["industry"] = r["industry"]
+                job["crawled_at"] = r["crawled_at"]
+                job["row_id"] = r["id"]
+                batch.append(job)
+            yield batch
+    finally:
+        cur.close()
@@ -1,21 +1,117 @@
 # backend/main.py
 from __future__ import annotations
-from typing import Optional
+import asyncio
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, UploadFile, File, Query, HTTPException
+from fastapi import FastAPI, UploadFile, File, Header, Query, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.utils.parser import extract_text_from_resume
-from backend.crawler.crawler_104 import get_jobs_data
-from backend.nlp.matcher import match_resume_to_jobs
-from backend.db import init_all_dbs, save_parsed_resume, save_jobs, save_match_results
+from backend.utils.executors import cpu_pool, run_io, shutdown_pools
+from backend.utils.parser import extract_text_from_bytes, needs_extraction, resume_sha256
+from backend.crawler.crawler_104 import (
+    crawl_coalescing_stats,
+    get_http_cache,
+    get_jobs_frame,
+    iter_jobs_data,
+)
+from backend.nlp.matcher import (
+    CorpusIndexNotReady,
+    encoder_stats,
+    iter_match_resumes_to_jobs,
+    match_resume_to_corpus,
+    match_resume_to_job_stream,
+    model_provider,
+    notify_corpus_changed,
+    schedule_corpus_refresh,
+    warm_up,
+)
+from backend.db import (
+    init_all_dbs,
+    save_parsed_resume,
+    load_resume_by_hash,
+    upsert_jobs,
+    save_match_results,
+    save_match_results_bulk,
+    transaction,
+    load_crawled_jobs,
+    load_recent_crawl_runs,
+)
+from backend.config import AREA_MAP, INDUSTRY_MAP
+from backend.dataframe import JobFrame
+from backend.metrics import (
+    DB_ROWS,
+    HTTP_REQUEST_SECONDS,
+    REGISTRY,
+    end_request_timing,
+    observe_stage,
+    register_collector,
+    server_timing_header,
+    stage,
+    start_request_timing,
+)
+from backend.profiling import get_profiler
+from backend.result_cache import get_result_cache
+from backend.tasks import MatchTask, TaskManager, TaskQueueFull
+from backend.utils.scheduler import PreCrawlScheduler
 
 app = FastAPI(title="ResuMate API", version="0.2")
 
+# RESUMATE_SCHEDULER=1 時在 API 程序內跑背景預爬
+SCHEDULER_ENABLED = os.environ.get("RESUMATE_SCHEDULER", "0") == "1"
+# 本地預爬結果多新才拿來用（秒）
+LOCAL_CORPUS_MAX_AGE_S = float(os.environ.get("RESUMATE_LOCAL_MAX_AGE_S", "3600"))
+# 模型預熱：background = 啟動後在背景載入（/ready 會回 503 直到載完）；
+#           sync = 啟動時等模型載完才開始接 request；off = 第一個 request 才載
+MODEL_WARMUP = os.environ.get("RESUMATE_MODEL_WARMUP", "background")
+# preload-before-fork：import 時就載好模型，搭配 gunicorn --preload 讓多個 worker 共用權重
+#   RESUMATE_PRELOAD_MODEL=1 gunicorn --preload -w 4 -k uvicorn.workers.UvicornWorker backend.main:app
+PRELOAD_MODEL = os.environ.get("RESUMATE_PRELOAD_MODEL", "0") == "1"
+# source=index 的整庫向量索引：1 = 啟動時就在背景建；0 = 第一個 source=index 請求才開始建（建好前回 503）
+CORPUS_INDEX_WARMUP = os.environ.get("RESUMATE_CORPUS_INDEX_WARMUP", "0") == "1"
+# /admin/* 的存取 token（X-Admin-Token）；沒設時 /admin/* 一律 403（profile 內含 stack 與檔案路徑）
+ADMIN_TOKEN = os.environ.get("RESUMATE_ADMIN_TOKEN", "")
+_scheduler: Optional[PreCrawlScheduler] = None
+
+if PRELOAD_MODEL:
+    warm_up(freeze=True)
+
+
+def _warm_up_safely() -> None:
+    try:
+        warm_up()
+    except Exception as e:
+        print("[startup] model warm-up failed:", e)
+
+
 # 啟動時建三個 DB 的表
 @app.on_event("startup")
 def on_startup():
+    global _scheduler
     init_all_dbs()
+    if not model_provider.is_ready():
+        if MODEL_WARMUP == "sync":
+            _warm_up_safely()
+        elif MODEL_WARMUP == "background":
+            threading.Thread(target=_warm_up_safely, name="model-warmup", daemon=True).start()
+    if CORPUS_INDEX_WARMUP:
+        schedule_corpus_refresh()
+    if SCHEDULER_ENABLED:
+        _scheduler = PreCrawlScheduler()
+        _scheduler.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    if _scheduler is not None:
+        _scheduler.stop()
+    task_manager.shutdown()
+    shutdown_pools()
 
 
 # 若前端非同源，開 CORS（依你的前端來源調整）
@@ -33,56 +129,91 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 簡易對照表（可日後抽到 config）
-AREA_MAP = {
-    # 北部
-    "台北市": "6001001000",
-    "新北市": "6001002000",
-    "基隆市": "6001003000",
-    "桃園市": "6001004000",
-    "新竹市": "6001005000",
-    "新竹縣": "6001006000",
-    "宜蘭縣": "6001007000",
-
-    # 中部
-    "台中市": "6001008000",
-    "苗栗縣": "6001009000",
-    "彰化縣": "6001010000",
-    "南投縣": "6001011000",
-    "雲林縣": "6001012000",
-
-    # 南部
-    "嘉義市": "6001013000",
-    "嘉義縣": "6001014000",
-    "台南市": "6001015000",
-    "高雄市": "6001016000",
-    "屏東縣": "6001018000",
-
-    # 東部 & 離島
-    "花蓮縣": "6001019000",
-    "台東縣": "6001020000",
-    "澎湖縣": "6001021000",
-    "金門縣": "6001022000",
-    "連江縣": "6001023000",
-}
-INDUSTRY_MAP = {
-    "批發／零售／傳直銷業": "1003000000",
-    "文教相關業": "1005000000",
-    "大眾傳播相關業": "1006000000",
-    "旅遊／休閒／運動業": "1007000000",
-    "一般服務業": "1009000000",
-    "電子資訊／軟體／半導體相關業": "1001000000",
-    "一般製造業": "1002000000",
-    "農林漁牧水電資源業": "1014000000",
-    "運輸物流及倉儲": "1010000000",
-    "政治宗教及社福相關業": "1013000000",
-    "金融投顧及保險業": "1004000000",
-    "法律／會計／顧問／研發／設計業": "1008000000",
-    "建築工程、空間設計與不動產業": "1011000000",
-    "醫療保健及環境衛生業": "1012000000",
-    "礦業及土石採取業": "1015000000",
-    "住宿／餐飲服務業": "1016000000",
-}
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """
+    每個回應帶 Server-Timing（parse / crawl / encode / score / db_* ... 各階段 ms，外加 total），
+    同時記進 resumate_http_request_seconds。
+    串流回應（/match/batch、/events）的 header 在開始串流時就送出，只含那之前的階段。
+    """
+    token = start_request_timing()
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - t0
+        timings = end_request_timing(token)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(elapsed, method=request.method, route=route, status=status)
+    timings.append(("total", elapsed))
+    response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
+
+# 取樣式 profiler：RESUMATE_PROFILE_RATE / RESUMATE_PROFILE_SLOW_MS 都沒設時整個不掛（見 backend/profiling.py）
+profiler = get_profiler()
+
+if profiler is not None:
+
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        reason = profiler.decide(request.url.path)
+        if reason is None:
+            return await call_next(request)
+
+        # 檔名一律用伺服器產生的 id；client 的 X-Request-ID 只記在 metadata 裡
+        profile_id = profiler.new_profile_id()
+        client_request_id = profiler.client_request_id(request.headers.get("x-request-id"))
+        profiler.sampler.begin(profile_id)
+        t0 = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+            stacks = profiler.sampler.end(profile_id)
+            keep = profiler.should_keep(reason, elapsed_ms)
+            if keep:
+                meta = {
+                    "method": request.method,
+                    "path": request.url.path,
+                    "status": status,
+                    "elapsed_ms": round(elapsed_ms, 1),
+                    "reason": reason,
+                    "client_request_id": client_request_id,
+                }
+                await run_io(profiler.store, profile_id, stacks, meta)
+        if keep:
+            response.headers["X-Profile-Id"] = profile_id
+        return response
+
+
+def _check_admin(token: Optional[str]) -> None:
+    """沒設 RESUMATE_ADMIN_TOKEN 時預設拒絕；比對用 compare_digest（不洩漏比對到第幾個字元）。"""
+    if not ADMIN_TOKEN or token is None or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="forbidden")
+
+
+@app.get("/admin/profiles")
+def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """最近存下來的 profile（新的在前）：id / path / elapsed_ms / samples / reason。"""
+    _check_admin(x_admin_token)
+    if profiler is None:
+        return {"enabled": False, "profiles": []}
+    return {"enabled": True, "profiles": profiler.list_profiles()}
+
+
+@app.get("/admin/profiles/{profile_id}")
+def download_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """collapsed stack 檔（flamegraph.pl / speedscope 可直接讀）。"""
+    _check_admin(x_admin_token)
+    path = profiler.profile_path(profile_id) if profiler is not None else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="profile not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=path.name)
 
 
 @app.get("/")
@@ -90,12 +221,284 @@ def root():
     return {"message": "ResuMate API is running."}
 
 
+@app.get("/ready")
+def ready():
+    """readiness：模型載入完成才回 200。"""
+    status = model_provider.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/stats")
+def stats():
+    """快取命中率、encode 佇列深度與 batch 大小分佈等執行期統計。"""
+    http_cache = get_http_cache()
+    result_cache = get_result_cache()
+    return {
+        "model": model_provider.status(),
+        "encoder": encoder_stats(),
+        "http_cache": http_cache.stats() if http_cache is not None else None,
+        "crawl_coalescing": crawl_coalescing_stats(),
+        "tasks": task_manager.stats(),
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+    }
+
+
+def _collect_runtime_metrics():
+    """/metrics 被抓時才讀的 gauge：各層快取命中率、encode 佇列深度、非同步任務數。"""
+    ratios = []
+    http_cache = get_http_cache()
+    if http_cache is not None:
+        ratios.append(({"cache": "http"}, http_cache.stats()["hit_ratio"]))
+    enc = encoder_stats()
+    if enc["embedding_cache"] is not None:
+        ratios.append(({"cache": "embedding"}, enc["embedding_cache"]["hit_ratio"]))
+    result_cache = get_result_cache()
+    if result_cache is not None:
+        ratios.append(({"cache": "result"}, result_cache.stats()["hit_ratio"]))
+    co = crawl_coalescing_stats()
+    shared = co["coalesced"] + co["cache_hits"]
+    lookups = shared + co["leader_runs"]
+    ratios.append(({"cache": "crawl_coalescing"}, shared / lookups if lookups else 0.0))
+
+    tasks = task_manager.stats()
+    return [
+        ("resumate_cache_hit_ratio", "gauge", "Hit ratio per cache layer since process start.", ratios),
+        ("resumate_encode_queue_depth", "gauge", "Encode requests waiting for the batcher.",
+         [({}, enc["batcher"]["queue_depth"])]),
+        ("resumate_tasks_in_flight", "gauge", "Async match tasks running or queued.", [({}, tasks["in_flight"])]),
+    ]
+
+
+register_collector(_collect_runtime_metrics)
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus 文字格式的 metrics（各階段延遲直方圖、104 回應 / 重試次數、encode 筆數、快取命中率）。"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/filters")
 def filters():
     """提供前端下拉選單的地區/產業對照（key -> 104 代碼）。"""
     return {"areas": AREA_MAP, "industries": INDUSTRY_MAP}
 
 
+@app.get("/crawl/runs")
+def crawl_runs(limit: int = Query(50, ge=1, le=500)):
+    """最近的預爬紀錄（jobs_seen / new_jobs / duration_s / errors）。"""
+    return {"runs": load_recent_crawl_runs(limit)}
+
+
+def _parse_resume_bytes(raw: bytes, filename: str) -> Tuple[Optional[int], str]:
+    """
+    解析上傳履歷並存進 resume.db，回傳 (resume_id, 履歷文字)。
+    同一份檔案（SHA-256 相同）之前解析過就直接重用 resume_id 與文字，不再跑 PDF / DOCX 擷取；
+    讀不到文字時回 (None, "")，不存。
+    阻塞函式（在 thread pool 裡跑）；pdf / docx 解析再丟 process pool。
+    """
+    sha = resume_sha256(raw)
+    cached = load_resume_by_hash(sha)
+    if cached is not None and (cached["content"] or "").strip():
+        return cached["resume_id"], cached["content"]
+
+    # 擷取在子程序跑，parser 裡量不到；在這邊量（含排隊等 process pool 的時間）
+    with stage("parse"):
+        if needs_extraction(filename):
+            text = cpu_pool().submit(extract_text_from_bytes, raw, filename).result()
+        else:
+            text = extract_text_from_bytes(raw, filename)
+    if not text.strip():
+        return None, ""
+    resume_id = save_parsed_resume(
+        filename=filename or "uploaded_resume",
+        resume_text=text,
+        sha256=sha,
+        size=len(raw),
+    )
+    return resume_id, text
+
+
+async def _parse_resume_upload(file: UploadFile) -> Tuple[Optional[int], str]:
+    raw = await file.read()
+    return await run_io(_parse_resume_bytes, raw, file.filename or "")
+
+
+def _match_pipeline(
+    resume_id: int,
+    resume_text: str,
+    *,
+    keyword: str,
+    area: Optional[str],
+    ind: Optional[str],
+    pages: int,
+    fetch_detail: bool,
+    top_k: int,
+    source: str,
+    task: Optional[MatchTask] = None,
+) -> List[Dict[str, Any]]:
+    """
+    /match 解析完履歷之後的部分（爬取 / 讀本地、encode、排序、寫 DB），整段是阻塞的，在 thread pool 跑。
+    task：非同步任務（/match/jobs）時用來回報階段、進度與暫定排名。
+    """
+    report = task.report if task is not None else (lambda stage=None, **_: None)
+    if source == "index":
+        report(stage="ranking")
+        try:
+            ranked = match_resume_to_corpus(resume_text, top_k=top_k, area=area, industry=ind)
+        except CorpusIndexNotReady:
+            raise HTTPException(status_code=503, detail="職缺索引建立中，請稍後再試，或改用 source=live。")
+        except Exception as e:
+            print("[/match] corpus matcher error:", e)
+            raise HTTPException(status_code=500, detail="匹配計算失敗，請稍後再試。")
+        if ranked:
+            try:
+                save_match_results(resume_id, ranked)
+            except Exception as e:
+                print("[/match] save_match_results error:", e)
+        return ranked
+
+    report(stage="crawling")
+    local_jobs = None
+    if source != "live":
+        # 2-0) 先看排程器有沒有預爬好的本地結果
+        with stage("db_local"):
+            local_jobs = load_crawled_jobs(
+                keyword=keyword,
+                area=area,
+                industry=ind,
+                pages=pages,
+                max_age_s=LOCAL_CORPUS_MAX_AGE_S,
+            )
+        if local_jobs:
+            report(jobs_seen=len(local_jobs), details_fetched=len(local_jobs))
+
+    if local_jobs is None and source == "local":
+        return []
+
+    # 即時爬取時邊爬邊 encode；爬到的職缺同時收進 jobs，等等存 job.db
+    jobs: List[Dict[str, Any]] = []
+
+    def _crawl():
+        # 跟 encode 交錯進行：只累計真正在等爬蟲的時間，最後記成一筆 crawl
+        waited = 0.0
+        try:
+            it = iter_jobs_data(
+                keyword=keyword,
+                pages=pages,
+                area=area,
+                industry=ind,
+                fetch_detail=fetch_detail,   # ✅ 這樣 crawler 才會去打內頁
+                on_page=(lambda p, n: task.add(pages_crawled=1)) if task is not None else None,
+                coalesce=True,               # 同條件同時有人在爬就等他的結果
+            )
+            while True:
+                t0 = time.perf_counter()
+                j = next(it, None)
+                waited += time.perf_counter() - t0
+                if j is None:
+                    break
+                jobs.append(j)
+                if task is not None:
+                    task.add(jobs_seen=1, details_fetched=int(bool(j.get("detail_fetched"))))
+                yield j
+        except Exception as e:
+            print("[/match] get_jobs_data error:", e)
+        finally:
+            observe_stage("crawl", waited)
+
+    def _on_progress(encoded: int, partial: List[Dict[str, Any]]) -> None:
+        task.report(stage="ranking", jobs_encoded=encoded)
+        task.publish_partial(partial)
+
+    # 3) 匹配排序
+    try:
+        ranked = match_resume_to_job_stream(
+            resume_text,
+            local_jobs if local_jobs is not None else _crawl(),
+            top_k=top_k,
+            on_progress=_on_progress if task is not None else None,
+        )
+    except Exception as e:
+        print("[/match] matcher error:", e)
+        raise HTTPException(status_code=500, detail="匹配計算失敗，請稍後再試。")
+
+    # ⭐ 2-1) 把這次爬回來的職缺存進 job.db、3-1) 媒合結果存進 match.db
+    # attached 模式下兩邊併成同一個 transaction（separate 模式各自 commit）
+    report(stage="saving")
+    with transaction():
+        if jobs:
+            try:
+                counts = upsert_jobs(jobs, keyword=keyword, area=area, industry=ind)
+                _invalidate_results(keyword, area, ind, counts)
+                for result in ("inserted", "updated", "unchanged"):
+                    DB_ROWS.inc(counts[result], table="jobs", result=result)
+            except Exception as e:
+                print("[/match] upsert_jobs error:", e)
+
+        if ranked:
+            try:
+                count = save_match_results(resume_id, ranked)
+                DB_ROWS.inc(count, table="match_results", result="inserted")
+            except Exception as e:
+                print("[/match] save_match_results error:", e)
+
+    return ranked
+
+
+def _match_with_cache(
+    raw: bytes,
+    filename: str,
+    params: Dict[str, Any],
+    task: Optional[MatchTask] = None,
+) -> List[Dict[str, Any]]:
+    """
+    /match 與 /match/jobs 共用的完整流程（阻塞）：
+    先查結果快取（履歷內容 hash + filter），沒命中才解析履歷、跑 _match_pipeline，再把結果存回快取。
+    params：_match_pipeline 的 keyword / area / ind / pages / fetch_detail / top_k / source。
+    """
+    # index 模式是對整個語料檢索，不屬於任何一組 filter，不快取
+    cache = get_result_cache() if params["source"] != "index" else None
+    filter_kw = {"keyword": params["keyword"], "area": params["area"], "industry": params["ind"]}
+    sha = resume_sha256(raw)
+    if cache is not None:
+        with stage("result_cache"):
+            hit = cache.get(sha, params, **filter_kw)
+        if hit is not None:
+            return hit
+
+    # 1) 解析履歷，⭐ 1-1) 存進 resume.db 拿到 resume_id（同一份檔案重傳直接重用）
+    if task is not None:
+        task.report(stage="parsing")
+    resume_id, resume_text = _parse_resume_bytes(raw, filename)
+    if resume_id is None:
+        raise HTTPException(
+            status_code=400,
+            detail="讀不到履歷文字：請改傳 .txt / .docx，或是可擷取文字的 PDF（非掃描影像）。",
+        )
+    if task is not None:
+        task.resume_id = resume_id
+
+    # 2) 依過濾抓職缺、3) 匹配排序
+    ranked = _match_pipeline(resume_id, resume_text, task=task, **params)
+    if cache is not None and ranked:
+        cache.put(sha, params, ranked, **filter_kw)
+    return ranked
+
+
+def _invalidate_results(keyword: str, area: Optional[str], ind: Optional[str], counts: Dict[str, int]) -> None:
+    """
+    這組 filter 有新的 / 更新的職缺進 job.db → 之前快取的 /match 結果作廢，
+    整庫索引（建過的話）排一次背景更新。
+    """
+    if not (counts["inserted"] or counts["updated"]):
+        return
+    cache = get_result_cache()
+    if cache is not None:
+        cache.invalidate_filter(keyword, area, ind)
+    notify_corpus_changed()
+
+
 @app.post("/match")
 async def match_resume(
     file: UploadFile = File(...),
@@ -105,74 +508,235 @@ async def match_resume(
     pages: int = Query(1, ge=1, le=3),
     fetch_detail: bool = Query(True),   # ✅ 讓內頁有抓，才會有 condition
     top_k: int = Query(20, ge=1, le=50),
+    source: str = Query("auto", pattern="^(auto|live|local|index)$"),
 ):
     """
     上傳履歷 → 抓取符合 filter 的職缺 → 計算匹配分數。
+    source：auto = 有夠新的預爬結果就用本地 job.db，否則即時爬；
+            live = 一律即時爬；local = 只用本地（沒有就回空）；
+            index = 不爬取，直接對整個 job.db 語料做向量檢索（keyword 不參與過濾）
     回傳每筆包含：
       job_title / job_url / description / company / location / salary / update_date / score / condition
     """
-    # 1) 解析履歷
-    file.file.seek(0)
-    resume_text = extract_text_from_resume(file)
-    if not resume_text.strip():
-        raise HTTPException(
-            status_code=400,
-            detail="讀不到履歷文字：請改傳 .txt / .docx，或是可擷取文字的 PDF（非掃描影像）。",
-        )
+    raw = await file.read()
+    filename = file.filename or ""
+    await file.close()
+    params = {
+        "keyword": keyword,
+        "area": AREA_MAP.get(area_key) if area_key else None,
+        "ind": INDUSTRY_MAP.get(industry_key) if industry_key else None,
+        "pages": pages,
+        "fetch_detail": fetch_detail,
+        "top_k": top_k,
+        "source": source,
+    }
+    ranked = await run_io(_match_with_cache, raw, filename, params)
+
+    #（你之前在 matcher 裡有印 TOP 1 JOB，會照樣印）
+    return {"recommendations": ranked}
+
 
-    # ⭐ 1-1) 先把解析後的履歷文字存進 resume.db，拿到 resume_id
-    resume_id = save_parsed_resume(
-        filename=file.filename or "uploaded_resume",
-        resume_text=resume_text,
-    )
 
-    # 2) 依過濾抓職缺
-    area = AREA_MAP.get(area_key) if area_key else None
-    ind = INDUSTRY_MAP.get(industry_key) if industry_key else None
 
+
+# ---------------------------
+# 非同步任務版 /match：送出後馬上拿到 task_id，再輪詢 / 串流進度
+# ---------------------------
+TASK_WORKERS = int(os.environ.get("RESUMATE_TASK_WORKERS", "4"))
+TASK_QUEUE = int(os.environ.get("RESUMATE_TASK_QUEUE", "16"))
+TASK_TTL_S = float(os.environ.get("RESUMATE_TASK_TTL_S", "600"))
+TASK_EVENT_POLL_S = 0.25
+task_manager = TaskManager(workers=TASK_WORKERS, max_pending=TASK_QUEUE, ttl_s=TASK_TTL_S)
+
+
+@app.post("/match/jobs", status_code=202)
+async def submit_match_job(
+    file: UploadFile = File(...),
+    keyword: str = Query("資料分析"),
+    area_key: Optional[str] = Query(None),
+    industry_key: Optional[str] = Query(None),
+    pages: int = Query(1, ge=1, le=3),
+    fetch_detail: bool = Query(True),
+    top_k: int = Query(20, ge=1, le=50),
+    source: str = Query("auto", pattern="^(auto|live|local|index)$"),
+):
+    """
+    /match 的非同步版：參數同 /match，馬上回 task_id，實際工作在背景 worker 跑。
+    進度用 GET /match/jobs/{task_id} 輪詢，或 GET /match/jobs/{task_id}/events 串流（SSE / NDJSON）。
+    worker 與排隊都滿了回 429。
+    """
+    raw = await file.read()
+    filename = file.filename or ""
+    await file.close()
+    params = {
+        "keyword": keyword,
+        "area": AREA_MAP.get(area_key) if area_key else None,
+        "ind": INDUSTRY_MAP.get(industry_key) if industry_key else None,
+        "pages": pages,
+        "fetch_detail": fetch_detail,
+        "top_k": top_k,
+        "source": source,
+    }
     try:
-        jobs = get_jobs_data(
-            keyword=keyword,
-            pages=pages,
-            area=area,
-            industry=ind,
-            fetch_detail=fetch_detail,   # ✅ 這樣 crawler 才會去打內頁
+        task = task_manager.submit(lambda t: _match_with_cache(raw, filename, params, task=t), params)
+    except TaskQueueFull:
+        raise HTTPException(
+            status_code=429,
+            detail="目前媒合任務太多，請稍後再試。",
+            headers={"Retry-After": "5"},
         )
-    except Exception as e:
-        print("[/match] get_jobs_data error:", e)
-        jobs = []
+    return {
+        "task_id": task.id,
+        "status_url": f"/match/jobs/{task.id}",
+        "events_url": f"/match/jobs/{task.id}/events",
+    }
 
-    if not jobs:
-        return {"recommendations": []}
 
-    # ⭐ 2-1) 把這次爬回來的職缺存進 job.db
-    try:
-        inserted = save_jobs(jobs, keyword=keyword, area=area, industry=ind)
-        print(f"[job.db] inserted {inserted} jobs")
-    except Exception as e:
-        print("[/match] save_jobs error:", e)
+def _get_task_or_404(task_id: str) -> MatchTask:
+    task = task_manager.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="找不到這個任務（可能已過期）。")
+    return task
+
+
+@app.get("/match/jobs/{task_id}")
+def get_match_job(task_id: str):
+    """
+    任務狀態：stage / progress（pages_crawled、details_fetched、jobs_seen、jobs_encoded），
+    進行中附 partial（目前為止的暫定排名），完成附 recommendations，失敗附 error。
+    """
+    return _get_task_or_404(task_id).snapshot()
+
+
+@app.get("/match/jobs/{task_id}/events")
+async def match_job_events(task_id: str, format: str = Query("sse", pattern="^(sse|ndjson)$")):
+    """狀態有變就推一筆（內容同 GET /match/jobs/{task_id}），任務結束後關閉串流。"""
+    task = _get_task_or_404(task_id)
+
+    async def _events():
+        last_version = -1
+        while True:
+            snap = task.snapshot()
+            if snap["version"] != last_version:
+                last_version = snap["version"]
+                data = json.dumps(snap, ensure_ascii=False)
+                yield f"event: {snap['stage']}\ndata: {data}\n\n" if format == "sse" else data + "\n"
+            if snap["stage"] in ("done", "error"):
+                return
+            await asyncio.sleep(TASK_EVENT_POLL_S)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream" if format == "sse" else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _load_batch_jobs(
+    *,
+    keyword: str,
+    area: Optional[str],
+    ind: Optional[str],
+    pages: int,
+    fetch_detail: bool,
+    source: str,
+) -> JobFrame:
+    """/match/batch 的職缺：先看本地預爬，再即時爬（阻塞，在 thread pool 跑）。"""
+    if source != "live":
+        with stage("db_local"):
+            local = load_crawled_jobs(
+                keyword=keyword, area=area, industry=ind, pages=pages, max_age_s=LOCAL_CORPUS_MAX_AGE_S
+            )
+        if local is not None:
+            return JobFrame.from_records(local)
+    if source == "local":
+        return JobFrame.empty()
 
-    # 3) 匹配排序
     try:
-        ranked = match_resume_to_jobs(resume_text, jobs, top_k=top_k)
+        with stage("crawl"):
+            frame = get_jobs_frame(
+                keyword,
+                pages,
+                area=area,
+                industry=ind,
+                fetch_detail=fetch_detail,
+                coalesce=True,
+            )
     except Exception as e:
-        print("[/match] matcher error:", e)
-        raise HTTPException(status_code=500, detail="匹配計算失敗，請稍後再試。")
-    finally:
+        print("[/match/batch] get_jobs_data error:", e)
+        return JobFrame.empty()
+    if len(frame):
         try:
-            file.file.close()
-        except Exception:
-            pass
+            counts = upsert_jobs(frame, keyword=keyword, area=area, industry=ind)
+            _invalidate_results(keyword, area, ind, counts)
+            for result in ("inserted", "updated", "unchanged"):
+                DB_ROWS.inc(counts[result], table="jobs", result=result)
+        except Exception as e:
+            print("[/match/batch] upsert_jobs error:", e)
+    return frame
 
-    # ⭐ 3-1) 把這次媒合結果存進 match.db
-    try:
-        count = save_match_results(resume_id, ranked)
-        print(f"[match.db] inserted {count} match rows for resume {resume_id}")
-    except Exception as e:
-        print("[/match] save_match_results error:", e)
 
-    #（你之前在 matcher 裡有印 TOP 1 JOB，會照樣印）
-    return {"recommendations": ranked}
+@app.post("/match/batch")
+async def match_resume_batch(
+    files: List[UploadFile] = File(...),
+    keyword: str = Query("資料分析"),
+    area_key: Optional[str] = Query(None),
+    industry_key: Optional[str] = Query(None),
+    pages: int = Query(1, ge=1, le=3),
+    fetch_detail: bool = Query(True),
+    top_k: int = Query(20, ge=1, le=50),
+    source: str = Query("auto", pattern="^(auto|live|local)$"),
+):
+    """
+    多份履歷對同一組 filter：職缺只爬 / 讀一次、只 encode 一次，
+    所有履歷一起算分數矩陣。回傳 NDJSON，每行一份履歷：
+      {"filename", "resume_id", "recommendations"}（讀不到文字的履歷回 {"filename", "error"}）
+    全部算完後 match.db 一次批次寫入。
+    """
+    # 1) 解析所有履歷
+    parsed: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    results = await asyncio.gather(*(_parse_resume_upload(f) for f in files))
+    for f, (resume_id, text) in zip(files, results):
+        name = f.filename or "uploaded_resume"
+        await f.close()
+        if resume_id is None:
+            errors.append({"filename": name, "error": "讀不到履歷文字"})
+            continue
+        parsed.append({"filename": name, "text": text, "resume_id": resume_id})
 
+    # 2) 職缺只抓一次
+    area = AREA_MAP.get(area_key) if area_key else None
+    ind = INDUSTRY_MAP.get(industry_key) if industry_key else None
 
+    jobs = await run_io(
+        _load_batch_jobs,
+        keyword=keyword,
+        area=area,
+        ind=ind,
+        pages=pages,
+        fetch_detail=fetch_detail,
+        source=source,
+    )
+
+    # 3) 一次算完，逐份履歷串流回去（同步 generator，StreamingResponse 會在 thread pool 裡跑）
+    def _stream():
+        for e in errors:
+            yield json.dumps(e, ensure_ascii=False) + "\n"
+
+        done: List[Tuple[int, List[Dict[str, Any]]]] = []
+        for i, ranked in iter_match_resumes_to_jobs([p["text"] for p in parsed], jobs, top_k=top_k):
+            p = parsed[i]
+            done.append((p["resume_id"], ranked))
+            yield json.dumps(
+                {"filename": p["filename"], "resume_id": p["resume_id"], "recommendations": ranked},
+                ensure_ascii=False,
+            ) + "\n"
+
+        try:
+            count = save_match_results_bulk(done)
+            DB_ROWS.inc(count, table="match_results", result="inserted")
+        except Exception as e:
+            print("[/match/batch] save_match_results_bulk error:", e)
 
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
@@ -0,0 +1,305 @@
+# backend/metrics.py
+# -*- coding: utf-8 -*-
+"""
+媒合流程的執行期量測（Prometheus 文字格式，不另外依賴 prometheus_client）
+
+- Counter / Histogram：執行緒安全，支援 label；REGISTRY.render() 輸出 /metrics 的內容
+- stage("encode")：context manager，量一段程式的耗時，記進 resumate_stage_seconds{stage=...}；
+  若目前在某個 HTTP 請求的 context 裡（見 start_request_timing），也一併記進該請求的
+  Server-Timing 明細
+- register_collector(fn)：/metrics 被抓時才呼叫 fn() 取目前值（快取命中率、佇列深度這類 gauge）
+
+注意：run_in_executor 不會帶 contextvars，所以 executors.run_io 會自己複製 context；
+爬蟲內頁執行緒池沒帶，內頁耗時只進直方圖、不進 Server-Timing（整段爬取算在 crawl 裡）。
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "Registry",
+    "REGISTRY",
+    "STAGE_SECONDS",
+    "HTTP_REQUEST_SECONDS",
+    "CRAWLER_RESPONSES",
+    "CRAWLER_RETRIES",
+    "JOBS_ENCODED",
+    "stage",
+    "timed",
+    "observe_stage",
+    "register_collector",
+    "start_request_timing",
+    "end_request_timing",
+    "server_timing_header",
+    "summarize_timings",
+]
+
+# 秒；涵蓋 1ms（sqlite 寫入）到 60s（多頁爬取 + 內頁）
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+LabelValues = Tuple[str, ...]
+# collector 回傳 [(metric 名稱, 類型, 說明, [(labels, 值), ...]), ...]
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label → ([每個 bucket 的個數（非累積）..., +Inf], sum, count)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, n = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[idx] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def snapshot(self, **labels: Any) -> Dict[str, float]:
+        """{"count", "sum"}（bench / 除錯用）。"""
+        with self._lock:
+            hit = self._values.get(self._key(labels))
+        return {"count": hit[2], "sum": hit[1]} if hit else {"count": 0, "sum": 0.0}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(c), s, n)) for k, (c, s, n) in self._values.items())
+        lines: List[str] = []
+        for key, (counts, total, n) in items:
+            acc = 0
+            for le, c in zip(self.buckets + (float("inf"),), counts):
+                acc += c
+                le_label = f'le="{_fmt_value(le)}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le_label)} {acc}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], List[Family]]] = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def register_collector(self, fn: Callable[[], List[Family]]) -> None:
+        with self._lock:
+            self._collectors.append(fn)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.render())
+        for fn in collectors:
+            try:
+                families = fn()
+            except Exception as e:  # 某個 collector 壞掉不要讓整個 /metrics 500
+                print("[metrics] collector error:", e)
+                continue
+            for name, kind, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_fmt_labels(list(labels), list(labels.values()))} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "resumate_stage_seconds",
+    "Latency of match pipeline stages (parse, crawl, search, detail, encode, score, db_*, result_cache).",
+    ["stage"],
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "resumate_http_request_seconds",
+    "API request latency by route.",
+    ["method", "route", "status"],
+)
+CRAWLER_RESPONSES = REGISTRY.counter(
+    "resumate_crawler_responses_total",
+    "104 responses seen by the crawler, by endpoint and HTTP status (cache hits included).",
+    ["endpoint", "status"],
+)
+CRAWLER_RETRIES = REGISTRY.counter(
+    "resumate_crawler_retries_total",
+    "104 requests retried by urllib3 (429 / 5xx / connection errors).",
+    ["endpoint"],
+)
+JOBS_ENCODED = REGISTRY.counter(
+    "resumate_texts_encoded_total",
+    "Texts actually sent to the sentence encoder (embedding cache misses).",
+    ["kind"],
+)
+DB_ROWS = REGISTRY.counter(
+    "resumate_db_rows_total",
+    "Rows written by the match pipeline, by table and outcome (inserted / updated / unchanged).",
+    ["table", "result"],
+)
+
+register_collector = REGISTRY.register_collector
+
+
+# ---------------------------
+# 每個請求的 Server-Timing
+# ---------------------------
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "resumate_request_timings", default=None
+)
+
+
+def start_request_timing() -> Token:
+    return _request_timings.set([])
+
+
+def end_request_timing(token: Token) -> List[Tuple[str, float]]:
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    return timings
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    """直接記一筆 stage 耗時（自己累計好的時間，例如串流爬取中真正在等 104 的部分）。"""
+    STAGE_SECONDS.observe(seconds, stage=name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - t0)
+
+
+def timed(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """stage() 的 decorator 版：整個函式算一個 stage。"""
+
+    def deco(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+def summarize_timings(timings: List[Tuple[str, float]]) -> Dict[str, float]:
+    """同名 stage 加總（例如 encode 分好幾批），依第一次出現的順序，單位 ms。"""
+    totals: Dict[str, float] = {}
+    for name, dt in timings:
+        totals[name] = totals.get(name, 0.0) + dt * 1000
+    return {name: round(ms, 1) for name, ms in totals.items()}
+
+
+def server_timing_header(timings: List[Tuple[str, float]]) -> str:
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in summarize_timings(timings).items())
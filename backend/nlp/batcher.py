@@ -0,0 +1,137 @@
+# backend/nlp/batcher.py
+# -*- coding: utf-8 -*-
+"""
+動態 micro-batching 的 encode 服務（同程序內）
+
+所有進行中的 request 把要 encode 的句子丟進同一個佇列，
+專用的 worker 執行緒把它們合併成一批（最多 max_batch_size 句，或最多等 max_wait_ms），
+一次呼叫模型，再透過 Future 把各自的結果切回去。
+
+好處：並發時不會有一堆小 encode 搶同一組 CPU 核心 / torch thread pool，
+模型一次吃大一點的 batch，整體 sentences/sec 高很多。
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+__all__ = ["EncodeBatcher"]
+
+# batch 大小直方圖的上界（句數）
+_BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class EncodeBatcher:
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        *,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        self._encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue: "queue.Queue[Optional[Tuple[List[str], Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._hist = [0] * (len(_BATCH_BUCKETS) + 1)
+        self._counters = {"requests": 0, "batches": 0, "sentences": 0, "errors": 0}
+
+    # ---------- 對外 ----------
+    def submit(self, texts: Sequence[str]) -> "Future[np.ndarray]":
+        fut: "Future[np.ndarray]" = Future()
+        texts = list(texts)
+        if not texts:
+            fut.set_result(np.zeros((0, 0), dtype=np.float32))
+            return fut
+        self._ensure_started()
+        with self._lock:
+            self._counters["requests"] += 1
+        self._queue.put((texts, fut))
+        return fut
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            hist = list(self._hist)
+        out["queue_depth"] = self._queue.qsize()
+        out["batch_size_hist"] = {
+            **{f"le_{b}": c for b, c in zip(_BATCH_BUCKETS, hist)},
+            "le_inf": hist[-1],
+        }
+        out["avg_batch_size"] = out["sentences"] / out["batches"] if out["batches"] else 0.0
+        return out
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    # ---------- worker ----------
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="encode-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self, first: Tuple[List[str], Future]) -> List[Tuple[List[str], Future]]:
+        batch = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait_s
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # 留給外層迴圈處理 stop
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _record(self, n: int) -> None:
+        bucket = next((i for i, b in enumerate(_BATCH_BUCKETS) if n <= b), len(_BATCH_BUCKETS))
+        with self._lock:
+            self._hist[bucket] += 1
+            self._counters["batches"] += 1
+            self._counters["sentences"] += n
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            texts = [t for ts, _ in batch for t in ts]
+            self._record(len(texts))
+            try:
+                vecs = self._encode_fn(texts)
+            except Exception as e:
+                with self._lock:
+                    self._counters["errors"] += 1
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            start = 0
+            for ts, fut in batch:
+                fut.set_result(vecs[start : start + len(ts)])
+                start += len(ts)
@@ -0,0 +1,190 @@
+# backend/nlp/embedding_cache.py
+# -*- coding: utf-8 -*-
+"""
+職缺 embedding 的持久化快取（SQLite blob）
+
+- key = job_no（沒有 job_no 的職缺用文字 hash 當 key；履歷向量用 r:<文字 hash>），並存下當初 encode 的文字 hash；
+  文字變了（職缺更新）hash 對不上就當作 miss，重新 encode 後覆蓋
+- 記錄產生向量的模型名稱；換模型時整個快取作廢
+- 超過 max_entries 依 last_used 做 LRU 淘汰；命中時的 last_used 先記在記憶體，
+  累積 access_flush_every 筆、超過 access_flush_s 秒或寫入前才一次寫回
+- stats() 提供 hits / misses / evictions 計數
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+__all__ = ["EmbeddingCache", "text_hash"]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """執行緒安全（單一連線 + lock）的 embedding 快取。"""
+
+    def __init__(
+        self,
+        path: str | Path,
+        model_name: str,
+        *,
+        max_entries: int = 200_000,
+        access_flush_every: int = 4096,
+        access_flush_s: float = 30.0,
+    ) -> None:
+        self.path = str(path)
+        self.model_name = model_name
+        self.max_entries = max(1, int(max_entries))
+        self.access_flush_every = max(1, int(access_flush_every))
+        self.access_flush_s = float(access_flush_s)
+
+        self._lock = threading.Lock()
+        # 還沒寫回的 last_used：{key: 時間}
+        self._pending_used: Dict[str, float] = {}
+        self._last_flush = time.monotonic()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings(
+                key        TEXT PRIMARY KEY,   -- job_no（或 h:<text_hash>）
+                text_hash  TEXT,
+                dim        INTEGER,
+                vec        BLOB,               -- float32 bytes
+                last_used  REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_used ON embeddings(last_used)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta(key TEXT PRIMARY KEY, value TEXT)")
+
+        # 模型不同 → 舊向量全部作廢
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'model_name'").fetchone()
+        if row is None or row[0] != model_name:
+            if row is not None:
+                print(f"[embedding_cache] model changed {row[0]!r} -> {model_name!r}, cache cleared")
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('model_name', ?)", (model_name,)
+            )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(job_no: Optional[str], thash: str) -> str:
+        return job_no if job_no else f"h:{thash}"
+
+    def get_many(self, keys: Sequence[Tuple[str, str]]) -> Dict[str, np.ndarray]:
+        """keys: [(key, text_hash)]；回傳命中的 {key: vector}（hash 不符視為 miss）。"""
+        if not keys:
+            return {}
+        wanted = dict(keys)
+        found: Dict[str, np.ndarray] = {}
+        uniq = list(wanted)
+        with self._lock:
+            # SQLite 參數上限保守抓 900 一批
+            for i in range(0, len(uniq), 900):
+                chunk = uniq[i : i + 900]
+                rows = self._conn.execute(
+                    f"SELECT key, text_hash, vec FROM embeddings "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, thash, blob in rows:
+                    if wanted.get(key) == thash:
+                        found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                self._pending_used.update(dict.fromkeys(found, now))
+                if (
+                    len(self._pending_used) >= self.access_flush_every
+                    or time.monotonic() - self._last_flush >= self.access_flush_s
+                ):
+                    self._flush_used_locked()
+                    self._conn.commit()
+            self._counters["hits"] += len(found)
+            self._counters["misses"] += len(uniq) - len(found)
+        return found
+
+    def put_many(self, items: Sequence[Tuple[str, str, np.ndarray]]) -> None:
+        """items: [(key, text_hash, vector)]"""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (key, thash, int(vec.shape[-1]), np.ascontiguousarray(vec, dtype=np.float32).tobytes(), now)
+            for key, thash, vec in items
+        ]
+        keys = list(dict.fromkeys(r[0] for r in rows))
+        with self._lock:
+            # 先寫回命中紀錄，淘汰才看得到最新的 last_used
+            self._flush_used_locked()
+            existing = 0
+            for i in range(0, len(keys), 900):
+                chunk = keys[i : i + 900]
+                existing += self._conn.execute(
+                    f"SELECT COUNT(*) FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings(key, text_hash, dim, vec, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._size += len(keys) - existing
+            self._evict_locked()
+            self._conn.commit()
+
+    def flush(self) -> None:
+        """把記憶體裡的 last_used 寫回 SQLite。"""
+        with self._lock:
+            if self._pending_used:
+                self._flush_used_locked()
+                self._conn.commit()
+
+    def _flush_used_locked(self) -> None:
+        if self._pending_used:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._pending_used.items()],
+            )
+            self._pending_used.clear()
+        self._last_flush = time.monotonic()
+
+    def _evict_locked(self) -> None:
+        overflow = self._size - self.max_entries
+        if overflow <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (overflow,),
+        )
+        self._size -= overflow
+        self._counters["evictions"] += overflow
+
+    def dim(self) -> Optional[int]:
+        """快取中職缺向量的維度（還沒有任何職缺向量時回 None）。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT dim FROM embeddings WHERE key NOT LIKE 'r:%' LIMIT 1"
+            ).fetchone()
+        return int(row[0]) if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["entries"] = self._size
+        lookups = out["hits"] + out["misses"]
+        out["hit_ratio"] = out["hits"] / lookups if lookups else 0.0
+        out["model_name"] = self.model_name
+        return out
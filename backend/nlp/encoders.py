@@ -0,0 +1,136 @@
+# backend/nlp/encoders.py
+# -*- coding: utf-8 -*-
+"""
+可替換的句向量 encoder（CPU 推論）
+
+backend（RESUMATE_ENCODER_BACKEND）
+-------
+torch       : 原本的 sentence-transformers float32 PyTorch（基準）
+torch-int8  : 同一個模型做 dynamic int8 量化（torch.quantization.quantize_dynamic，只量化 Linear）
+onnx        : sentence-transformers 的 ONNX Runtime backend
+              （需要另外安裝 optimum[onnxruntime]；沒裝就會在載入時報錯）
+
+所有 backend 的 encode(texts) 都回傳 L2 正規化後的 float32 (n, dim) 陣列。
+換 backend 前先用 parity_check() / bench/bench_encoders.py 確認 cosine 漂移在容忍範圍內。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+__all__ = [
+    "DEFAULT_MODEL_NAME",
+    "ENCODER_BACKENDS",
+    "PARITY_SAMPLE",
+    "SentenceEncoder",
+    "load_encoder",
+    "parity_check",
+]
+
+# 輕量通用多語模型（第一次會自動下載）
+DEFAULT_MODEL_NAME = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# 固定的對照樣本：中英混合、長短不一，接近實際履歷 / 職缺內容
+PARITY_SAMPLE: List[str] = [
+    "負責資料清理與預處理，使用 Python 和 SQL 進行統計分析",
+    "建立 Power BI 儀表板，視覺化銷售數據與趨勢分析",
+    "熟悉 TensorFlow / PyTorch，有推薦系統實作經驗者佳",
+    "Data analyst with strong SQL and dashboarding skills",
+    "需具備良好溝通能力，能與跨部門團隊合作",
+    "產品經理：規劃產品藍圖、撰寫需求文件並追蹤開發進度",
+    "Backend engineer familiar with FastAPI, PostgreSQL and Docker",
+    "門市銷售人員，負責顧客服務與商品陳列",
+    "會計助理：處理帳務、發票與月結報表",
+    "數位行銷企劃，熟悉 Google Analytics 與社群廣告投放",
+    "機器學習工程師，負責模型訓練、部署與監控",
+    "N/A",
+]
+
+
+class SentenceEncoder:
+    """包一層 SentenceTransformer，統一 encode 介面與名稱（模型名@backend）。"""
+
+    def __init__(self, model: Any, model_name: str, backend: str) -> None:
+        self.model = model
+        self.model_name = model_name
+        self.backend = backend
+
+    @property
+    def name(self) -> str:
+        return f"{self.model_name}@{self.backend}"
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        vecs = self.model.encode(
+            list(texts),
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+        return np.asarray(vecs, dtype=np.float32)
+
+
+def _load_torch(model_name: str) -> Any:
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def _load_torch_int8(model_name: str) -> Any:
+    import torch
+
+    model = _load_torch(model_name)
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(model_name: str) -> Any:
+    from sentence_transformers import SentenceTransformer
+
+    try:
+        return SentenceTransformer(model_name, device="cpu", backend="onnx")
+    except ImportError as e:
+        raise RuntimeError(
+            "onnx backend 需要 optimum[onnxruntime]：pip install 'optimum[onnxruntime]'"
+        ) from e
+
+
+_LOADERS: Dict[str, Callable[[str], Any]] = {
+    "torch": _load_torch,
+    "torch-int8": _load_torch_int8,
+    "onnx": _load_onnx,
+}
+ENCODER_BACKENDS = tuple(_LOADERS)
+
+
+def load_encoder(backend: str, model_name: str) -> SentenceEncoder:
+    loader = _LOADERS.get(backend)
+    if loader is None:
+        raise ValueError(f"unknown encoder backend {backend!r}，可用：{', '.join(ENCODER_BACKENDS)}")
+    return SentenceEncoder(loader(model_name), model_name, backend)
+
+
+def parity_check(
+    candidate: np.ndarray | SentenceEncoder,
+    reference: np.ndarray | SentenceEncoder,
+    sample: Sequence[str] = PARITY_SAMPLE,
+) -> Dict[str, float]:
+    """
+    比較候選 backend 與基準在同一批句子上的向量差異。
+    drift = 1 - cos(reference_i, candidate_i)；可直接傳 encoder 或已算好的向量。
+    """
+    cand = candidate.encode(sample) if isinstance(candidate, SentenceEncoder) else candidate
+    ref = reference.encode(sample) if isinstance(reference, SentenceEncoder) else reference
+    cand = np.asarray(cand, dtype=np.float32)
+    ref = np.asarray(ref, dtype=np.float32)
+
+    cos = np.sum(cand * ref, axis=1) / (
+        np.linalg.norm(cand, axis=1) * np.linalg.norm(ref, axis=1) + 1e-12
+    )
+    drift = 1.0 - cos
+    return {
+        "mean_drift": float(drift.mean()),
+        "max_drift": float(drift.max()),
+        "min_cosine": float(cos.min()),
+    }
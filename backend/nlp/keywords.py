@@ -0,0 +1,169 @@
+# backend/nlp/keywords.py
+# -*- coding: utf-8 -*-
+"""
+關鍵詞相似度（keyword_score）的向量化計算
+
+- tokenize()：中英混合斷詞。英數字詞整個當一個 token（python, sql, c++, power-bi），
+  中日韓文字連續段落切成字元 bigram（單字段落保留單字），不需要外部斷詞字典
+- job_term_ids()：職缺斷詞結果的快取，key = (job_no, 文字 hash)，值是 token 的 64-bit hash 陣列
+  （不存整段文字當 key、也不存上千個 bigram 字串），筆數上限 RESUMATE_KEYWORD_CACHE（預設 4096）
+- KeywordIndex：把一批職缺建成稀疏 job × term 0/1 矩陣（CSR），
+  scores(resume) 一次稀疏矩陣乘法算出每個職缺跟履歷的詞彙交集數；
+  score_matrix(resumes) 則是多份履歷一起算；extend() 可以往後加職缺（串流時不用每批重建）
+
+keyword_score = |履歷詞 ∩ 職缺詞| / |履歷詞|（與原本逐筆 set 交集的定義相同）
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from cachetools import LRUCache
+from scipy import sparse
+
+__all__ = ["tokenize", "job_term_ids", "KeywordIndex", "keyword_scores"]
+
+# 英數字詞（允許中間帶 + # . - _，例如 c++、c#、node.js、power-bi）
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#._\-]*")
+# CJK 統一表意文字 + 擴充 A、日文假名、韓文
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]+")
+
+KEYWORD_CACHE_SIZE = int(os.environ.get("RESUMATE_KEYWORD_CACHE", "4096"))
+_term_cache: LRUCache = LRUCache(maxsize=max(1, KEYWORD_CACHE_SIZE))
+_term_cache_lock = threading.Lock()
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    """回傳去重後的 token。"""
+    if not text:
+        return ()
+    text = text.lower()
+    tokens: Dict[str, None] = {}
+    for w in _WORD_RE.findall(text):
+        tokens[w.strip("._-")] = None
+    for run in _CJK_RE.findall(text):
+        if len(run) == 1:
+            tokens[run] = None
+        else:
+            for i in range(len(run) - 1):
+                tokens[run[i : i + 2]] = None
+    tokens.pop("", None)
+    return tuple(tokens)
+
+
+def _term_hashes(tokens: Sequence[str]) -> np.ndarray:
+    # 程序內的 str hash（同一個程序裡穩定）；64-bit 碰撞機率可忽略
+    return np.fromiter((hash(t) for t in tokens), dtype=np.int64, count=len(tokens))
+
+
+def job_term_ids(text: str, job_no: Optional[str] = None) -> np.ndarray:
+    """一筆職缺文字的 token hash（已去重）；同一個 (job_no, 文字) 只斷一次詞。"""
+    key = (job_no or "", hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest())
+    with _term_cache_lock:
+        ids = _term_cache.get(key)
+    if ids is None:
+        ids = _term_hashes(tokenize(text))
+        ids.setflags(write=False)
+        with _term_cache_lock:
+            _term_cache[key] = ids
+    return ids
+
+
+class KeywordIndex:
+    """一批職缺的稀疏詞彙矩陣（列 = 職缺，欄 = term，值 = 0/1）。"""
+
+    def __init__(
+        self,
+        job_texts: Sequence[str] = (),
+        job_keys: Optional[Sequence[Optional[str]]] = None,
+    ) -> None:
+        self._rows: List[np.ndarray] = []          # 每筆職缺的 token hash
+        self._vocab = np.empty(0, dtype=np.int64)   # 排序過的 token hash；第 i 個 = 第 i 欄
+        self._matrix: Optional[sparse.csr_matrix] = None
+        self.extend(job_texts, job_keys)
+
+    def extend(
+        self,
+        job_texts: Sequence[str],
+        job_keys: Optional[Sequence[Optional[str]]] = None,
+    ) -> "KeywordIndex":
+        """往後加職缺（job_keys = 各筆 job_no，給斷詞快取用；沒有就只看文字）。"""
+        keys = job_keys if job_keys is not None else [None] * len(job_texts)
+        for text, key in zip(job_texts, keys):
+            self._rows.append(job_term_ids(text or "", key))
+        self._matrix = None
+        return self
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """用到時才建（extend 之後重建）：所有 token hash 一次 np.unique 出詞彙表與欄號。"""
+        if self._matrix is None:
+            indptr = np.zeros(len(self._rows) + 1, dtype=np.int64)
+            np.cumsum([len(r) for r in self._rows], out=indptr[1:])
+            hashes = np.concatenate(self._rows) if self._rows else np.empty(0, dtype=np.int64)
+            self._vocab, indices = np.unique(hashes, return_inverse=True)
+            self._matrix = sparse.csr_matrix(
+                (np.ones(len(indices), dtype=np.float32), indices.reshape(-1), indptr),
+                shape=(len(self._rows), max(1, len(self._vocab))),
+            )
+        return self._matrix
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _query_cols(self, text: str) -> Tuple[np.ndarray, int]:
+        """履歷 → (在詞彙表裡的欄, 履歷詞數)；要先建好 matrix（_vocab 才是最新的）。"""
+        terms = _term_hashes(tokenize(text or ""))
+        if not len(self._vocab):
+            return np.empty(0, dtype=np.int64), len(terms)
+        pos = np.minimum(np.searchsorted(self._vocab, terms), len(self._vocab) - 1)
+        return pos[self._vocab[pos] == terms], len(terms)
+
+    def scores(self, resume_text: str) -> np.ndarray:
+        """每個職缺的 keyword_score（float32，長度 = 職缺數）。"""
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.float32)
+        matrix = self.matrix
+        cols, n_terms = self._query_cols(resume_text)
+        if not n_terms:
+            return np.zeros(len(self), dtype=np.float32)
+        query = np.zeros(matrix.shape[1], dtype=np.float32)
+        query[cols] = 1.0
+        overlap = matrix @ query
+        return (overlap / (n_terms + 1e-6)).astype(np.float32)  # 避免除 0
+
+    def score_matrix(self, resume_texts: Sequence[str]) -> np.ndarray:
+        """多份履歷一次算：回傳 (履歷數, 職缺數) 的 keyword_score 矩陣（一次稀疏矩陣乘法）。"""
+        n = len(resume_texts)
+        if n == 0 or len(self) == 0:
+            return np.zeros((n, len(self)), dtype=np.float32)
+        matrix = self.matrix
+        indptr: List[int] = [0]
+        indices: List[np.ndarray] = []
+        denom = np.empty(n, dtype=np.float32)
+        for i, text in enumerate(resume_texts):
+            cols, n_terms = self._query_cols(text)
+            denom[i] = n_terms + 1e-6  # 避免除 0
+            indices.append(cols)
+            indptr.append(indptr[-1] + len(cols))
+        flat = np.concatenate(indices)
+        query = sparse.csr_matrix(
+            (np.ones(len(flat), dtype=np.float32), flat, indptr),
+            shape=(n, matrix.shape[1]),
+        )
+        overlap = (query @ matrix.T).toarray()
+        return (overlap / denom[:, None]).astype(np.float32)
+
+
+def keyword_scores(
+    resume_text: str,
+    job_texts: Iterable[str],
+    job_keys: Optional[Sequence[Optional[str]]] = None,
+) -> np.ndarray:
+    """一份履歷對一批職缺；同一批職缺要對好幾份履歷算時，自己建一個 KeywordIndex 重複用。"""
+    return KeywordIndex(list(job_texts), job_keys).scores(resume_text)
@@ -1,18 +1,274 @@
 # backend/nlp/matcher.py
 from __future__ import annotations
-from typing import List, Dict, Any
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple, Union
 
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
 
-# 輕量通用模型（第一次會自動下載）
-_model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+from backend.dataframe import JOB_COLUMNS, JobFrame, top_k_indices
+from backend.db import DB_DIR, iter_job_corpus, load_jobs_by_nos
+from backend.metrics import JOBS_ENCODED, stage
+from backend.nlp.batcher import EncodeBatcher
+from backend.nlp.embedding_cache import EmbeddingCache, text_hash
+from backend.nlp.keywords import KeywordIndex, keyword_scores
+from backend.nlp.encoders import DEFAULT_MODEL_NAME, SentenceEncoder, load_encoder
+from backend.nlp.model_provider import ModelProvider
+from backend.nlp.vector_index import JobVectorIndex
+
+if TYPE_CHECKING:
+    from backend.snapshot import JobSnapshot
+
+MODEL_NAME = os.environ.get("RESUMATE_MODEL_NAME", DEFAULT_MODEL_NAME)
+# 推論 backend：torch / torch-int8 / onnx（見 encoders.py）
+ENCODER_BACKEND = os.environ.get("RESUMATE_ENCODER_BACKEND", "torch")
+# 快取與紀錄用的完整名稱；換模型或換 backend 都會讓 embedding 快取作廢
+ENCODER_NAME = f"{MODEL_NAME}@{ENCODER_BACKEND}"
+
+
+def _load_model() -> SentenceEncoder:
+    # encoders 裡才 import torch / sentence_transformers：只 import matcher 不會連帶載入
+    return load_encoder(ENCODER_BACKEND, MODEL_NAME)
+
+
+# 延遲載入：第一次 encode 或 warm_up() 時才真的載模型
+model_provider: ModelProvider[SentenceEncoder] = ModelProvider(ENCODER_NAME, _load_model)
+
+# 併發 request 的 encode 合併成 micro-batch（RESUMATE_ENCODE_BATCHING=0 關閉）
+ENCODE_BATCHING = os.environ.get("RESUMATE_ENCODE_BATCHING", "1") == "1"
+ENCODE_MAX_BATCH = int(os.environ.get("RESUMATE_ENCODE_MAX_BATCH", "64"))
+ENCODE_MAX_WAIT_MS = float(os.environ.get("RESUMATE_ENCODE_MAX_WAIT_MS", "5"))
+encode_batcher = EncodeBatcher(
+    lambda texts: model_provider.get().encode(texts),
+    max_batch_size=ENCODE_MAX_BATCH,
+    max_wait_ms=ENCODE_MAX_WAIT_MS,
+)
+
+# 職缺 embedding 快取；RESUMATE_EMBED_CACHE=off 關閉
+EMBED_CACHE_PATH = os.environ.get("RESUMATE_EMBED_CACHE", str(DB_DIR / "embeddings.db"))
+EMBED_CACHE_MAX_ENTRIES = int(os.environ.get("RESUMATE_EMBED_CACHE_MAX_ENTRIES", "200000"))
+_embed_cache: Optional[EmbeddingCache] = None
+if EMBED_CACHE_PATH.lower() not in ("", "0", "off", "none"):
+    try:
+        _embed_cache = EmbeddingCache(
+            EMBED_CACHE_PATH, ENCODER_NAME, max_entries=EMBED_CACHE_MAX_ENTRIES
+        )
+    except Exception as e:
+        print("[matcher] embedding cache disabled:", e)
 
 
 def _ensure_text(s: str | None) -> str:
     return (s or "").strip()
 
 
+def _job_text(j: Dict[str, Any]) -> str:
+    """要拿去 encode 的職缺文字：優先用描述，沒有就用標題/公司/地點湊。"""
+    return _job_text_of(j.get("description"), j.get("job_title"), j.get("company"), j.get("location"))
+
+
+def _job_text_of(description: Any, title: Any, company: Any, location: Any) -> str:
+    desc = _ensure_text(description)
+    if not desc:
+        desc = " ".join(
+            filter(
+                None,
+                [
+                    _ensure_text(title),
+                    _ensure_text(company),
+                    _ensure_text(location),
+                ],
+            )
+        )
+    return desc if desc else "N/A"
+
+
+def _frame_texts(frame: JobFrame) -> List[str]:
+    """JobFrame 版的 _job_text：直接走欄，不用先轉 dict。"""
+    return [
+        _job_text_of(*row)
+        for row in zip(frame.col("description"), frame.col("job_title"), frame.col("company"), frame.col("location"))
+    ]
+
+
+def _keyword_text(j: Dict[str, Any]) -> str:
+    """keyword_score 看的職缺文字：描述 + 標題。"""
+    return (j.get("description") or "") + " " + (j.get("job_title") or "")
+
+
+def _keyword_index(jobs: Sequence[Dict[str, Any]]) -> KeywordIndex:
+    return KeywordIndex([_keyword_text(j) for j in jobs], [j.get("job_no") for j in jobs])
+
+
+def _frame_keyword_texts(frame: JobFrame) -> List[str]:
+    return [(d or "") + " " + (t or "") for d, t in zip(frame.col("description"), frame.col("job_title"))]
+
+
+def _encode(texts: List[str], *, kind: str = "job") -> np.ndarray:
+    """真的送進模型的地方（快取沒命中的才會到這）；kind = job / resume，只影響 metrics。"""
+    JOBS_ENCODED.inc(len(texts), kind=kind)
+    with stage("encode"):
+        if ENCODE_BATCHING:
+            return encode_batcher.encode(texts)
+        return model_provider.get().encode(texts)
+
+
+def encoder_stats() -> Dict[str, Any]:
+    """encode 佇列深度、batch 大小直方圖與 embedding 快取命中率。"""
+    return {
+        "batcher": encode_batcher.stats(),
+        "embedding_cache": _embed_cache.stats() if _embed_cache is not None else None,
+    }
+
+
+def warm_up(*, freeze: bool = False) -> None:
+    """載入模型並 encode 一句話，讓第一個請求不用等（freeze 見 ModelProvider.warm_up）。"""
+    model_provider.warm_up(lambda m: m.encode(["warm up"]), freeze=freeze)
+
+
+def is_model_ready() -> bool:
+    return model_provider.is_ready()
+
+
+def _encode_jobs(jobs: List[Dict[str, Any]], texts: List[str]) -> np.ndarray:
+    """
+    職缺向量：先查 embedding 快取，只 encode 沒命中的，
+    最後組成一個連續的 (len(jobs), dim) float32 陣列。
+    """
+    if _embed_cache is None or not jobs:
+        return _encode(texts)
+
+    hashes = [text_hash(t) for t in texts]
+    keys = [EmbeddingCache.make_key(j.get("job_no"), h) for j, h in zip(jobs, hashes)]
+    hits = _embed_cache.get_many(list(zip(keys, hashes)))
+
+    miss_idx = [i for i, k in enumerate(keys) if k not in hits]
+    miss_vecs = _encode([texts[i] for i in miss_idx]) if miss_idx else None
+
+    dim = miss_vecs.shape[1] if miss_vecs is not None else next(iter(hits.values())).shape[0]
+    out = np.empty((len(jobs), dim), dtype=np.float32)
+    for i, k in enumerate(keys):
+        if k in hits:
+            out[i] = hits[k]
+    if miss_vecs is not None:
+        out[miss_idx] = miss_vecs
+        _embed_cache.put_many([(keys[i], hashes[i], out[i]) for i in miss_idx])
+    return out
+
+
+def _encode_resumes(resume_texts: List[str]) -> np.ndarray:
+    """
+    履歷向量：同樣走 embedding 快取（key = "r:<文字 hash>"），
+    同一份履歷換個 filter 重新媒合時不用再 encode。
+    """
+    if _embed_cache is None or not resume_texts:
+        return _encode(resume_texts, kind="resume")
+
+    hashes = [text_hash(t) for t in resume_texts]
+    keys = [f"r:{h}" for h in hashes]
+    hits = _embed_cache.get_many(list(zip(keys, hashes)))
+    miss_idx = [i for i, k in enumerate(keys) if k not in hits]
+    if not miss_idx:
+        return np.stack([hits[k] for k in keys])
+
+    miss_vecs = _encode([resume_texts[i] for i in miss_idx], kind="resume")
+    out = np.empty((len(resume_texts), miss_vecs.shape[1]), dtype=np.float32)
+    for i, k in enumerate(keys):
+        if k in hits:
+            out[i] = hits[k]
+    out[miss_idx] = miss_vecs
+    _embed_cache.put_many([(keys[i], hashes[i], out[i]) for i in miss_idx])
+    return out
+
+
+def snapshot_job_vectors(
+    jobs: List[Dict[str, Any]],
+    *,
+    encode_missing: bool = False,
+) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """
+    匯出快照用的職缺向量：回傳 ((n, dim) float32 或 None, 每筆有沒有向量的 bool 陣列)。
+    encode_missing=False 時只查 embedding 快取（不載模型），沒命中的列補 0；
+    True 時跟媒合一樣沒命中就 encode。
+    """
+    if encode_missing:
+        return _encode_jobs(jobs, [_job_text(j) for j in jobs]), np.ones(len(jobs), dtype=bool)
+    has = np.zeros(len(jobs), dtype=bool)
+    dim = _embed_cache.dim() if _embed_cache is not None else None
+    if dim is None or not jobs:
+        return None, has
+
+    hashes = [text_hash(_job_text(j)) for j in jobs]
+    keys = [EmbeddingCache.make_key(j.get("job_no"), h) for j, h in zip(jobs, hashes)]
+    hits = _embed_cache.get_many(list(zip(keys, hashes)))
+    out = np.zeros((len(jobs), dim), dtype=np.float32)
+    for i, k in enumerate(keys):
+        vec = hits.get(k)
+        if vec is not None and vec.shape[0] == dim:
+            out[i] = vec
+            has[i] = True
+    return out, has
+
+
+def embedding_model_name() -> str:
+    """向量是哪個模型 / backend 算的（快照記下來，載入時對不上就不能拿來跟履歷向量比）。"""
+    return ENCODER_NAME
+
+
+def rank_frame(
+    resume_text: str,
+    resume_vec: np.ndarray,
+    frame: JobFrame,
+    top_k: int,
+) -> JobFrame:
+    """frame 要已掛上向量（with_vectors）；回傳帶 score 欄、由高到低的前 top_k 筆。"""
+    with stage("score"):
+        ## 語意相似度 (semantic_score)：向量都已正規化，內積就是 cosine
+        sims = (frame.vectors @ resume_vec[0]).astype(float)
+
+        ## 關鍵詞相似度 (keyword_score)：整批職缺建稀疏詞彙矩陣，一次算完交集比例
+        kw = keyword_scores(resume_text, _frame_keyword_texts(frame), list(frame.col("job_no")))
+
+        #加權平均結合兩種分數；argpartition 取前 top_k，不整批排序
+        return frame.assign_scores(0.7 * sims + 0.3 * kw).top_k(top_k)
+
+
+def _rank(
+    resume_text: str,
+    resume_vec: np.ndarray,
+    jobs: List[Dict[str, Any]],
+    job_vecs: np.ndarray,
+    top_k: int,
+    *,
+    verbose: bool = True,
+    kw_index: Optional[KeywordIndex] = None,
+) -> List[Dict[str, Any]]:
+    """
+    dict list 版的 rank_frame：分數一樣整批算、argpartition 取前 top_k，
+    只有這 top_k 筆會複製成帶 score 的新 dict（不改動傳進來的 jobs）。
+    一次性的小批次不值得先建 DataFrame，所以這裡直接對 list 做。
+    kw_index：呼叫端已經有這批 jobs（同順序）的 KeywordIndex 就傳進來，不再重建。
+    """
+    with stage("score"):
+        ## 語意相似度 (semantic_score)：向量都已正規化，內積就是 cosine
+        sims = (job_vecs @ resume_vec[0]).astype(float)
+
+        ## 關鍵詞相似度 (keyword_score)：整批職缺建稀疏詞彙矩陣，一次算完交集比例
+        kw = (kw_index if kw_index is not None else _keyword_index(jobs)).scores(resume_text)
+
+        #加權平均結合兩種分數
+        final = np.round(0.7 * sims + 0.3 * kw, 4)
+        top_jobs = [{**jobs[i], "score": float(final[i])} for i in top_k_indices(final, top_k)]
+
+    #######################
+    # ✅ 只印第一名
+    if top_jobs and verbose:
+        print("TOP 1 JOB:", top_jobs[0])
+
+    #######################
+    return top_jobs
+
+
 def match_resume_to_jobs(
     resume_text: str,
     jobs: List[Dict[str, Any]],
@@ -28,56 +284,256 @@ def match_resume_to_jobs(
     回傳：原 job 欄位 + score (float)
     """
     ## 準備文本資料
-    texts = []
-    valid_idx = []
-    for i, j in enumerate(jobs):
-        desc = _ensure_text(j.get("description"))
-        if not desc:
-            desc = " ".join(
-                filter(
-                    None,
-                    [
-                        _ensure_text(j.get("job_title")),
-                        _ensure_text(j.get("company")),
-                        _ensure_text(j.get("location")),
-                    ],
-                )
-            )
-        texts.append(desc if desc else "N/A")
-        valid_idx.append(i)
+    texts = [_job_text(j) for j in jobs]
 
     ## 向量化
-    resume_vec = _model.encode([resume_text], convert_to_numpy=True, normalize_embeddings=True)
-    job_vecs = _model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    resume_vec = _encode_resumes([resume_text])
+    job_vecs = _encode_jobs(jobs, texts)
 
-    ## 語意相似度 (semantic_score)
-    sims = cosine_similarity(resume_vec, job_vecs)[0]
+    return _rank(resume_text, resume_vec, jobs, job_vecs, top_k)
 
-    ## 關鍵詞相似度 (keyword_score)
-    for idx, j in enumerate(jobs):
-        job_text = (j.get("description") or "") + " " + (j.get("job_title") or "")
-        # 計算關鍵詞交集比例
-        resume_words = set(resume_text.lower().split())
-        job_words = set(job_text.lower().split())
-        overlap = len(resume_words & job_words)
-        keyword_score = overlap / (len(resume_words) + 1e-6)  # 避免除 0
 
-        #加權平均結合兩種分數
-        semantic_score = float(sims[idx])
-        final_score = 0.7 * semantic_score + 0.3 * keyword_score
+def match_resume_to_frame(resume_text: str, frame: JobFrame, top_k: int = 20) -> JobFrame:
+    """match_resume_to_jobs 的 JobFrame 版：還沒掛向量就先 encode（走 embedding 快取），回傳前 top_k 筆。"""
+    if not len(frame):
+        return frame
+    if frame.vectors is None:
+        frame.with_vectors(_encode_jobs(list(frame.iter_dicts(["job_no"])), _frame_texts(frame)))
+    return rank_frame(resume_text, _encode_resumes([resume_text]), frame, top_k)
 
-        j["score"] = round(final_score, 4)
 
-    ranked = sorted(jobs, key=lambda x: x.get("score", 0.0), reverse=True)
+def match_resume_to_job_stream(
+    resume_text: str,
+    jobs: Iterable[Dict[str, Any]],
+    top_k: int = 20,
+    batch_size: int = 16,
+    *,
+    on_progress: Optional[Callable[[int, List[Dict[str, Any]]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    match_resume_to_jobs 的串流版：jobs 可以是 iter_jobs_data 這種邊爬邊吐的 iterator，
+    每累積 batch_size 筆就先 encode 一批，讓網路 I/O 跟 embedding 計算重疊。
+    分數與排序結果跟 match_resume_to_jobs 相同。
+    on_progress(已 encode 筆數, 目前為止的暫定 top_k)：每 encode 完一批呼叫一次。
+    """
+    resume_vec = _encode_resumes([resume_text])
 
+    collected: List[Dict[str, Any]] = []
+    vec_batches: List[np.ndarray] = []
+    pending: List[str] = []
+    # 詞彙矩陣跟著每批往後加，暫定排名不用每次從頭建
+    kw_index = KeywordIndex()
 
-    #######################
-    top_jobs = ranked[: top_k]
+    def _flush() -> None:
+        batch = collected[-len(pending):]
+        vec_batches.append(_encode_jobs(batch, pending))
+        kw_index.extend([_keyword_text(j) for j in batch], [j.get("job_no") for j in batch])
+        if on_progress is not None:
+            partial = _rank(
+                resume_text, resume_vec, list(collected), np.vstack(vec_batches), top_k,
+                verbose=False, kw_index=kw_index,
+            )
+            on_progress(len(collected), partial)
 
-    # ✅ 只印第一名
-    if top_jobs:
-        print("TOP 1 JOB:", top_jobs[0])
+    for j in jobs:
+        collected.append(j)
+        pending.append(_job_text(j))
+        if len(pending) >= batch_size:
+            _flush()
+            pending = []
+    if pending:
+        _flush()
 
-    #######################
-    return ranked[: top_k]
+    if not collected:
+        return []
+
+    return _rank(resume_text, resume_vec, collected, np.vstack(vec_batches), top_k, kw_index=kw_index)
+
+
+def iter_match_resumes_to_jobs(
+    resume_texts: Sequence[str],
+    jobs: Union[List[Dict[str, Any]], JobFrame],
+    top_k: int = 20,
+    *,
+    chunk_size: int = 64,
+) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    多份履歷對同一批職缺：職缺只 encode / 斷詞一次，
+    每 chunk_size 份履歷算一次 (履歷數 × 職缺數) 分數矩陣，用 argpartition 取各自的 top_k。
+    依輸入順序 yield (履歷索引, 排好的職缺)；每筆職缺是複本（各履歷分數不同），帶 score 欄位。
+    jobs 可以是 dict list 或 JobFrame（已掛向量就不再 encode）。
+    """
+    frame = jobs if isinstance(jobs, JobFrame) else JobFrame.from_records(jobs)
+    if not len(frame):
+        for i in range(len(resume_texts)):
+            yield i, []
+        return
+
+    if frame.vectors is None:
+        frame.with_vectors(_encode_jobs(list(frame.iter_dicts(["job_no"])), _frame_texts(frame)))
+    job_vecs = frame.vectors
+    kw_index = KeywordIndex(_frame_keyword_texts(frame), list(frame.col("job_no")))
+    k = min(top_k, len(frame))
+
+    for start in range(0, len(resume_texts), chunk_size):
+        chunk = list(resume_texts[start : start + chunk_size])
+        resume_vecs = _encode_resumes(chunk)
+
+        # 語意 (N × M) + 關鍵詞 (N × M)，加權平均
+        scores = 0.7 * (resume_vecs @ job_vecs.T) + 0.3 * kw_index.score_matrix(chunk)
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for row, idx in enumerate(top):
+            idx = idx[np.argsort(-scores[row, idx])]
+            ranked = frame.take(idx).assign_scores(scores[row, idx]).to_records()
+            yield start + row, ranked
+
+
+def match_resumes_to_jobs(
+    resume_texts: Sequence[str],
+    jobs: List[Dict[str, Any]],
+    top_k: int = 20,
+) -> List[List[Dict[str, Any]]]:
+    """批次版 match_resume_to_jobs：回傳每份履歷各自的 top_k 職缺（順序同 resume_texts）。"""
+    return [ranked for _, ranked in iter_match_resumes_to_jobs(resume_texts, jobs, top_k)]
+
+
+# ---------------------------
+# 整庫檢索（不連網）
+# ---------------------------
+# 索引在背景建 / 更新（schedule_corpus_refresh），request 只讀目前的 _corpus_index
+# 距離上次更新超過這麼多秒，下一個整庫請求會排一次背景更新（抓別的程序寫進 job.db 的職缺）
+CORPUS_REFRESH_S = float(os.environ.get("RESUMATE_CORPUS_REFRESH_S", "60"))
 
+_corpus_index: Optional[JobVectorIndex] = None
+_corpus_cursor: Optional[Tuple[Optional[str], int]] = None   # 上次讀到的 (crawled_at, row_id)
+_corpus_refreshed_at = 0.0
+_corpus_lock = threading.Lock()          # refresh_corpus_index 一次只跑一個
+_corpus_state_lock = threading.Lock()    # 保護 _corpus_refresh
+_corpus_refresh = {"running": False, "dirty": False}
+
+
+class CorpusIndexNotReady(RuntimeError):
+    """整庫索引第一次還沒建完（已在背景建）。"""
+
+
+def refresh_corpus_index(batch_size: int = 512) -> JobVectorIndex:
+    """
+    把 job.db 裡新進 / 有更新的職缺加進向量索引，阻塞到做完為止。
+    第一次會建整個索引（建完才換上，建的途中 request 看到的是「還沒好」）；
+    之後只讀 (crawled_at, id) 在上次最後一筆之後的列。
+    向量走 embedding 快取，已算過的職缺不會重新 encode。
+    不要在 request 路徑上呼叫：用 schedule_corpus_refresh() 丟到背景。
+    """
+    global _corpus_index, _corpus_cursor, _corpus_refreshed_at
+    with _corpus_lock:
+        index = _corpus_index if _corpus_index is not None else JobVectorIndex()
+        cursor = _corpus_cursor
+        for batch in iter_job_corpus(batch_size=batch_size, after=cursor):
+            vecs = _encode_jobs(batch, [_job_text(j) for j in batch])
+            index.add(
+                [j["job_no"] for j in batch],
+                vecs,
+                [j["area"] for j in batch],
+                [j["industry"] for j in batch],
+            )
+            cursor = (batch[-1]["crawled_at"], batch[-1]["row_id"])
+        _corpus_cursor = cursor
+        _corpus_index = index
+        _corpus_refreshed_at = time.monotonic()
+        return index
+
+
+def _corpus_refresh_worker() -> None:
+    while True:
+        try:
+            refresh_corpus_index()
+        except Exception as e:
+            print("[matcher] corpus index refresh failed:", e)
+        with _corpus_state_lock:
+            if not _corpus_refresh["dirty"]:
+                _corpus_refresh["running"] = False
+                return
+            _corpus_refresh["dirty"] = False
+
+
+def schedule_corpus_refresh() -> None:
+    """
+    在背景執行緒跑 refresh_corpus_index，馬上回傳。
+    同時只跑一個；跑的途中又被呼叫，就在這次跑完後再補跑一次。
+    """
+    with _corpus_state_lock:
+        if _corpus_refresh["running"]:
+            _corpus_refresh["dirty"] = True
+            return
+        _corpus_refresh["running"] = True
+    threading.Thread(target=_corpus_refresh_worker, name="corpus-index", daemon=True).start()
+
+
+def notify_corpus_changed() -> None:
+    """job.db 有新的 / 更新的職缺：索引已經建過的話排一次背景更新（沒用過整庫檢索就不建）。"""
+    if _corpus_index is not None:
+        schedule_corpus_refresh()
+
+
+def is_corpus_index_ready() -> bool:
+    return _corpus_index is not None
+
+
+def match_resume_to_corpus(
+    resume_text: str,
+    top_k: int = 20,
+    *,
+    area: Optional[str] = None,
+    industry: Optional[str] = None,
+    candidates: int = 5,
+) -> List[Dict[str, Any]]:
+    """
+    對整個本地 job.db 語料做檢索排名（request 路徑上不連網）。
+    先用向量索引取 top_k × candidates 個語意最接近的職缺，
+    再跟即時模式一樣加上 keyword_score 重新排序，回傳格式同 match_resume_to_jobs。
+    area / industry 會先過濾 job.db 中對應欄位（爬取時用的 104 代碼）。
+    索引第一次還沒建好時排背景建置並丟 CorpusIndexNotReady（呼叫端回 503）。
+    """
+    index = _corpus_index
+    if index is None:
+        schedule_corpus_refresh()
+        raise CorpusIndexNotReady("corpus index is being built")
+    if time.monotonic() - _corpus_refreshed_at > CORPUS_REFRESH_S:
+        schedule_corpus_refresh()
+    resume_vec = _encode_resumes([resume_text])
+    hits = index.search(resume_vec[0], top_k * candidates, area=area, industry=industry)
+    if not hits:
+        return []
+
+    jobs = load_jobs_by_nos([no for no, _ in hits])
+    if not jobs:
+        return []
+    job_vecs = _encode_jobs(jobs, [_job_text(j) for j in jobs])
+    return _rank(resume_text, resume_vec, jobs, job_vecs, top_k)
+
+
+def match_resume_to_snapshot(
+    resume_text: str,
+    snapshot: "JobSnapshot",
+    top_k: int = 20,
+    *,
+    area: Optional[str] = None,
+    industry: Optional[str] = None,
+    candidates: int = 5,
+) -> List[Dict[str, Any]]:
+    """
+    match_resume_to_corpus 的快照版：職缺向量直接用快照裡 memory-map 的 embedding 欄，
+    不讀 job.db、不查 embedding 快取，只 encode 履歷。
+    先取 top_k × candidates 個語意最接近的職缺，再加上 keyword_score 重新排序。
+    """
+    if snapshot.model_name != ENCODER_NAME:
+        raise ValueError(
+            f"snapshot {snapshot.snapshot_id} was embedded with {snapshot.model_name!r}, "
+            f"current encoder is {ENCODER_NAME!r}"
+        )
+    resume_vec = _encode_resumes([resume_text])
+    frame = snapshot.search(resume_vec[0], top_k * candidates, area=area, industry=industry)
+    if not len(frame):
+        return []
+    return rank_frame(resume_text, resume_vec, frame, top_k).project(list(JOB_COLUMNS) + ["score"])
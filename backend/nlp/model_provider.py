@@ -0,0 +1,74 @@
+# backend/nlp/model_provider.py
+# -*- coding: utf-8 -*-
+"""
+延遲載入的模型提供者
+
+import 時不載入任何模型（也不 import torch），第一次 get() 才呼叫 loader；
+warm_up() 可在 API 啟動時主動觸發，is_ready() 給 readiness 檢查用。
+
+preload-before-fork：在 fork worker 之前（例如 gunicorn --preload）先 warm_up(freeze=True)，
+各 worker 便以 copy-on-write 共用同一份權重，而不是各自載入一份。
+"""
+
+from __future__ import annotations
+
+import gc
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+__all__ = ["ModelProvider"]
+
+T = TypeVar("T")
+
+
+class ModelProvider(Generic[T]):
+    def __init__(self, name: str, loader: Callable[[], T]) -> None:
+        self.name = name
+        self._loader = loader
+        self._model: Optional[T] = None
+        self._lock = threading.Lock()
+        self._error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+    def get(self) -> T:
+        """取得模型；還沒載入就在這裡載入（多執行緒同時呼叫只會載一次）。"""
+        model = self._model
+        if model is not None:
+            return model
+        with self._lock:
+            if self._model is None:
+                started = time.perf_counter()
+                try:
+                    self._model = self._loader()
+                except Exception as e:
+                    self._error = str(e)
+                    raise
+                self._error = None
+                self.load_seconds = round(time.perf_counter() - started, 3)
+                print(f"[model] {self.name} loaded in {self.load_seconds}s")
+            return self._model
+
+    def is_ready(self) -> bool:
+        return self._model is not None
+
+    def warm_up(self, hook: Optional[Callable[[T], Any]] = None, *, freeze: bool = False) -> None:
+        """
+        載入模型並（可選）跑一次 hook（例如 encode 一句話，把 lazy 初始化都做完）。
+        freeze=True：把目前所有物件移出 GC 追蹤，fork 後 GC 不會去碰（寫）這些頁面，
+        copy-on-write 才能真的共用。
+        """
+        model = self.get()
+        if hook is not None:
+            hook(model)
+        if freeze:
+            gc.collect()
+            gc.freeze()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "model": self.name,
+            "ready": self.is_ready(),
+            "load_seconds": self.load_seconds,
+            "error": self._error,
+        }
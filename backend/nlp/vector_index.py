@@ -0,0 +1,196 @@
+# backend/nlp/vector_index.py
+# -*- coding: utf-8 -*-
+"""
+本地職缺語料的向量索引（不需連網的整庫檢索）
+
+- 向量一律 L2 正規化的 float32，內積 = cosine
+- 職缺數 < ivf_threshold：整個矩陣做一次 matmul + argpartition（精確）
+- 超過門檻：IVF（球面 k-means 分群，查詢時只掃最近的 nprobe 個群），近似但快很多
+- add() 可以增量加入 / 覆蓋職缺；IVF 模式下新向量直接分到最近的群，
+  語料成長到上次訓練的 2 倍時自動重新分群
+- search() 支援用 area / industry 欄位先過濾再排名：過濾後少於 ivf_threshold 筆直接精確比對，
+  否則 IVF 探查的群數會一路加倍到過濾後至少有 top_k 筆候選
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+__all__ = ["JobVectorIndex"]
+
+
+class JobVectorIndex:
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        *,
+        ivf_threshold: int = 20_000,
+        nprobe: int = 8,
+        seed: int = 0,
+    ) -> None:
+        self.dim = dim
+        self.ivf_threshold = int(ivf_threshold)
+        self.nprobe = int(nprobe)
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.RLock()
+
+        self._vecs = np.zeros((0, dim or 0), dtype=np.float32)
+        self._n = 0
+        self.job_nos: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self._areas = np.empty(0, dtype=object)
+        self._industries = np.empty(0, dtype=object)
+
+        # IVF 狀態
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.empty(0, dtype=np.int32)
+        self._trained_n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def is_ivf(self) -> bool:
+        return self._centroids is not None
+
+    # ---------- 寫入 ----------
+    def _grow(self, need: int) -> None:
+        cap = self._vecs.shape[0]
+        if need <= cap:
+            return
+        new_cap = max(need, cap * 2, 1024)
+        vecs = np.zeros((new_cap, self.dim), dtype=np.float32)
+        vecs[: self._n] = self._vecs[: self._n]
+        self._vecs = vecs
+        for name, fill in (("_areas", None), ("_industries", None)):
+            arr = np.empty(new_cap, dtype=object)
+            arr[: self._n] = getattr(self, name)[: self._n]
+            arr[self._n :] = fill
+            setattr(self, name, arr)
+        assign = np.full(new_cap, -1, dtype=np.int32)
+        assign[: self._n] = self._assign[: self._n]
+        self._assign = assign
+
+    def add(
+        self,
+        job_nos: Sequence[str],
+        vecs: np.ndarray,
+        areas: Sequence[Optional[str]],
+        industries: Sequence[Optional[str]],
+    ) -> None:
+        """加入（或覆蓋同 job_no 的）職缺向量；vecs 須已正規化。"""
+        if len(job_nos) == 0:
+            return
+        vecs = np.asarray(vecs, dtype=np.float32)
+        with self._lock:
+            if self.dim is None or self._vecs.shape[1] == 0:
+                self.dim = int(vecs.shape[1])
+                self._vecs = np.zeros((0, self.dim), dtype=np.float32)
+            self._grow(self._n + len(job_nos))
+
+            rows = np.empty(len(job_nos), dtype=np.int64)
+            for i, no in enumerate(job_nos):
+                row = self._pos.get(no)
+                if row is None:
+                    row = self._n
+                    self._n += 1
+                    self._pos[no] = row
+                    self.job_nos.append(no)
+                rows[i] = row
+
+            self._vecs[rows] = vecs
+            self._areas[rows] = np.asarray(areas, dtype=object)
+            self._industries[rows] = np.asarray(industries, dtype=object)
+
+            if self.is_ivf:
+                self._assign[rows] = self._nearest_centroids(vecs, 1)[:, 0]
+            if self._n >= self.ivf_threshold and self._n >= 2 * max(self._trained_n, 1):
+                self.train()
+
+    # ---------- IVF ----------
+    def _nearest_centroids(self, vecs: np.ndarray, k: int) -> np.ndarray:
+        assert self._centroids is not None
+        sims = vecs @ self._centroids.T
+        k = min(k, self._centroids.shape[0])
+        idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        return idx.astype(np.int32)
+
+    def train(self, n_iter: int = 10, sample: int = 20_000) -> None:
+        """對目前的向量做球面 k-means（nlist ≈ 4·sqrt(n)），並重新分配所有職缺。"""
+        with self._lock:
+            n = self._n
+            if n == 0:
+                return
+            data = self._vecs[:n]
+            nlist = max(1, min(int(4 * np.sqrt(n)), n))
+            pick = self._rng.choice(n, size=min(n, max(sample, nlist)), replace=False)
+            train = data[pick]
+            centroids = train[self._rng.choice(len(train), size=nlist, replace=False)].copy()
+
+            for _ in range(n_iter):
+                assign = np.argmax(train @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, train)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                empty = norms[:, 0] == 0
+                sums[~empty] /= norms[~empty]
+                sums[empty] = centroids[empty]  # 空群沿用舊中心
+                centroids = sums
+
+            self._centroids = centroids.astype(np.float32)
+            # 分批指派，避免 n × nlist 矩陣太大
+            for i in range(0, n, 65_536):
+                self._assign[i : min(n, i + 65_536)] = self._nearest_centroids(data[i : i + 65_536], 1)[:, 0]
+            self._trained_n = n
+
+    # ---------- 查詢 ----------
+    def _probe_locked(self, q: np.ndarray, mask: np.ndarray, need: int) -> np.ndarray:
+        """IVF 候選：從 nprobe 個最近的群開始，過濾後不到 need 筆就把探查的群數加倍。"""
+        assert self._centroids is not None
+        n = mask.shape[0]
+        order = np.argsort(-(self._centroids @ q))
+        nprobe = max(1, self.nprobe)
+        while True:
+            cand = np.flatnonzero(mask & np.isin(self._assign[:n], order[:nprobe]))
+            if cand.size >= need or nprobe >= order.size:
+                return cand
+            nprobe *= 2
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int = 20,
+        *,
+        area: Optional[str] = None,
+        industry: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """回傳 [(job_no, cosine)]，分數由高到低。"""
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            n = self._n
+            if n == 0:
+                return []
+
+            mask = np.ones(n, dtype=bool)
+            if area:
+                mask &= self._areas[:n] == area
+            if industry:
+                mask &= self._industries[:n] == industry
+            n_match = int(np.count_nonzero(mask)) if (area or industry) else n
+            if n_match == 0:
+                return []
+
+            if self.is_ivf and n_match >= self.ivf_threshold:
+                cand = self._probe_locked(q, mask, min(top_k, n_match))
+            else:
+                # 沒分群，或過濾後剩不多：直接對過濾後的子集做精確 matmul
+                cand = np.flatnonzero(mask)
+            sims = self._vecs[cand] @ q
+
+        k = min(top_k, cand.size)
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        return [(self.job_nos[cand[i]], float(sims[i])) for i in top]
@@ -0,0 +1,233 @@
+# backend/profiling.py
+# -*- coding: utf-8 -*-
+"""
+慢 /match 的取樣式 profiler（預設關閉，要用時用環境變數打開）
+
+    RESUMATE_PROFILE_RATE=0.05        # 隨機 5% 的請求做 profile
+    RESUMATE_PROFILE_SLOW_MS=3000     # 或：每個請求都取樣，但只留下超過 3 秒的
+    RESUMATE_PROFILE_PATHS=/match     # 只看這些路徑前綴（逗號分隔）
+    RESUMATE_PROFILE_INTERVAL_MS=5    # 取樣間隔
+    RESUMATE_PROFILE_DIR=backend/profiles
+    RESUMATE_PROFILE_KEEP=50          # 磁碟上最多留幾份（舊的先刪）
+
+做法：不用 cProfile（它只看得到開啟它的那條執行緒，/match 的工作分散在 thread pool、
+爬蟲內頁執行緒與 encode 執行緒），而是另開一條取樣執行緒，有請求在 profile 時每隔
+interval 用 sys._current_frames() 抓所有執行緒的 stack，只留有跑到本專案程式碼的
+（閒置的 pool 執行緒、event loop 的 select、在 queue 上等工作的執行緒會被濾掉）。
+同時有多個請求在 profile 時，取樣會互相混到；stack 最底層是執行緒名稱，可以分得出來。
+
+輸出是 collapsed stack（flamegraph.pl / speedscope 可直接讀）：每行 "thread;frame;frame 次數"，
+存成 <profile id>.folded，另外一份 <profile id>.json 記路徑、耗時、取樣數與 client 的 X-Request-ID。
+profile id 由伺服器產生（回在 X-Profile-Id header）；/admin/profiles* 要設 RESUMATE_ADMIN_TOKEN 才能用。
+
+兩個都沒設（預設）時 get_profiler() 回 None，main.py 不會掛 middleware，沒有額外成本。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.db import BASE_DIR
+
+__all__ = ["StackSampler", "RequestProfiler", "get_profiler"]
+
+PROFILE_RATE = float(os.environ.get("RESUMATE_PROFILE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.environ.get("RESUMATE_PROFILE_SLOW_MS", "0"))
+PROFILE_PATHS = tuple(
+    p.strip() for p in os.environ.get("RESUMATE_PROFILE_PATHS", "/match").split(",") if p.strip()
+)
+PROFILE_INTERVAL_MS = float(os.environ.get("RESUMATE_PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = Path(os.environ.get("RESUMATE_PROFILE_DIR", str(BASE_DIR / "profiles")))
+PROFILE_KEEP = int(os.environ.get("RESUMATE_PROFILE_KEEP", "50"))
+
+_PROJECT_ROOT = str(BASE_DIR.parent)
+_MAX_DEPTH = 128
+_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(thread_name: str, frame: Optional[FrameType]) -> Optional[str]:
+    """
+    frame → "thread;root;...;leaf"。當成閒置、回 None 的情況：
+    整條 stack 都沒有本專案的程式碼，或最內層的專案程式碼正在 queue.get() 等工作（例如 encode 執行緒）。
+    """
+    labels: List[str] = []
+    ours = False
+    inner: Optional[FrameType] = None
+    while frame is not None and len(labels) < _MAX_DEPTH:
+        filename = frame.f_code.co_filename
+        if not ours and filename.startswith(_PROJECT_ROOT) and "site-packages" not in filename:
+            ours = True
+            if inner is not None and inner.f_code.co_name == "get" and inner.f_code.co_filename.endswith("queue.py"):
+                return None
+        labels.append(_frame_label(frame))
+        inner = frame
+        frame = frame.f_back
+    if not ours:
+        return None
+    labels.append(thread_name.replace(";", "_"))
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """有 session 時才跑的取樣執行緒；每次取樣的 stack 加進所有進行中的 session。"""
+
+    def __init__(self, interval_s: float = 0.005) -> None:
+        self.interval_s = max(0.001, float(interval_s))
+        self._sessions: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions[session_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="profile-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def end(self, session_id: str) -> Counter:
+        with self._lock:
+            return self._sessions.pop(session_id, Counter())
+
+    def _loop(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                active = bool(self._sessions)
+            if not active:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = []
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                collapsed = _collapse(names.get(tid, str(tid)), frame)
+                if collapsed is not None:
+                    stacks.append(collapsed)
+            with self._lock:
+                for counter in self._sessions.values():
+                    counter.update(stacks)
+            time.sleep(self.interval_s)
+
+
+class RequestProfiler:
+    """決定哪些請求要 profile、把結果寫進磁碟上的 ring、列出 / 讀取最近的 profile。"""
+
+    def __init__(
+        self,
+        *,
+        rate: float = 0.0,
+        slow_ms: float = 0.0,
+        paths: Tuple[str, ...] = ("/match",),
+        interval_s: float = 0.005,
+        out_dir: Path = PROFILE_DIR,
+        keep: int = 50,
+    ) -> None:
+        self.rate = max(0.0, min(1.0, float(rate)))
+        self.slow_ms = max(0.0, float(slow_ms))
+        self.paths = paths
+        self.out_dir = Path(out_dir)
+        self.keep = max(1, int(keep))
+        self.sampler = StackSampler(interval_s)
+        self._write_lock = threading.Lock()
+
+    def decide(self, path: str) -> Optional[str]:
+        """要 profile 的話回理由（"sampled" / "slow"，slow 要等結束才知道要不要留），不要回 None。"""
+        if not path.startswith(self.paths):
+            return None
+        if self.rate > 0 and random.random() < self.rate:
+            return "sampled"
+        if self.slow_ms > 0:
+            return "slow"
+        return None
+
+    def should_keep(self, reason: str, elapsed_ms: float) -> bool:
+        return reason == "sampled" or elapsed_ms >= self.slow_ms
+
+    @staticmethod
+    def new_profile_id() -> str:
+        """profile 的檔名一律由伺服器產生：client 沒辦法指定、覆蓋別的請求的 profile。"""
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def client_request_id(header_value: Optional[str]) -> Optional[str]:
+        """X-Request-ID（格式合法的話）只記進 metadata，方便跟 client 端的 log 對起來。"""
+        if header_value and _ID_RE.fullmatch(header_value):
+            return header_value
+        return None
+
+    # ---------- 磁碟 ring ----------
+    def store(self, profile_id: str, stacks: Counter, meta: Dict[str, Any]) -> None:
+        """阻塞（寫檔），在 thread pool 呼叫。"""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        folded = "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+        meta = {**meta, "id": profile_id, "samples": sum(stacks.values()), "created_at": time.time()}
+        with self._write_lock:
+            (self.out_dir / f"{profile_id}.folded").write_text(folded, encoding="utf-8")
+            (self.out_dir / f"{profile_id}.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        metas = sorted(self.out_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for old in metas[: max(0, len(metas) - self.keep)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".folded").unlink(missing_ok=True)
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """新的在前。"""
+        if not self.out_dir.exists():
+            return []
+        out = []
+        for p in sorted(self.out_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+            try:
+                out.append(json.loads(p.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        return out
+
+    def profile_path(self, profile_id: str) -> Optional[Path]:
+        if not _ID_RE.fullmatch(profile_id):
+            return None
+        path = self.out_dir / f"{profile_id}.folded"
+        return path if path.exists() else None
+
+
+_instance: Optional[RequestProfiler] = None
+_instance_lock = threading.Lock()
+
+
+def get_profiler() -> Optional[RequestProfiler]:
+    """RESUMATE_PROFILE_RATE 與 RESUMATE_PROFILE_SLOW_MS 都沒設時回 None（完全不掛 hook）。"""
+    global _instance
+    if PROFILE_RATE <= 0 and PROFILE_SLOW_MS <= 0:
+        return None
+    with _instance_lock:
+        if _instance is None:
+            _instance = RequestProfiler(
+                rate=PROFILE_RATE,
+                slow_ms=PROFILE_SLOW_MS,
+                paths=PROFILE_PATHS,
+                interval_s=PROFILE_INTERVAL_MS / 1000,
+                out_dir=PROFILE_DIR,
+                keep=PROFILE_KEEP,
+            )
+        return _instance
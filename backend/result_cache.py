@@ -0,0 +1,242 @@
+# backend/result_cache.py
+# -*- coding: utf-8 -*-
+"""
+/match 整個結果的快取（履歷內容 hash + filter → 排好的推薦清單）
+
+- 記憶體層：cachetools.TTLCache（TTL + LRU 淘汰），每個 worker 各一份
+- 磁碟層（選用）：SQLite，同一台機器上多個 uvicorn worker 共用命中
+- 失效：某組 (keyword, area, industry) 有新職缺寫進 job.db 時呼叫 invalidate_filter()；
+  磁碟層另外記每組 filter 的 generation，別的 worker / 排程器程序做的失效也看得到
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from backend.crawler.crawler_104 import SEARCH_CACHE_TTL
+
+__all__ = ["MatchResultCache", "get_result_cache"]
+
+
+def _filter_key(keyword: str, area: Optional[str], industry: Optional[str]) -> str:
+    return json.dumps([keyword, area, industry], ensure_ascii=False)
+
+
+class _EvictingTTLCache(TTLCache):
+    """TTLCache 因過期或 LRU 淘汰掉項目時呼叫 on_evict(key, value)（讓 _by_filter 同步刪掉 key）。"""
+
+    def __init__(self, maxsize: int, ttl: float, on_evict: Callable[[Any, Any], None]) -> None:
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self._on_evict = on_evict
+
+    def expire(self, time: Optional[float] = None) -> List[Tuple[Any, Any]]:
+        expired = super().expire(time)
+        for key, value in expired:
+            self._on_evict(key, value)
+        return expired
+
+    def popitem(self) -> Tuple[Any, Any]:
+        key, value = super().popitem()
+        self._on_evict(key, value)
+        return key, value
+
+
+class MatchResultCache:
+    def __init__(
+        self,
+        *,
+        ttl_s: float = 600.0,
+        max_entries: int = 1024,
+        disk_path: Optional[str | Path] = None,
+    ) -> None:
+        self.ttl_s = float(ttl_s)
+        self._lock = threading.Lock()
+        # 記憶體層的值 = (generation, filter key, ranked)；淘汰時用 filter key 把 key 從 _by_filter 拿掉
+        self._mem: TTLCache = _EvictingTTLCache(max(1, int(max_entries)), self.ttl_s, self._forget_locked)
+        self._by_filter: Dict[str, set] = {}   # filter → 記憶體層的 key（失效時用；跟 _mem 同步增減）
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._conn = sqlite3.connect(str(disk_path), timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS match_cache(
+                    key         TEXT PRIMARY KEY,
+                    filter_key  TEXT,
+                    generation  INTEGER,
+                    payload     BLOB,     -- zlib(JSON)
+                    stored_at   REAL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_match_cache_filter ON match_cache(filter_key)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS filter_generations(filter_key TEXT PRIMARY KEY, generation INTEGER)"
+            )
+            self._conn.commit()
+
+    # ---------- key ----------
+    @staticmethod
+    def make_key(resume_sha: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps([resume_sha, sorted(params.items())], ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _forget_locked(self, key: str, value: Tuple[int, str, List[Dict[str, Any]]]) -> None:
+        """_mem 淘汰掉 key 時呼叫（都在 self._lock 裡：_mem 只在持鎖時被改）。"""
+        keys = self._by_filter.get(value[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_filter[value[1]]
+
+    def _generation_locked(self, fkey: str) -> int:
+        if self._conn is None:
+            return 0
+        row = self._conn.execute(
+            "SELECT generation FROM filter_generations WHERE filter_key = ?", (fkey,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    # ---------- 對外 ----------
+    def get(
+        self,
+        resume_sha: str,
+        params: Dict[str, Any],
+        *,
+        keyword: str,
+        area: Optional[str],
+        industry: Optional[str],
+    ) -> Optional[List[Dict[str, Any]]]:
+        key = self.make_key(resume_sha, params)
+        fkey = _filter_key(keyword, area, industry)
+        with self._lock:
+            gen = self._generation_locked(fkey)
+            hit: Optional[Tuple[int, str, List[Dict[str, Any]]]] = self._mem.get(key)
+            if hit is not None and hit[0] == gen:
+                self._counters["hits"] += 1
+                return [dict(j) for j in hit[2]]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT generation, payload, stored_at FROM match_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] == gen and time.time() - row[2] < self.ttl_s:
+                    ranked = json.loads(zlib.decompress(row[1]).decode("utf-8"))
+                    self._mem[key] = (gen, fkey, ranked)
+                    self._by_filter.setdefault(fkey, set()).add(key)
+                    self._counters["disk_hits"] += 1
+                    return [dict(j) for j in ranked]
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(
+        self,
+        resume_sha: str,
+        params: Dict[str, Any],
+        ranked: List[Dict[str, Any]],
+        *,
+        keyword: str,
+        area: Optional[str],
+        industry: Optional[str],
+    ) -> None:
+        key = self.make_key(resume_sha, params)
+        fkey = _filter_key(keyword, area, industry)
+        ranked = [dict(j) for j in ranked]
+        with self._lock:
+            gen = self._generation_locked(fkey)
+            self._mem[key] = (gen, fkey, ranked)
+            self._by_filter.setdefault(fkey, set()).add(key)
+            self._counters["stores"] += 1
+            if self._conn is not None:
+                payload = zlib.compress(json.dumps(ranked, ensure_ascii=False).encode("utf-8"))
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO match_cache(key, filter_key, generation, payload, stored_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, fkey, gen, payload, time.time()),
+                    )
+                    # 順便清掉過期的
+                    self._conn.execute(
+                        "DELETE FROM match_cache WHERE stored_at < ?", (time.time() - self.ttl_s,)
+                    )
+
+    def invalidate_filter(self, keyword: str, area: Optional[str], industry: Optional[str]) -> None:
+        """這組 filter 有新職缺進 job.db：之前算好的結果全部作廢。"""
+        fkey = _filter_key(keyword, area, industry)
+        with self._lock:
+            self._counters["invalidations"] += 1
+            for key in self._by_filter.pop(fkey, ()):
+                self._mem.pop(key, None)
+            if self._conn is None:
+                return
+            with self._conn:
+                self._conn.execute(
+                    """
+                    INSERT INTO filter_generations(filter_key, generation) VALUES (?, 1)
+                    ON CONFLICT(filter_key) DO UPDATE SET generation = generation + 1
+                    """,
+                    (fkey,),
+                )
+                self._conn.execute("DELETE FROM match_cache WHERE filter_key = ?", (fkey,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._by_filter.clear()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM match_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["entries"] = len(self._mem)
+            out["disk"] = self._conn is not None
+        lookups = out["hits"] + out["disk_hits"] + out["misses"]
+        out["hit_ratio"] = (out["hits"] + out["disk_hits"]) / lookups if lookups else 0.0
+        out["ttl_s"] = self.ttl_s
+        return out
+
+
+# ---------------------------
+# 全程序共用的實例
+# ---------------------------
+# TTL 預設跟 104 清單的 HTTP 快取一樣：清單本身就只保證這麼新
+RESULT_CACHE_TTL_S = float(os.environ.get("RESUMATE_RESULT_CACHE_TTL_S", str(SEARCH_CACHE_TTL)))
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESUMATE_RESULT_CACHE_MAX_ENTRIES", "1024"))
+# 多個 uvicorn worker 共用時設成檔案路徑，例如 backend/result_cache.db；off = 只用記憶體
+RESULT_CACHE_DISK = os.environ.get("RESUMATE_RESULT_CACHE_DISK", "off")
+
+_instance: Optional[MatchResultCache] = None
+_instance_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[MatchResultCache]:
+    """RESUMATE_RESULT_CACHE_TTL_S=0 時關閉，回 None。"""
+    global _instance
+    if RESULT_CACHE_TTL_S <= 0:
+        return None
+    with _instance_lock:
+        if _instance is None:
+            disk = None if RESULT_CACHE_DISK.lower() in ("", "0", "off", "none") else RESULT_CACHE_DISK
+            try:
+                _instance = MatchResultCache(
+                    ttl_s=RESULT_CACHE_TTL_S, max_entries=RESULT_CACHE_MAX_ENTRIES, disk_path=disk
+                )
+            except sqlite3.Error as e:
+                print("[result_cache] disk tier disabled:", e)
+                _instance = MatchResultCache(ttl_s=RESULT_CACHE_TTL_S, max_entries=RESULT_CACHE_MAX_ENTRIES)
+        return _instance
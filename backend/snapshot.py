@@ -0,0 +1,454 @@
+# backend/snapshot.py
+# -*- coding: utf-8 -*-
+"""
+職缺語料快照：job.db → 依爬取日期 / 產業分區的 Arrow IPC 檔（可另存 Parquet），載入時 memory-map
+
+重建索引或跑實驗時不用再一列一列查 job.db：
+
+    python -m backend.snapshot export               # 向量只拿 embedding 快取裡已有的
+    python -m backend.snapshot export --encode      # 快取沒有的也 encode（會載模型）
+    python -m backend.snapshot export --parquet     # 另外寫一份 Parquet（給 pandas / DuckDB / Spark）
+    python -m backend.snapshot info                 # 開最新的快照，印列數、分區與開啟耗時
+
+目錄結構（hive 風格分區）：
+
+    backend/snapshots/
+        LATEST                                   # 最新快照的 id
+        20261018T031500Z/
+            manifest.json                        # 列數、分區清單、向量維度與模型名稱
+            crawl_date=2026-10-17/industry=1001001000/part-0.arrow
+            crawl_date=2026-10-17/industry=__HIVE_DEFAULT_PARTITION__/part-0.arrow   # 沒指定產業的爬取
+
+- Arrow IPC 檔不壓縮：open_snapshot() 用 pyarrow.memory_map 開，欄位 buffer 直接指到 mmap 的頁，
+  開檔只讀 footer 與 schema，不反序列化資料；同一台機器上多個 worker 開同一份快照共用 page cache
+- embedding 存成 FixedSizeList<float32> 欄，每個 record batch 的向量直接 view 成 (n, dim) 的
+  唯讀 numpy（不複製）；has_embedding 標示哪些列真的有向量（只拿快取時沒命中的列補 0）
+- industry 只記在分區路徑上（hive 慣例，檔案裡不重複存）；用 pyarrow.dataset 讀 Parquet 時
+  partitioning 要指定兩個 key 都是 string，不然產業代碼會被推成整數
+- Parquet 有編碼 / 壓縮，沒辦法零複製 mmap，只是給外部工具用的副本
+- 先寫在暫存資料夾，完成才 rename 並更新 LATEST；舊快照保留 RESUMATE_SNAPSHOT_KEEP 份
+  （已經 mmap 舊檔的程序不受刪檔影響）
+
+設定
+----
+RESUMATE_SNAPSHOT_DIR  : 快照根目錄（預設 backend/snapshots）
+RESUMATE_SNAPSHOT_KEEP : 保留幾份（預設 3）
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from backend.dataframe import JOB_COLUMNS, VECTOR_COLUMN, JobFrame, top_k_indices
+from backend.db import BASE_DIR, init_job_db, iter_job_corpus
+
+__all__ = ["JobSnapshot", "export_snapshot", "open_snapshot"]
+
+SNAPSHOT_DIR = Path(os.environ.get("RESUMATE_SNAPSHOT_DIR", str(BASE_DIR / "snapshots")))
+SNAPSHOT_KEEP = int(os.environ.get("RESUMATE_SNAPSHOT_KEEP", "3"))
+
+# hive 分區的 null 值（pyarrow.dataset / Spark 讀回來都是 null）
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+_LATEST = "LATEST"
+_MANIFEST = "manifest.json"
+_EXTRA_COLUMNS = ("area", "crawled_at")
+
+
+def _schema(dim: Optional[int]) -> pa.Schema:
+    """固定 schema：每個分區都一樣（整欄都是 None 的批次也不會被推成 null 型別）。"""
+    fields = [pa.field(c, pa.bool_() if c == "detail_fetched" else pa.string()) for c in JOB_COLUMNS]
+    fields += [pa.field(c, pa.string()) for c in _EXTRA_COLUMNS]
+    if dim:
+        fields += [
+            pa.field("has_embedding", pa.bool_()),
+            pa.field(VECTOR_COLUMN, pa.list_(pa.float32(), dim)),
+        ]
+    return pa.schema(fields)
+
+
+def _partition_dir(crawl_date: Optional[str], industry: Optional[str]) -> str:
+    parts = (("crawl_date", crawl_date), ("industry", industry))
+    return "/".join(f"{k}={quote(v, safe='') if v else NULL_PARTITION}" for k, v in parts)
+
+
+class _PartitionWriter:
+    """一個分區的寫入狀態：累積到 chunk_rows 才寫成一個 record batch（向量是一整段連續 buffer）。"""
+
+    def __init__(
+        self,
+        root: Path,
+        crawl_date: Optional[str],
+        industry: Optional[str],
+        schema: pa.Schema,
+        *,
+        parquet: bool,
+    ) -> None:
+        self.crawl_date = crawl_date
+        self.industry = industry
+        self.rel_dir = _partition_dir(crawl_date, industry)
+        self.rows = 0
+        self._pending: List[pa.Table] = []
+        self._pending_rows = 0
+
+        out = root / self.rel_dir
+        out.mkdir(parents=True, exist_ok=True)
+        self._sink = pa.OSFile(str(out / "part-0.arrow"), "wb")
+        self._writer = pa.ipc.new_file(self._sink, schema)
+        self._parquet = None
+        if parquet:
+            import pyarrow.parquet as pq
+
+            self._parquet = pq.ParquetWriter(str(out / "part-0.parquet"), schema, compression="zstd")
+
+    def add(self, table: pa.Table, chunk_rows: int) -> None:
+        self._pending.append(table)
+        self._pending_rows += table.num_rows
+        if self._pending_rows >= chunk_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending_rows:
+            return
+        table = pa.concat_tables(self._pending).combine_chunks()
+        for batch in table.to_batches():
+            self._writer.write_batch(batch)
+        if self._parquet is not None:
+            self._parquet.write_table(table)
+        self.rows += self._pending_rows
+        self._pending, self._pending_rows = [], 0
+
+    def close(self) -> Dict[str, Any]:
+        self.flush()
+        self._writer.close()
+        self._sink.close()
+        if self._parquet is not None:
+            self._parquet.close()
+        return {
+            "crawl_date": self.crawl_date,
+            "industry": self.industry,
+            "path": f"{self.rel_dir}/part-0.arrow",
+            "parquet": f"{self.rel_dir}/part-0.parquet" if self._parquet is not None else None,
+            "rows": self.rows,
+        }
+
+
+def _new_snapshot_id(root: Path) -> str:
+    base = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    snapshot_id, n = base, 1
+    while (root / snapshot_id).exists():
+        snapshot_id, n = f"{base}-{n}", n + 1
+    return snapshot_id
+
+
+def _prune(root: Path, keep: int, current: str) -> None:
+    done = sorted(p for p in root.iterdir() if (p / _MANIFEST).exists())
+    for old in done[: max(0, len(done) - max(1, keep))]:
+        if old.name != current:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def export_snapshot(
+    root: Path = SNAPSHOT_DIR,
+    *,
+    with_embeddings: bool = True,
+    encode_missing: bool = False,
+    parquet: bool = False,
+    batch_size: int = 2000,
+    chunk_rows: int = 65536,
+    keep: int = SNAPSHOT_KEEP,
+) -> Dict[str, Any]:
+    """
+    把整個 job.db 匯出成一份新快照，回傳 manifest（阻塞；給 CLI / 排程跑，不在 request 路徑上）。
+    with_embeddings=False 時不帶向量；encode_missing 見 matcher.snapshot_job_vectors。
+    """
+    model_name = None
+    if with_embeddings:
+        # 只有要向量時才 import（matcher 不會因此載模型，除非 encode_missing）
+        from backend.nlp import matcher
+
+        model_name = matcher.embedding_model_name()
+
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    snapshot_id = _new_snapshot_id(root)
+    tmp = root / f".tmp-{snapshot_id}"
+    tmp.mkdir()
+
+    t0 = time.perf_counter()
+    schema: Optional[pa.Schema] = None
+    dim: Optional[int] = None
+    writers: Dict[Tuple[Optional[str], Optional[str]], _PartitionWriter] = {}
+    partitions: List[Dict[str, Any]] = []
+    embedded = 0
+    try:
+        for batch in iter_job_corpus(batch_size=batch_size):
+            vecs, has = None, None
+            if with_embeddings:
+                vecs, has = matcher.snapshot_job_vectors(batch, encode_missing=encode_missing)
+            if schema is None:
+                # 第一批決定向量維度；只拿快取時取決於快取裡有沒有職缺向量
+                dim = int(vecs.shape[1]) if vecs is not None else None
+                schema = _schema(dim)
+
+            frame = JobFrame.from_records(batch)
+            if dim:
+                if vecs is None:
+                    vecs, has = np.zeros((len(batch), dim), dtype=np.float32), np.zeros(len(batch), dtype=bool)
+                frame.with_vectors(vecs)
+                frame.df["has_embedding"] = has
+                embedded += int(has.sum())
+            table = frame.to_arrow().select(schema.names).cast(schema)
+
+            # iter_job_corpus 依 crawled_at 排序 → 同一天的列是連續的，沒出現在這批的日期不會再來
+            groups: Dict[Tuple[Optional[str], Optional[str]], List[int]] = {}
+            for i, job in enumerate(batch):
+                key = ((job.get("crawled_at") or "")[:10] or None, job.get("industry") or None)
+                groups.setdefault(key, []).append(i)
+            dates = {k[0] for k in groups}
+            for key in [k for k in writers if k[0] not in dates]:
+                partitions.append(writers.pop(key).close())
+
+            for key, idx in groups.items():
+                writer = writers.get(key)
+                if writer is None:
+                    writer = writers[key] = _PartitionWriter(tmp, key[0], key[1], schema, parquet=parquet)
+                writer.add(table.take(pa.array(idx, type=pa.int64())), chunk_rows)
+
+        for writer in writers.values():
+            partitions.append(writer.close())
+        writers.clear()
+
+        partitions.sort(key=lambda p: (p["crawl_date"] or "", p["industry"] or ""))
+        manifest = {
+            "id": snapshot_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "rows": sum(p["rows"] for p in partitions),
+            "embedded_rows": embedded,
+            "embedding_dim": dim,
+            "model_name": model_name if dim else None,
+            "partitions": partitions,
+        }
+        (tmp / _MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.rename(root / snapshot_id)
+    except BaseException:
+        for writer in writers.values():
+            try:
+                writer.close()
+            except Exception:
+                pass
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    latest_tmp = root / f".{_LATEST}.tmp"
+    latest_tmp.write_text(snapshot_id, encoding="utf-8")
+    os.replace(latest_tmp, root / _LATEST)
+    _prune(root, keep, snapshot_id)
+
+    print(
+        f"[snapshot] {snapshot_id}: {manifest['rows']} jobs ({embedded} with embeddings) "
+        f"in {len(partitions)} partitions, {time.perf_counter() - t0:.1f}s"
+    )
+    return manifest
+
+
+# ---------------------------
+# 載入（memory-map）
+# ---------------------------
+class _Chunk(NamedTuple):
+    crawl_date: Optional[str]
+    industry: Optional[str]
+    batch: pa.RecordBatch
+    vectors: Optional[np.ndarray]        # (n, dim) float32，指向 mmap 的唯讀 view
+    has_embedding: Optional[np.ndarray]  # (n,) bool
+
+
+def _batch_vectors(batch: pa.RecordBatch) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    idx = batch.schema.get_field_index(VECTOR_COLUMN)
+    if idx < 0:
+        return None, None
+    col = batch.column(idx)
+    dim = col.type.list_size
+    values = col.values.slice(col.offset * dim, len(col) * dim)
+    vectors = values.to_numpy(zero_copy_only=True).reshape(-1, dim)
+    has = batch.column("has_embedding").to_numpy(zero_copy_only=False)
+    return vectors, has
+
+
+def _equals(column: pa.Array, value: str) -> np.ndarray:
+    return pc.fill_null(pc.equal(column, value), False).to_numpy(zero_copy_only=False)
+
+
+class JobSnapshot:
+    """open_snapshot() 的結果：各分區的 record batch（資料在 mmap 裡）與對應的向量 view。"""
+
+    def __init__(self, path: Path, manifest: Dict[str, Any], chunks: List[_Chunk]) -> None:
+        self.path = path
+        self.manifest = manifest
+        self._chunks = chunks
+
+    @property
+    def snapshot_id(self) -> str:
+        return self.manifest["id"]
+
+    @property
+    def model_name(self) -> Optional[str]:
+        return self.manifest.get("model_name")
+
+    @property
+    def embedding_dim(self) -> Optional[int]:
+        return self.manifest.get("embedding_dim")
+
+    def __len__(self) -> int:
+        return sum(c.batch.num_rows for c in self._chunks)
+
+    def partitions(self) -> List[Tuple[Optional[str], Optional[str], int]]:
+        """[(crawl_date, industry, 列數)]"""
+        out: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+        for c in self._chunks:
+            key = (c.crawl_date, c.industry)
+            out[key] = out.get(key, 0) + c.batch.num_rows
+        return [(d, i, n) for (d, i), n in out.items()]
+
+    def filter(
+        self,
+        *,
+        crawl_dates: Optional[Sequence[str]] = None,
+        industries: Optional[Sequence[Optional[str]]] = None,
+    ) -> "JobSnapshot":
+        """只留指定分區（整個分區略過，不掃資料）。"""
+        chunks = [
+            c
+            for c in self._chunks
+            if (crawl_dates is None or c.crawl_date in crawl_dates)
+            and (industries is None or c.industry in industries)
+        ]
+        return JobSnapshot(self.path, self.manifest, chunks)
+
+    def table(self, columns: Optional[Sequence[str]] = None) -> pa.Table:
+        """全部分區接成一個 pyarrow.Table（各 batch 變成 chunk，不複製）。"""
+        schema = self._chunks[0].batch.schema if self._chunks else _schema(self.embedding_dim)
+        table = pa.Table.from_batches([c.batch for c in self._chunks], schema=schema)
+        return table.select(list(columns)) if columns is not None else table
+
+    def iter_batches(self) -> Iterator[Tuple[pa.RecordBatch, Optional[np.ndarray]]]:
+        """逐個 record batch 給出 (batch, 向量 view)，給重建索引這類要掃全部向量的工作。"""
+        for c in self._chunks:
+            yield c.batch, c.vectors
+
+    def to_frame(self, columns: Optional[Sequence[str]] = None) -> JobFrame:
+        """轉成 JobFrame（文字欄會反序列化成 Python 物件，只適合篩過的小範圍）。"""
+        return JobFrame.from_arrow(self.table(columns))
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        *,
+        area: Optional[str] = None,
+        industry: Optional[str] = None,
+    ) -> JobFrame:
+        """
+        跟 query 向量內積最高的 k 筆（精確，各 batch 各自 matmul 再合併），回傳帶向量的 JobFrame。
+        industry 直接挑分區；area 用 arrow compute 在 mmap 的欄上比對；沒有向量的列不會被選到。
+        只有選中的 k 列會反序列化。
+        """
+        if not self.embedding_dim:
+            raise ValueError(f"snapshot {self.snapshot_id} has no embeddings")
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+
+        scores: List[np.ndarray] = []
+        refs: List[Tuple[int, np.ndarray]] = []
+        for ci, c in enumerate(self._chunks):
+            if industry is not None and c.industry != industry:
+                continue
+            sims = c.vectors @ q
+            valid = c.has_embedding if area is None else c.has_embedding & _equals(c.batch.column("area"), area)
+            if not valid.all():
+                sims = np.where(valid, sims, -np.inf)
+            idx = top_k_indices(sims, k)
+            idx = idx[np.isfinite(sims[idx])]
+            if len(idx):
+                scores.append(sims[idx])
+                refs.append((ci, idx))
+        if not scores:
+            return JobFrame.empty()
+
+        order = top_k_indices(np.concatenate(scores), k)
+        flat = [(ci, int(row)) for ci, idx in refs for row in idx]
+        picked = [self._chunks[flat[i][0]].batch.slice(flat[i][1], 1) for i in order]
+        return JobFrame.from_arrow(pa.Table.from_batches(picked))
+
+
+def open_snapshot(path: Optional[Path | str] = None, *, root: Path = SNAPSHOT_DIR) -> Optional[JobSnapshot]:
+    """path 不給時開 root/LATEST 指的那份；還沒有任何快照時回 None。"""
+    if path is None:
+        latest = Path(root) / _LATEST
+        if not latest.exists():
+            return None
+        path = Path(root) / latest.read_text(encoding="utf-8").strip()
+    path = Path(path)
+    manifest = json.loads((path / _MANIFEST).read_text(encoding="utf-8"))
+
+    chunks: List[_Chunk] = []
+    for part in manifest["partitions"]:
+        reader = pa.ipc.open_file(pa.memory_map(str(path / part["path"]), "r"))
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            vectors, has = _batch_vectors(batch)
+            chunks.append(_Chunk(part["crawl_date"], part["industry"], batch, vectors, has))
+    return JobSnapshot(path, manifest, chunks)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="ResuMate job corpus snapshots (Arrow IPC / Parquet)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="job.db → 新快照")
+    ex.add_argument("--out", default=str(SNAPSHOT_DIR), help="快照根目錄")
+    ex.add_argument("--no-embeddings", action="store_true", help="不帶向量")
+    ex.add_argument("--encode", action="store_true", help="embedding 快取沒有的職缺也 encode")
+    ex.add_argument("--parquet", action="store_true", help="另外寫一份 Parquet")
+    ex.add_argument("--chunk-rows", type=int, default=65536, help="每個 record batch 的列數")
+    ex.add_argument("--keep", type=int, default=SNAPSHOT_KEEP)
+    info = sub.add_parser("info", help="開啟快照並印出摘要")
+    info.add_argument("path", nargs="?", help="快照資料夾（預設 LATEST）")
+    info.add_argument("--root", default=str(SNAPSHOT_DIR))
+    args = ap.parse_args(argv)
+
+    if args.cmd == "export":
+        init_job_db()
+        export_snapshot(
+            Path(args.out),
+            with_embeddings=not args.no_embeddings,
+            encode_missing=args.encode,
+            parquet=args.parquet,
+            chunk_rows=args.chunk_rows,
+            keep=args.keep,
+        )
+        return
+
+    t0 = time.perf_counter()
+    snap = open_snapshot(args.path, root=Path(args.root))
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    if snap is None:
+        print("no snapshot yet (run: python -m backend.snapshot export)")
+        return
+    print(f"{snap.snapshot_id}: {len(snap)} jobs, dim={snap.embedding_dim}, model={snap.model_name}")
+    print(f"opened in {elapsed_ms:.1f} ms")
+    for crawl_date, industry, n in snap.partitions():
+        print(f"  crawl_date={crawl_date} industry={industry}: {n}")
+
+
+if __name__ == "__main__":
+    main()
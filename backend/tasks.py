@@ -0,0 +1,176 @@
+# backend/tasks.py
+# -*- coding: utf-8 -*-
+"""
+非同步媒合任務（POST /match/jobs → 輪詢 / 串流進度）
+
+- TaskManager 用固定大小的 thread pool 跑任務；進行中 + 排隊的任務數有上限，
+  滿了 submit() 直接丟 TaskQueueFull（API 回 429），不會無限堆執行緒 / 記憶體
+- MatchTask 記錄目前階段（queued → parsing → crawling → ranking → saving → done / error）、
+  進度計數（爬了幾頁、抓了幾個內頁、encode 了幾筆）與目前為止的暫定排名
+- 每次更新 version +1，串流端看 version 有沒有變決定要不要推新狀態
+- 結束超過 ttl_s 的任務在下次 submit 時清掉
+- 任務結束後 timings_ms 帶各階段耗時（同 /match 的 Server-Timing），給前端顯示明細
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.metrics import end_request_timing, start_request_timing, summarize_timings
+
+__all__ = ["MatchTask", "TaskManager", "TaskQueueFull"]
+
+FINAL_STAGES = ("done", "error")
+
+
+class TaskQueueFull(Exception):
+    """進行中 + 排隊的任務已達上限。"""
+
+
+@dataclass
+class MatchTask:
+    id: str
+    params: Dict[str, Any]
+    stage: str = "queued"
+    progress: Dict[str, int] = field(
+        default_factory=lambda: {"pages_crawled": 0, "details_fetched": 0, "jobs_seen": 0, "jobs_encoded": 0}
+    )
+    partial: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[List[Dict[str, Any]]] = None
+    error: Optional[str] = None
+    resume_id: Optional[int] = None
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    version: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in FINAL_STAGES
+
+    # ---------- 任務執行緒呼叫 ----------
+    def report(self, stage: Optional[str] = None, **counters: int) -> None:
+        """更新階段與進度計數（counters 的值是累計值，不是增量）。"""
+        with self._lock:
+            if stage is not None:
+                self.stage = stage
+            self.progress.update(counters)
+            self._touch()
+
+    def add(self, **deltas: int) -> None:
+        """進度計數加上增量。"""
+        with self._lock:
+            for k, v in deltas.items():
+                self.progress[k] = self.progress.get(k, 0) + v
+            self._touch()
+
+    def publish_partial(self, ranking: List[Dict[str, Any]]) -> None:
+        snapshot = [dict(j) for j in ranking]
+        with self._lock:
+            self.partial = snapshot
+            self._touch()
+
+    def _touch(self) -> None:
+        self.updated_at = time.time()
+        self.version += 1
+
+    # ---------- API 讀取 ----------
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {
+                "task_id": self.id,
+                "stage": self.stage,
+                "progress": dict(self.progress),
+                "resume_id": self.resume_id,
+                "version": self.version,
+                "elapsed_s": round((self.updated_at if self.finished else time.time()) - self.created_at, 3),
+            }
+            if self.stage == "done":
+                out["recommendations"] = self.result or []
+                out["timings_ms"] = dict(self.timings_ms)
+            elif self.stage == "error":
+                out["error"] = self.error
+                out["timings_ms"] = dict(self.timings_ms)
+            else:
+                out["partial"] = list(self.partial)
+            return out
+
+
+class TaskManager:
+    def __init__(self, *, workers: int = 4, max_pending: int = 16, ttl_s: float = 600.0) -> None:
+        self.workers = max(1, int(workers))
+        self.max_pending = max(0, int(max_pending))
+        self.ttl_s = float(ttl_s)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="match-task")
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, MatchTask] = {}
+        self._inflight = 0
+        self._counters = {"submitted": 0, "rejected": 0, "done": 0, "error": 0}
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_pending
+
+    def submit(self, fn: Callable[[MatchTask], List[Dict[str, Any]]], params: Dict[str, Any]) -> MatchTask:
+        """
+        fn(task) 在 worker 執行緒跑，回傳最終排名；執行中透過 task.report / publish_partial 回報進度。
+        滿載時丟 TaskQueueFull。
+        """
+        with self._lock:
+            self._expire_locked()
+            if self._inflight >= self.capacity:
+                self._counters["rejected"] += 1
+                raise TaskQueueFull(f"{self._inflight} tasks in flight (limit {self.capacity})")
+            task = MatchTask(id=uuid.uuid4().hex, params=params)
+            self._tasks[task.id] = task
+            self._inflight += 1
+            self._counters["submitted"] += 1
+        self._pool.submit(self._run, fn, task)
+        return task
+
+    def get(self, task_id: str) -> Optional[MatchTask]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "in_flight": self._inflight,
+                "capacity": self.capacity,
+                "workers": self.workers,
+                "retained": len(self._tasks),
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- 內部 ----------
+    def _run(self, fn: Callable[[MatchTask], List[Dict[str, Any]]], task: MatchTask) -> None:
+        token = start_request_timing()  # 任務執行緒自己收各階段耗時
+        try:
+            result = fn(task)
+        except Exception as e:
+            task.timings_ms = summarize_timings(end_request_timing(token))
+            task.error = getattr(e, "detail", None) or str(e) or e.__class__.__name__
+            task.report(stage="error")
+            outcome = "error"
+        else:
+            task.timings_ms = summarize_timings(end_request_timing(token))
+            task.result = result
+            task.report(stage="done")
+            outcome = "done"
+        with self._lock:
+            self._inflight -= 1
+            self._counters[outcome] += 1
+
+    def _expire_locked(self) -> None:
+        cutoff = time.time() - self.ttl_s
+        for tid in [t.id for t in self._tasks.values() if t.finished and t.updated_at < cutoff]:
+            del self._tasks[tid]
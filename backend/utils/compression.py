@@ -0,0 +1,136 @@
+# backend/utils/compression.py
+# -*- coding: utf-8 -*-
+"""
+職缺描述的壓縮格式（job.db 的 jobs.description 欄位）
+
+儲存格式：1 byte codec + 2 bytes 字典 id（big-endian，0 = 不用字典）+ 壓縮資料
+  codec 0x01 = zlib（標準庫，預設）
+  codec 0x02 = zstd（需要 pip install zstandard）
+
+- 舊資料是 TEXT，decompress() 收到 str 直接原樣回傳，新舊資料可以混存
+- 共用字典：104 的職缺描述有大量重複句型（「工作內容」「加分條件」「員工福利」…），
+  用一份共用字典壓短文字效果比單獨壓縮好很多；字典存在 job.db，這裡只負責用
+- build_zlib_dict()：從描述樣本挑出現最多次的句子拼成 zlib 預設字典（最多 32KB）
+"""
+
+from __future__ import annotations
+
+import re
+import struct
+import zlib
+from collections import Counter
+from typing import Callable, Iterable, Optional, Union
+
+try:
+    import zstandard
+except ImportError:  # zstd 是選用的，沒裝就只能用 zlib
+    zstandard = None
+
+__all__ = ["CODECS", "DescriptionCodec", "build_zlib_dict", "build_zstd_dict"]
+
+CODECS = {"zlib": 0x01, "zstd": 0x02}
+_HEADER = struct.Struct(">BH")
+_ZLIB_LEVEL = 6
+_ZSTD_LEVEL = 9
+_ZLIB_MAX_DICT = 32 * 1024   # zlib 只看得到字典最後 32KB
+
+# 切句子用：換行、中英文句號、分號
+_SENTENCE_RE = re.compile(r"[\n。；;]+")
+
+
+class DescriptionCodec:
+    """
+    codec：寫入時用的壓縮法（zlib / zstd）
+    dict_loader(dict_id) -> bytes：解壓時依 id 取回字典（由 db 層提供）
+    """
+
+    def __init__(
+        self,
+        codec: str = "zlib",
+        *,
+        dict_loader: Optional[Callable[[int], Optional[bytes]]] = None,
+    ) -> None:
+        if codec == "zstd" and zstandard is None:
+            print("[compression] zstandard 未安裝，改用 zlib")
+            codec = "zlib"
+        if codec not in CODECS:
+            raise ValueError(f"unknown codec {codec!r}; expected one of {sorted(CODECS)}")
+        self.codec = codec
+        self._dict_loader = dict_loader
+        self.dict_id = 0
+        self._dict: Optional[bytes] = None
+
+    def use_dict(self, dict_id: int, data: Optional[bytes]) -> None:
+        """之後寫入都用這份字典（dict_id=0 表示不用字典）。"""
+        self.dict_id = dict_id if data else 0
+        self._dict = data or None
+
+    def _load_dict(self, dict_id: int) -> bytes:
+        if dict_id == self.dict_id and self._dict is not None:
+            return self._dict
+        data = self._dict_loader(dict_id) if self._dict_loader else None
+        if not data:
+            raise ValueError(f"description dictionary {dict_id} not found")
+        return data
+
+    # ---------- 對外 ----------
+    def compress(self, text: Optional[str]) -> Optional[bytes]:
+        if text is None:
+            return None
+        raw = text.encode("utf-8")
+        if self.codec == "zstd":
+            zdict = zstandard.ZstdCompressionDict(self._dict) if self._dict else None
+            payload = zstandard.ZstdCompressor(level=_ZSTD_LEVEL, dict_data=zdict).compress(raw)
+        elif self._dict:
+            c = zlib.compressobj(_ZLIB_LEVEL, zdict=self._dict)
+            payload = c.compress(raw) + c.flush()
+        else:
+            payload = zlib.compress(raw, _ZLIB_LEVEL)
+        return _HEADER.pack(CODECS[self.codec], self.dict_id) + payload
+
+    def decompress(self, value: Union[bytes, str, None]) -> Optional[str]:
+        if value is None or isinstance(value, str):
+            return value
+        codec, dict_id = _HEADER.unpack_from(value)
+        payload = memoryview(value)[_HEADER.size :]
+        zdict = self._load_dict(dict_id) if dict_id else None
+        if codec == CODECS["zlib"]:
+            d = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+            raw = d.decompress(payload) + d.flush()
+        elif codec == CODECS["zstd"]:
+            if zstandard is None:
+                raise RuntimeError("這筆描述用 zstd 壓縮，需要 pip install zstandard 才能讀")
+            dict_data = zstandard.ZstdCompressionDict(zdict) if zdict else None
+            raw = zstandard.ZstdDecompressor(dict_data=dict_data).decompressobj().decompress(bytes(payload))
+        else:
+            raise ValueError(f"unknown description codec 0x{codec:02x}")
+        return raw.decode("utf-8")
+
+
+def build_zlib_dict(samples: Iterable[str], size: int = _ZLIB_MAX_DICT) -> bytes:
+    """
+    出現越多次的句子放越後面（zlib 對字典尾端的距離最短），
+    只收出現 2 次以上的句子，總長不超過 size。
+    """
+    counts: Counter = Counter()
+    for text in samples:
+        counts.update(s.strip() for s in _SENTENCE_RE.split(text or "") if len(s.strip()) > 3)
+
+    picked = []
+    total = 0
+    for sentence, n in counts.most_common():
+        if n < 2:
+            break
+        chunk = (sentence + "\n").encode("utf-8")
+        if total + len(chunk) > size:
+            continue
+        picked.append(chunk)
+        total += len(chunk)
+    return b"".join(reversed(picked))
+
+
+def build_zstd_dict(samples: Iterable[str], size: int = 64 * 1024) -> bytes:
+    if zstandard is None:
+        raise RuntimeError("build_zstd_dict 需要 pip install zstandard")
+    data = [s.encode("utf-8") for s in samples if s]
+    return zstandard.train_dictionary(size, data).as_bytes()
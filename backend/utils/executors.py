@@ -0,0 +1,80 @@
+# backend/utils/executors.py
+# -*- coding: utf-8 -*-
+"""
+把阻塞的工作移出 event loop
+
+- run_io()：爬蟲（requests + 限流 sleep）、sqlite、encode 這類會放掉 GIL / 在等 I/O 的工作，
+  丟到共用的 thread pool（RESUMATE_IO_WORKERS，預設 16）
+- run_cpu()：純 Python 的 CPU 工作（pdfminer / docx 解析），丟到有上限的 process pool
+  （RESUMATE_PARSE_WORKERS，預設 min(2, CPU 數)；設 0 改用 thread pool）；
+  用 spawn 啟動子程序，不會把已載入的 torch / 模型 fork 過去
+- encode 不進 process pool：模型只在主程序載一份，torch 計算時本來就會放掉 GIL，
+  再加上 EncodeBatcher 的專用執行緒，不會卡住 event loop
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar
+
+__all__ = ["run_io", "run_cpu", "io_pool", "cpu_pool", "shutdown_pools"]
+
+T = TypeVar("T")
+
+IO_WORKERS = int(os.environ.get("RESUMATE_IO_WORKERS", "16"))
+PARSE_WORKERS = int(os.environ.get("RESUMATE_PARSE_WORKERS", str(min(2, os.cpu_count() or 1))))
+
+_lock = threading.Lock()
+_io_pool: Optional[ThreadPoolExecutor] = None
+_cpu_pool: Optional[Executor] = None
+
+
+def io_pool() -> ThreadPoolExecutor:
+    global _io_pool
+    if _io_pool is None:
+        with _lock:
+            if _io_pool is None:
+                _io_pool = ThreadPoolExecutor(max_workers=max(1, IO_WORKERS), thread_name_prefix="resumate-io")
+    return _io_pool
+
+
+def cpu_pool() -> Executor:
+    global _cpu_pool
+    if _cpu_pool is None:
+        with _lock:
+            if _cpu_pool is None:
+                if PARSE_WORKERS > 0:
+                    _cpu_pool = ProcessPoolExecutor(
+                        max_workers=PARSE_WORKERS, mp_context=mp.get_context("spawn")
+                    )
+                else:
+                    _cpu_pool = io_pool()
+    return _cpu_pool
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """帶著呼叫端的 contextvars 跑（同 asyncio.to_thread），metrics 的 Server-Timing 才記得到。"""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(io_pool(), partial(ctx.run, fn, *args, **kwargs))
+
+
+async def run_cpu(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """fn 與參數都要能 pickle（模組層級函式）。"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_pool(), partial(fn, *args, **kwargs))
+
+
+def shutdown_pools() -> None:
+    global _io_pool, _cpu_pool
+    with _lock:
+        for pool in (_cpu_pool, _io_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        _io_pool = _cpu_pool = None
@@ -1,7 +1,7 @@
 # backend/utils/parser.py
 from __future__ import annotations
 from fastapi import UploadFile
-import io, os, tempfile
+import hashlib, io, os, tempfile
 
 # txt/docx
 try:
@@ -54,15 +54,31 @@ def _pdf_text_pypdf2(raw: bytes) -> str:
         return ""
 
 
-def extract_text_from_resume(file: UploadFile) -> str:
+def read_upload(file: UploadFile) -> bytes:
+    """把上傳檔案整份讀成 bytes（讀完指標移回開頭）。"""
+    file.file.seek(0)
+    raw = file.file.read()
+    file.file.seek(0)
+    return raw
+
+
+def resume_sha256(raw: bytes) -> str:
+    """上傳檔案內容的 SHA-256，當解析快取 / 履歷身分的 key。"""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def needs_extraction(filename: str) -> bool:
+    """pdf / docx 要跑解析器（CPU 重）；其他格式直接 decode。"""
+    return _ext(filename) in (".pdf", ".docx")
+
+
+def extract_text_from_bytes(raw: bytes, filename: str) -> str:
     """
     支援 txt / docx / pdf（pdf 先用 pdfminer，再退回 PyPDF2）。
     任一流程失敗都回空字串（不拋例外）。
     """
     try:
-        file.file.seek(0) #把檔案指標移回開頭
-        raw = file.file.read() #一次把整份檔案讀進 bytes
-        ext = _ext(file.filename or "") #決定他是 .txt / .docx / .pdf / 其他
+        ext = _ext(filename or "") #決定他是 .txt / .docx / .pdf / 其他
 
         # txt
         if ext == ".txt":
@@ -93,4 +109,10 @@ def extract_text_from_resume(file: UploadFile) -> str:
         return ""
 
 
-
+def extract_text_from_resume(file: UploadFile) -> str:
+    """同 extract_text_from_bytes，直接吃 UploadFile。"""
+    try:
+        raw = read_upload(file) #一次把整份檔案讀進 bytes
+    except Exception:
+        return ""
+    return extract_text_from_bytes(raw, file.filename or "")
@@ -0,0 +1,295 @@
+# backend/utils/scheduler.py
+# -*- coding: utf-8 -*-
+"""
+背景預爬排程器
+
+定期把熱門的 (keyword, area, industry) 組合爬進 job.db，
+讓 /match 可以直接用本地語料（見 db.load_crawled_jobs），不必在 request 裡即時爬取。
+
+用法
+----
+- 跟 API 同一個程序：設定 RESUMATE_SCHEDULER=1，FastAPI startup 時會自動啟動
+- 獨立 worker：
+      python -m backend.utils.scheduler            # 持續執行
+      python -m backend.utils.scheduler --once     # 每個組合各爬一次就結束
+
+設定
+----
+RESUMATE_SCHEDULER_TARGETS : JSON 檔路徑，內容為 list，每筆例如
+    {"keyword": "資料分析", "area_key": "台北市", "industry_key": null,
+     "pages": 2, "interval_s": 1800}
+    area_key / industry_key 用 config.AREA_MAP / INDUSTRY_MAP 的 key
+RESUMATE_SCHEDULER_CONCURRENCY : 同時爬幾個組合（預設 2）
+RESUMATE_SCHEDULER_JITTER      : 間隔隨機抖動比例（預設 0.2 → ±20%）
+
+每次執行的統計（jobs_seen / new_jobs / duration_s / errors）寫進 job.db 的 crawl_runs。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from backend.config import AREA_MAP, INDUSTRY_MAP
+from backend.crawler.crawler_104 import iter_jobs_data
+from backend.db import init_all_dbs, save_crawl_run, upsert_jobs
+from backend.nlp.matcher import notify_corpus_changed
+from backend.result_cache import get_result_cache
+
+__all__ = ["CrawlTarget", "PreCrawlScheduler", "default_targets", "load_targets"]
+
+DEFAULT_INTERVAL_S = 1800.0
+DEFAULT_CONCURRENCY = int(os.environ.get("RESUMATE_SCHEDULER_CONCURRENCY", "2"))
+DEFAULT_JITTER = float(os.environ.get("RESUMATE_SCHEDULER_JITTER", "0.2"))
+
+# 沒有設定檔時預設預爬的熱門關鍵字 × 地區
+_POPULAR_KEYWORDS = ("資料分析", "軟體工程師", "產品經理", "行銷企劃")
+_POPULAR_AREAS = ("台北市", "新北市", "台中市", "高雄市")
+
+
+@dataclass
+class CrawlTarget:
+    keyword: str
+    area_key: Optional[str] = None
+    industry_key: Optional[str] = None
+    pages: int = 2
+    interval_s: float = DEFAULT_INTERVAL_S
+    next_run: float = field(default=0.0, compare=False)
+
+    @property
+    def area(self) -> Optional[str]:
+        return AREA_MAP.get(self.area_key) if self.area_key else None
+
+    @property
+    def industry(self) -> Optional[str]:
+        return INDUSTRY_MAP.get(self.industry_key) if self.industry_key else None
+
+    @property
+    def key(self) -> tuple:
+        return (self.keyword, self.area, self.industry, self.pages)
+
+
+def default_targets() -> List[CrawlTarget]:
+    return [CrawlTarget(keyword=k, area_key=a) for k in _POPULAR_KEYWORDS for a in _POPULAR_AREAS]
+
+
+def load_targets(path: Optional[str] = None) -> List[CrawlTarget]:
+    """從 JSON 設定檔讀預爬組合；沒給路徑就用預設熱門組合。"""
+    path = path or os.environ.get("RESUMATE_SCHEDULER_TARGETS")
+    if not path:
+        return default_targets()
+
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+
+    targets: List[CrawlTarget] = []
+    for item in raw:
+        t = CrawlTarget(
+            keyword=item["keyword"],
+            area_key=item.get("area_key"),
+            industry_key=item.get("industry_key"),
+            pages=int(item.get("pages", 2)),
+            interval_s=float(item.get("interval_s", DEFAULT_INTERVAL_S)),
+        )
+        if t.area_key and t.area is None:
+            print(f"[scheduler] unknown area_key {t.area_key!r}, skipped")
+            continue
+        if t.industry_key and t.industry is None:
+            print(f"[scheduler] unknown industry_key {t.industry_key!r}, skipped")
+            continue
+        targets.append(t)
+    return targets
+
+
+class PreCrawlScheduler:
+    """
+    每個 target 有自己的間隔，排程時加上 ±jitter 的隨機抖動，避免一起打 104；
+    同時最多 concurrency 個 target 在爬，同一個 target 不會重疊執行。
+    """
+
+    def __init__(
+        self,
+        targets: Optional[List[CrawlTarget]] = None,
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        jitter: float = DEFAULT_JITTER,
+    ) -> None:
+        self.targets = targets if targets is not None else load_targets()
+        self.concurrency = max(1, int(concurrency))
+        self.jitter = max(0.0, float(jitter))
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._running: set = set()
+        self._lock = threading.Lock()
+        self.recent_runs: Deque[Dict[str, Any]] = deque(maxlen=200)
+
+    # ---------- 排程 ----------
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+    def run_target(self, target: CrawlTarget) -> Dict[str, Any]:
+        """爬一個組合、寫進 job.db，並記錄這次的統計。"""
+        started = time.perf_counter()
+        started_at = datetime.utcnow().isoformat()
+        jobs: List[Dict[str, Any]] = []
+        page_counts: List[int] = []  # 每頁各有幾個 job_no，給 load_crawled_jobs 切頁
+        new_jobs = 0
+        updated_jobs = 0
+        errors = 0
+        error_msg: Optional[str] = None
+
+        try:
+            # on_page 在該頁的職缺 yield 之前呼叫；爬到一半失敗就跟以前一樣當作沒爬到
+            crawled: List[Dict[str, Any]] = []
+            for j in iter_jobs_data(
+                keyword=target.keyword,
+                pages=target.pages,
+                area=target.area,
+                industry=target.industry,
+                fetch_detail=True,
+                on_page=lambda p, n: page_counts.append(0),
+            ):
+                crawled.append(j)
+                if j.get("job_no"):
+                    page_counts[-1] += 1
+            jobs = crawled
+            counts = upsert_jobs(
+                jobs, keyword=target.keyword, area=target.area, industry=target.industry
+            )
+            new_jobs, updated_jobs = counts["inserted"], counts["updated"]
+            # 排程器多半是獨立程序：只有開了 RESUMATE_RESULT_CACHE_DISK 的磁碟層，API 那邊才看得到這次失效
+            cache = get_result_cache()
+            if new_jobs or updated_jobs:
+                if cache is not None:
+                    cache.invalidate_filter(target.keyword, target.area, target.industry)
+                # 跟 API 同一個程序時，整庫索引在背景補上這次的職缺（獨立程序時 API 那邊會定期自己補）
+                notify_corpus_changed()
+        except Exception as e:
+            errors += 1
+            error_msg = str(e)
+            print(f"[scheduler] {target.keyword}/{target.area_key}/{target.industry_key} error:", e)
+
+        stats = {
+            "keyword": target.keyword,
+            "area": target.area,
+            "industry": target.industry,
+            "pages": target.pages,
+            "started_at": started_at,
+            "duration_s": round(time.perf_counter() - started, 3),
+            "jobs_seen": len(jobs),
+            "new_jobs": new_jobs,
+            "errors": errors,
+            "error_msg": error_msg,
+        }
+        try:
+            save_crawl_run(
+                job_nos=[j["job_no"] for j in jobs if j.get("job_no")], page_counts=page_counts, **stats
+            )
+        except Exception as e:
+            print("[scheduler] save_crawl_run error:", e)
+        self.recent_runs.append(stats)
+        print(
+            f"[scheduler] {target.keyword}/{target.area_key}/{target.industry_key}: "
+            f"seen={stats['jobs_seen']} new={new_jobs} updated={updated_jobs} {stats['duration_s']}s"
+        )
+        return stats
+
+    def _run_and_reschedule(self, target: CrawlTarget) -> None:
+        try:
+            self.run_target(target)
+        finally:
+            target.next_run = time.time() + self._jittered(target.interval_s)
+            with self._lock:
+                self._running.discard(target.key)
+
+    def _loop(self) -> None:
+        now = time.time()
+        # 第一輪也錯開，避免啟動時所有組合同時開爬
+        for t in self.targets:
+            t.next_run = now + random.uniform(0.0, self.jitter * t.interval_s)
+
+        while not self._stop.is_set():
+            now = time.time()
+            for t in self.targets:
+                if t.next_run > now:
+                    continue
+                with self._lock:
+                    # stop() 已經開始：pool 可能已經關掉或拿掉，直接結束迴圈
+                    if self._stop.is_set() or self._pool is None:
+                        return
+                    if t.key in self._running or len(self._running) >= self.concurrency:
+                        continue
+                    self._running.add(t.key)
+                    try:
+                        self._pool.submit(self._run_and_reschedule, t)
+                    except RuntimeError:  # executor 已 shutdown
+                        self._running.discard(t.key)
+                        return
+
+            with self._lock:
+                idle = [t.next_run for t in self.targets if t.key not in self._running]
+            wait = min(idle) - time.time() if idle else 1.0
+            self._stop.wait(min(max(wait, 0.5), 30.0))
+
+    # ---------- 生命週期 ----------
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="precrawl")
+        self._thread = threading.Thread(target=self._loop, name="precrawl-scheduler", daemon=True)
+        self._thread.start()
+        print(f"[scheduler] started: {len(self.targets)} targets, concurrency={self.concurrency}")
+
+    def stop(self, wait: bool = False) -> None:
+        """先等排程迴圈結束（它在 _stop.wait 上，會馬上醒來）再關 pool；wait=True 時也等進行中的爬取。"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._thread = None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def run_once(self) -> List[Dict[str, Any]]:
+        """每個組合各爬一次（仍受 concurrency 限制），回傳各次統計。"""
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="precrawl") as pool:
+            return list(pool.map(self.run_target, self.targets))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="ResuMate 104 pre-crawl worker")
+    ap.add_argument("--targets", help="JSON 設定檔（預設讀 RESUMATE_SCHEDULER_TARGETS）")
+    ap.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    ap.add_argument("--once", action="store_true", help="每個組合只爬一次")
+    args = ap.parse_args(argv)
+
+    init_all_dbs()
+    sched = PreCrawlScheduler(load_targets(args.targets), concurrency=args.concurrency)
+    if args.once:
+        sched.run_once()
+        return
+
+    sched.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        sched.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# bench/bench_batcher.py
+# -*- coding: utf-8 -*-
+"""
+比較「每個 request 各自 encode」與「EncodeBatcher 合併 micro-batch」在併發下的表現
+
+    python -m bench.bench_batcher --clients 16 --requests 20 --texts 21
+
+每個 client 模擬一個 /match：連續送出 requests 次 encode（每次 texts 句），
+回報 sentences/sec 與每次 encode 的 p50 / p99 延遲。
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from backend.nlp.batcher import EncodeBatcher
+from backend.nlp.encoders import DEFAULT_MODEL_NAME, PARITY_SAMPLE, load_encoder
+
+
+def _drive(encode: Callable[[List[str]], np.ndarray], clients: int, requests: int, texts: int) -> Dict[str, float]:
+    sample = [PARITY_SAMPLE[i % len(PARITY_SAMPLE)] for i in range(texts)]
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def client() -> None:
+        mine = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            encode(sample)
+            mine.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(mine)
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    lat = np.asarray(latencies) * 1000
+    return {
+        "sentences_per_s": round(clients * requests * texts / elapsed, 1),
+        "p50_ms": round(float(np.percentile(lat, 50)), 1),
+        "p99_ms": round(float(np.percentile(lat, 99)), 1),
+    }
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="encode micro-batching benchmark")
+    ap.add_argument("--backend", default="torch")
+    ap.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=20)
+    ap.add_argument("--texts", type=int, default=21, help="每次 encode 幾句（1 份履歷 + 20 個職缺）")
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = ap.parse_args(argv)
+
+    enc = load_encoder(args.backend, args.model)
+    enc.encode(["warm up"])
+
+    direct = _drive(enc.encode, args.clients, args.requests, args.texts)
+    batcher = EncodeBatcher(enc.encode, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+    batched = _drive(batcher.encode, args.clients, args.requests, args.texts)
+    batcher.stop()
+
+    print(f"{'mode':<10}{'sent/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, r in (("direct", direct), ("batched", batched)):
+        print(f"{name:<10}{r['sentences_per_s']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}")
+    print("batcher stats:", batcher.stats())
+
+
+if __name__ == "__main__":
+    main()
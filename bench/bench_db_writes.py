@@ -0,0 +1,114 @@
+# bench/bench_db_writes.py
+# -*- coding: utf-8 -*-
+"""
+job.db / match.db 批次寫入的 rows/sec
+
+    python -m bench.bench_db_writes --rows 10000 --changed 0.1
+
+在暫存資料夾建新的 DB（不會動到 backend/ 底下的正式檔案），依序量：
+  legacy     舊版逐列 INSERT OR IGNORE（對照組）
+  insert     upsert_jobs 第一次寫入（全部新增）
+  unchanged  同一批再寫一次（全部 hash 相同，不寫入）
+  changed    其中 --changed 比例的職缺改薪資 / 更新日期後再寫
+  matches    save_match_results_bulk 寫 rows 筆媒合結果
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from backend import db
+
+
+def _jobs(n: int, prefix: str = "b") -> List[Dict[str, Any]]:
+    return [
+        {
+            "job_no": f"{prefix}{i}",
+            "job_title": f"資料工程師 {i}",
+            "company": f"公司 {i % 500}",
+            "location": "台北市",
+            "salary": "月薪 50,000~70,000 元",
+            "update_date": "2025/01/01",
+            "job_url": f"https://www.104.com.tw/job/{prefix}{i}",
+            "description": f"負責資料管線與 ETL，熟悉 Python / SQL。職缺編號 {i}" * 4,
+            "condition": {"edu": "大學", "skills": ["python", "sql"]},
+            "detail_fetched": True,
+        }
+        for i in range(n)
+    ]
+
+
+def _legacy_save_jobs(jobs: List[Dict[str, Any]], keyword: str) -> None:
+    """upsert 之前的寫法：一列一個 execute。"""
+    conn = db.get_job_conn()
+    now = datetime.utcnow().isoformat()
+    for j in jobs:
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO jobs(
+                job_no, job_title, company, location, salary, update_date, job_url,
+                keyword, area, industry, condition_json, crawled_at, description
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                j["job_no"], j["job_title"], j["company"], j["location"], j["salary"],
+                j["update_date"], j["job_url"], keyword, None, None,
+                json.dumps(j["condition"], ensure_ascii=False), now, j["description"],
+            ),
+        )
+    conn.commit()
+
+
+def _timed(fn, n: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    return {"seconds": round(elapsed, 3), "rows_per_s": round(n / elapsed, 1), "result": out}
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="job.db / match.db write benchmark")
+    ap.add_argument("--rows", type=int, default=10_000)
+    ap.add_argument("--changed", type=float, default=0.1, help="changed 階段改動的比例")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        db.RESUME_DB_PATH = tmp_dir / "resume.db"
+        db.JOB_DB_PATH = tmp_dir / "job.db"
+        db.MATCH_DB_PATH = tmp_dir / "match.db"
+        db.init_all_dbs()
+
+        n = args.rows
+        results: Dict[str, Dict[str, Any]] = {}
+        results["legacy"] = _timed(lambda: _legacy_save_jobs(_jobs(n, "legacy"), "bench"), n)
+
+        jobs = _jobs(n)
+        upsert = lambda: db.upsert_jobs(jobs, keyword="bench", area=None, industry=None)  # noqa: E731
+        results["insert"] = _timed(upsert, n)
+        results["unchanged"] = _timed(upsert, n)
+
+        step = max(1, int(1 / args.changed)) if args.changed > 0 else n + 1
+        for j in jobs[::step]:
+            j["salary"] = "月薪 60,000~80,000 元"
+            j["update_date"] = "2025/02/01"
+        results["changed"] = _timed(upsert, n)
+
+        ranked = [{**j, "score": 0.5} for j in jobs]
+        results["matches"] = _timed(lambda: db.save_match_results_bulk([(1, ranked)]), n)
+
+        db.close_thread_connections()
+
+    print(f"{'stage':<12}{'rows/s':>12}{'seconds':>10}  result")
+    for stage, r in results.items():
+        print(f"{stage:<12}{r['rows_per_s']:>12}{r['seconds']:>10}  {r['result'] if r['result'] is not None else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+# bench/bench_e2e.py
+# -*- coding: utf-8 -*-
+"""
+可重現的端到端 benchmark：不連真的 104，改打本機的假 104（bench/mock_104.py）
+
+    python -m bench.bench_e2e --concurrency 1 4 8 --ops 40 --json runs/after.json
+    python -m bench.bench_e2e --stages crawl match --error-rate 0.05 --compare runs/before.json
+
+每個 stage 在每個並行度下跑 --ops 次，回報 p50 / p95 / p99 延遲與 throughput（ops/s）：
+  parse     履歷擷取文字（txt + 由測試履歷產生的 docx）
+  crawl     get_jobs_data（--pages 頁 + 全部內頁，不沿用 job.db）
+  encode    encode 一頁（20 筆）職缺描述
+  score     一份履歷對 --pages 頁職缺算分排序
+  db_write  upsert 一頁職缺到 job.db + 存媒合結果到 match.db
+  match     完整的 POST /match（另開 uvicorn 子程序；--api-url 可改打已啟動的服務）
+
+為了量到真的工作量：HTTP 回應快取、embedding 快取、/match 結果快取、爬取合併都關掉，
+限流調到 --rate-limit；三個 DB 放在暫存資料夾（RESUMATE_DB_DIR），不會動到 repo 的 .db。
+履歷語料：data/ 下的測試履歷（空檔略過），依 --seed 打亂段落產生 --resumes 份不同內容。
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+import numpy as np
+import requests
+
+from bench.mock_104 import add_mock_args, mock_from_args, start_mock_server
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / "data"
+STAGES = ("parse", "crawl", "encode", "score", "db_write", "match")
+
+
+# ---------------------------
+# 量測
+# ---------------------------
+def _percentiles(lat_s: List[float]) -> Dict[str, float]:
+    if not lat_s:
+        return {"n": 0}
+    ms = np.asarray(lat_s) * 1000
+    return {
+        "n": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+def _measure(op: Callable[[int], None], ops: int, concurrency: int) -> Dict[str, Any]:
+    """op(i) 跑 ops 次、最多 concurrency 個同時跑；失敗的不算進延遲，另外計數。"""
+    lat: List[float] = []
+    errors = 0
+
+    def _one(i: int) -> Optional[float]:
+        t0 = time.perf_counter()
+        try:
+            op(i)
+        except Exception as e:
+            print(f"[bench_e2e] op {i} error: {e}")
+            return None
+        return time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for dt in pool.map(_one, range(ops)):
+            if dt is None:
+                errors += 1
+            else:
+                lat.append(dt)
+    wall = time.perf_counter() - t0
+    return {
+        **_percentiles(lat),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_ops_s": round(len(lat) / wall, 2) if wall > 0 else 0.0,
+    }
+
+
+# ---------------------------
+# 履歷語料
+# ---------------------------
+def _make_docx(text: str) -> bytes:
+    """最小的 .docx（只有 document.xml），給 parse stage 量 docx 擷取。"""
+    paras = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(ln)}</w:t></w:r></w:p>" for ln in text.splitlines())
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{paras}</w:body></w:document>"
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        "</Types>"
+    )
+    rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="word/document.xml"/></Relationships>'
+    )
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", content_types)
+        z.writestr("_rels/.rels", rels)
+        z.writestr("word/document.xml", document)
+    return buf.getvalue()
+
+
+def _resume_corpus(n: int, seed: int) -> List[Tuple[str, bytes, str]]:
+    """[(檔名, 原始 bytes, 文字)]，txt / docx 交錯；內容是測試履歷打亂段落，每份 sha 都不同。"""
+    bases = [
+        p.read_text(encoding="utf-8", errors="ignore")
+        for p in (DATA_DIR / "test_resume.txt", DATA_DIR / "sample_resume")
+        if p.is_file() and p.stat().st_size > 0
+    ]
+    if not bases:
+        raise SystemExit(f"no resumes under {DATA_DIR}")
+    rng = random.Random(seed)
+    out: List[Tuple[str, bytes, str]] = []
+    for i in range(n):
+        lines = [ln for ln in bases[i % len(bases)].splitlines() if ln.strip()]
+        if i:
+            rng.shuffle(lines)
+        text = "\n".join(lines + [f"# variant {i}"])
+        if i % 2:
+            out.append((f"resume_{i}.docx", _make_docx(text), text))
+        else:
+            out.append((f"resume_{i}.txt", text.encode("utf-8"), text))
+    return out
+
+
+# ---------------------------
+# 環境
+# ---------------------------
+def _bench_env(args: argparse.Namespace, mock_url: str, db_dir: str) -> Dict[str, str]:
+    return {
+        "RESUMATE_104_BASE_URL": mock_url,
+        "RESUMATE_RATE_LIMIT_PER_SEC": str(args.rate_limit),
+        "RESUMATE_RATE_LIMIT_BURST": str(max(1, int(args.rate_limit))),
+        "RESUMATE_DB_DIR": db_dir,
+        "RESUMATE_HTTP_CACHE": "off",
+        "RESUMATE_EMBED_CACHE": "off",
+        "RESUMATE_RESULT_CACHE_TTL_S": "0",
+        "RESUMATE_CRAWL_COALESCE_TTL_S": "0",
+        "RESUMATE_MODEL_WARMUP": "sync",
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_api(env: Dict[str, str], timeout_s: float = 300.0) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=str(ROOT),
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"uvicorn exited with {proc.returncode}")
+        try:
+            if requests.get(f"{url}/ready", timeout=2).status_code == 200:
+                return proc, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise SystemExit("API did not become ready in time")
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ---------------------------
+# 各 stage
+# ---------------------------
+def _stage_ops(
+    args: argparse.Namespace, resumes: List[Tuple[str, bytes, str]], api_url: Optional[str]
+) -> Dict[str, Callable[[int], None]]:
+    """backend 要在環境變數設好之後才 import。"""
+    from backend.crawler.crawler_104 import get_jobs_data
+    from backend.db import init_all_dbs, save_match_results, save_parsed_resume, upsert_jobs
+    from backend.nlp import matcher
+    from backend.utils.parser import extract_text_from_bytes
+
+    init_all_dbs()
+    jobs = get_jobs_data(args.keyword, args.pages, fetch_detail=True, reuse_known=False)
+    if not jobs:
+        raise SystemExit("mock 104 returned no jobs")
+    texts = [matcher._job_text(j) for j in jobs]
+    page_texts = texts[:20]
+    resume_text = resumes[0][2]
+    matcher.warm_up()
+    resume_vec = matcher._encode_resumes([resume_text])
+    job_vecs = matcher._encode_jobs(jobs, texts)
+    resume_id = save_parsed_resume("bench_resume.txt", resume_text)
+    ranked = matcher._rank(resume_text, resume_vec, [dict(j) for j in jobs], job_vecs, 20, verbose=False)
+
+    def parse(i: int) -> None:
+        name, raw, _ = resumes[i % len(resumes)]
+        if not extract_text_from_bytes(raw, name).strip():
+            raise RuntimeError(f"empty text from {name}")
+
+    def crawl(i: int) -> None:
+        if not get_jobs_data(args.keyword, args.pages, fetch_detail=True, reuse_known=False):
+            raise RuntimeError("no jobs")
+
+    def encode(i: int) -> None:
+        matcher._encode(page_texts)
+
+    def score(i: int) -> None:
+        matcher._rank(resume_text, resume_vec, [dict(j) for j in jobs], job_vecs, 20, verbose=False)
+
+    def db_write(i: int) -> None:
+        # 每次都是新的 job_no，量的是真的寫入而不是「沒變、跳過」
+        batch = [{**j, "job_no": f"{j['job_no']}-{i}"} for j in jobs[:20]]
+        upsert_jobs(batch, keyword=args.keyword, area=None, industry=None)
+        save_match_results(resume_id, ranked)
+
+    def match(i: int) -> None:
+        name, raw, _ = resumes[i % len(resumes)]
+        r = requests.post(
+            f"{api_url}/match",
+            files={"file": (name, raw)},
+            params={"keyword": args.keyword, "pages": args.pages, "top_k": 20, "source": "live"},
+            timeout=600,
+        )
+        r.raise_for_status()
+
+    return {"parse": parse, "crawl": crawl, "encode": encode, "score": score, "db_write": db_write, "match": match}
+
+
+# ---------------------------
+# 報表
+# ---------------------------
+def _print_table(results: Dict[str, Dict[str, Dict[str, Any]]]) -> None:
+    print(f"{'stage':<10}{'conc':>5}{'n':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}")
+    for stage, by_conc in results.items():
+        for conc, r in by_conc.items():
+            if r.get("n"):
+                print(
+                    f"{stage:<10}{conc:>5}{r['n']:>6}{r['errors']:>5}"
+                    f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['throughput_ops_s']:>10}"
+                )
+            else:
+                print(f"{stage:<10}{conc:>5}{0:>6}{r.get('errors', 0):>5}")
+
+
+def _print_compare(results: Dict[str, Dict[str, Dict[str, Any]]], baseline_path: str) -> None:
+    base = json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]
+    print(f"\nvs {baseline_path}（負的 p50 / 正的 ops/s 代表變快）")
+    print(f"{'stage':<10}{'conc':>5}{'p50 Δ%':>10}{'p99 Δ%':>10}{'ops/s Δ%':>10}")
+
+    def pct(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}" if old else "n/a"
+
+    for stage, by_conc in results.items():
+        for conc, r in by_conc.items():
+            old = base.get(stage, {}).get(str(conc))
+            if not old or not old.get("n") or not r.get("n"):
+                continue
+            print(
+                f"{stage:<10}{conc:>5}{pct(r['p50_ms'], old['p50_ms']):>10}{pct(r['p99_ms'], old['p99_ms']):>10}"
+                f"{pct(r['throughput_ops_s'], old['throughput_ops_s']):>10}"
+            )
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="end-to-end ResuMate benchmark against a local 104 stand-in")
+    ap.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    ap.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 8])
+    ap.add_argument("--ops", type=int, default=40, help="每個 stage、每個並行度跑幾次")
+    ap.add_argument("--pages", type=int, default=1)
+    ap.add_argument("--keyword", default="資料分析")
+    ap.add_argument("--resumes", type=int, default=8, help="履歷語料份數")
+    ap.add_argument("--rate-limit", type=float, default=1000.0, help="爬蟲 token bucket（每秒請求數）")
+    ap.add_argument("--mock-url", help="改用已經在跑的假 104（python -m bench.mock_104）")
+    ap.add_argument("--api-url", help="match stage 改打已經在跑的 API（要自己設好同樣的環境變數）")
+    ap.add_argument("--json", help="結果另存成 JSON 檔")
+    ap.add_argument("--compare", help="跟之前存的 JSON 比較")
+    add_mock_args(ap)
+    args = ap.parse_args(argv)
+
+    mock = None
+    server = None
+    mock_url = args.mock_url
+    if not mock_url:
+        mock = mock_from_args(args)
+        server, mock_url = start_mock_server(mock)
+
+    db_dir = tempfile.mkdtemp(prefix="resumate-bench-")
+    env = _bench_env(args, mock_url, db_dir)
+    os.environ.update(env)
+
+    resumes = _resume_corpus(args.resumes, args.seed)
+    api_proc = None
+    api_url = args.api_url
+    if "match" in args.stages and not api_url:
+        api_proc, api_url = _start_api(env)
+
+    try:
+        ops = _stage_ops(args, resumes, api_url)
+        results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for stage in args.stages:
+            results[stage] = {}
+            for conc in args.concurrency:
+                results[stage][str(conc)] = _measure(ops[stage], args.ops, conc)
+    finally:
+        if api_proc is not None:
+            api_proc.terminate()
+            api_proc.wait(timeout=30)
+        if server is not None:
+            server.shutdown()
+
+    _print_table(results)
+    if args.compare:
+        _print_compare(results, args.compare)
+
+    if args.json:
+        out = {
+            "meta": {
+                "git_rev": _git_rev(),
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "args": vars(args),
+                "mock_responses": mock.stats() if mock is not None else None,
+            },
+            "results": results,
+        }
+        Path(args.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.json).write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# bench/bench_encoders.py
+# -*- coding: utf-8 -*-
+"""
+比較各 encoder backend 的速度、記憶體與跟基準模型的向量漂移
+
+    python -m bench.bench_encoders                       # 全部 backend
+    python -m bench.bench_encoders --backends torch torch-int8 --n 2000 --tolerance 0.01
+
+每個 backend 在獨立的子程序裡跑（peak RSS 才不會互相污染），回報：
+  sentences/sec、peak RSS（MB）、載入秒數、對 torch 基準的 mean/max cosine drift。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from backend.nlp.encoders import (
+    DEFAULT_MODEL_NAME,
+    ENCODER_BACKENDS,
+    PARITY_SAMPLE,
+    load_encoder,
+    parity_check,
+)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def _corpus(n: int) -> List[str]:
+    """用測試履歷的每一行 + 對照樣本湊出 n 句。"""
+    lines: List[str] = []
+    for p in sorted(DATA_DIR.glob("*")):
+        if p.is_file():
+            text = p.read_text(encoding="utf-8", errors="ignore")
+            lines.extend(ln.strip() for ln in text.splitlines() if len(ln.strip()) > 4)
+    lines.extend(PARITY_SAMPLE)
+    return [lines[i % len(lines)] for i in range(n)]
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 單位是 KB，macOS 是 bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _run_backend(
+    backend: str, model_name: str, n: int, batch_size: int, out: "mp.Queue[Dict[str, Any]]"
+) -> None:
+    try:
+        t0 = time.perf_counter()
+        enc = load_encoder(backend, model_name)
+        load_s = time.perf_counter() - t0
+
+        texts = _corpus(n)
+        enc.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+
+        t0 = time.perf_counter()
+        enc.encode(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - t0
+
+        out.put(
+            {
+                "backend": backend,
+                "load_s": round(load_s, 2),
+                "sentences_per_s": round(n / elapsed, 1),
+                "peak_rss_mb": round(_peak_rss_mb(), 1),
+                "parity_vecs": enc.encode(PARITY_SAMPLE).tolist(),
+            }
+        )
+    except Exception as e:
+        out.put({"backend": backend, "error": str(e)})
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="encoder backend benchmark")
+    ap.add_argument("--backends", nargs="+", default=list(ENCODER_BACKENDS))
+    ap.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    ap.add_argument("--n", type=int, default=1000, help="encode 幾句")
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--tolerance", type=float, default=0.01, help="可接受的 max cosine drift")
+    ap.add_argument("--json", help="結果另存成 JSON 檔")
+    args = ap.parse_args(argv)
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    ctx = mp.get_context("spawn")
+    results: List[Dict[str, Any]] = []
+    reference = None
+
+    for backend in backends:
+        q: "mp.Queue[Dict[str, Any]]" = ctx.Queue()
+        proc = ctx.Process(target=_run_backend, args=(backend, args.model, args.n, args.batch_size, q))
+        proc.start()
+        res = q.get()
+        proc.join()
+
+        vecs = res.pop("parity_vecs", None)
+        if vecs is not None:
+            vecs = np.asarray(vecs, dtype=np.float32)
+            if backend == "torch":
+                reference = vecs
+            if reference is not None:
+                res.update({k: round(v, 6) for k, v in parity_check(vecs, reference).items()})
+                res["within_tolerance"] = res["max_drift"] <= args.tolerance
+        results.append(res)
+
+    print(f"{'backend':<12}{'sent/s':>10}{'peak MB':>10}{'load s':>8}{'max drift':>12}  ok")
+    for r in results:
+        if "error" in r:
+            print(f"{r['backend']:<12}  error: {r['error']}")
+            continue
+        print(
+            f"{r['backend']:<12}{r['sentences_per_s']:>10}{r['peak_rss_mb']:>10}"
+            f"{r['load_s']:>8}{r.get('max_drift', float('nan')):>12.6f}  {r.get('within_tolerance')}"
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# bench/bench_load.py
+# -*- coding: utf-8 -*-
+"""
+確認 /match 跑的時候 event loop 沒被卡住：量 /filters 的延遲，
+先單獨量（baseline），再在背景同時打 --match-clients 個 /match 時量一次。
+
+    uvicorn backend.main:app --port 8000 &
+    python -m bench.bench_load --url http://127.0.0.1:8000 --match-clients 8 --seconds 20
+
+event loop 沒被卡住的話，兩次 /filters 的 p50 / p99 應該差不多。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import requests
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def _percentiles(lat_s: List[float]) -> Dict[str, float]:
+    if not lat_s:
+        return {"n": 0}
+    ms = np.asarray(lat_s) * 1000
+    return {
+        "n": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "max_ms": round(float(ms.max()), 1),
+    }
+
+
+def _probe(url: str, seconds: float, interval: float) -> List[float]:
+    """每 interval 秒打一次 /filters，回傳延遲（秒）。"""
+    out: List[float] = []
+    session = requests.Session()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        t0 = time.perf_counter()
+        session.get(f"{url}/filters", timeout=60).raise_for_status()
+        out.append(time.perf_counter() - t0)
+        time.sleep(interval)
+    return out
+
+
+def _match_client(url: str, resume: bytes, params: Dict[str, Any], stop: threading.Event, lat: List[float]) -> None:
+    session = requests.Session()
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        try:
+            r = session.post(
+                f"{url}/match",
+                files={"file": ("resume.txt", resume, "text/plain")},
+                params=params,
+                timeout=300,
+            )
+            if r.ok:
+                lat.append(time.perf_counter() - t0)
+        except requests.RequestException as e:
+            print("[bench_load] /match error:", e)
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="/filters latency while /match is in flight")
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--resume", default=str(DATA_DIR / "test_resume.txt"))
+    ap.add_argument("--match-clients", type=int, default=8)
+    ap.add_argument("--seconds", type=float, default=20.0)
+    ap.add_argument("--interval", type=float, default=0.05, help="/filters 探測間隔（秒）")
+    ap.add_argument("--keyword", default="資料分析")
+    ap.add_argument("--source", default="live")
+    ap.add_argument("--json", help="結果另存成 JSON 檔")
+    args = ap.parse_args(argv)
+
+    url = args.url.rstrip("/")
+    resume = Path(args.resume).read_bytes()
+    params = {"keyword": args.keyword, "pages": 1, "top_k": 20, "source": args.source}
+
+    baseline = _percentiles(_probe(url, args.seconds, args.interval))
+
+    stop = threading.Event()
+    match_lat: List[float] = []
+    clients = [
+        threading.Thread(target=_match_client, args=(url, resume, params, stop, match_lat), daemon=True)
+        for _ in range(args.match_clients)
+    ]
+    for t in clients:
+        t.start()
+    time.sleep(1.0)  # 讓 /match 先進到爬取 / encode 階段
+    loaded = _percentiles(_probe(url, args.seconds, args.interval))
+    stop.set()
+    for t in clients:
+        t.join(timeout=300)
+
+    results = {
+        "filters_baseline": baseline,
+        "filters_under_match_load": loaded,
+        "match": {**_percentiles(match_lat), "clients": args.match_clients},
+    }
+    print(f"{'probe':<26}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, r in results.items():
+        if r.get("n"):
+            print(f"{name:<26}{r['n']:>6}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['max_ms']:>10}")
+        else:
+            print(f"{name:<26}{0:>6}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# bench/mock_104.py
+# -*- coding: utf-8 -*-
+"""
+本機的假 104：提供 /jobs/search/list 與 /job/ajax/content/{jobNo}，讓 benchmark 不用連真的 104
+
+    python -m bench.mock_104 --port 8104 --latency-ms 80 --jitter-ms 40 --error-rate 0.05
+    RESUMATE_104_BASE_URL=http://127.0.0.1:8104 RESUMATE_RATE_LIMIT_PER_SEC=1000 uvicorn backend.main:app
+
+- 回應內容：預設用 (keyword, area, indcat, page) 決定性地產生職缺（同參數每次都一樣）；
+  --replay 指到 http_cache.db 時，錄過的 URL 直接重播當初存下的回應，沒錄到的才用產生的
+- 延遲：每個請求 latency ± jitter 毫秒（search / detail 可分開設）
+- 故障注入：--error-rate 的機率回 --error-statuses 其中一個（預設 429 / 500 / 503），
+  會觸發爬蟲的 urllib3 重試
+- 隨機性由 (seed, URL, 這個 URL 第幾次被打) 決定，跟執行緒怎麼交錯無關，同樣的設定可以重現
+- GET /__stats 回傳各 endpoint / status 的回應次數
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+REAL_BASE_URL = "https://www.104.com.tw"
+JOBS_PER_PAGE = 20
+TOTAL_PAGES = 10
+
+_TITLES = [
+    "資料分析師", "資料工程師", "後端工程師", "機器學習工程師", "產品經理", "數據科學家",
+    "商業分析師", "前端工程師", "BI 工程師", "雲端架構師", "專案經理", "軟體測試工程師",
+]
+_COMPANIES = ["晨星科技", "海風數位", "北辰資訊", "藍鯨雲端", "青松網路", "遠山智能", "微光軟體", "日昇電商"]
+_AREAS = ["台北市信義區", "台北市內湖區", "新北市板橋區", "新竹市東區", "台中市西屯區", "高雄市前鎮區"]
+_SALARIES = ["月薪 45,000~60,000元", "月薪 55,000~80,000元", "年薪 900,000~1,400,000元", "待遇面議"]
+_DUTIES = [
+    "負責建置與維護資料管線（ETL），整合多個來源的營運資料。",
+    "使用 Python、SQL 進行資料清理、分析與視覺化，產出每週營運報表。",
+    "與產品團隊合作定義 KPI，設計 A/B test 並解讀實驗結果。",
+    "開發與部署機器學習模型（推薦、分類、預測），並監控線上表現。",
+    "設計 RESTful API 與微服務架構，使用 FastAPI / Django 開發後端功能。",
+    "維護 Tableau / Power BI 儀表板，協助業務單位自助查詢資料。",
+    "規劃 AWS / GCP 雲端架構，導入 Docker、Kubernetes 與 CI/CD 流程。",
+    "撰寫單元測試與整合測試，確保系統品質與穩定度。",
+    "分析使用者行為資料，找出轉換率與留存率的改善機會。",
+    "與跨部門溝通需求，撰寫技術文件並帶領新進同仁。",
+    "處理大量文字資料，應用 NLP 技術（斷詞、向量化、語意搜尋）。",
+    "優化資料庫查詢效能，設計索引與資料表結構。",
+]
+_REQS = [
+    "熟悉 Python 與 pandas / numpy", "熟悉 SQL 與關聯式資料庫", "具備統計與機器學習基礎",
+    "有 Git 版本控制經驗", "良好的溝通與團隊合作能力", "英文閱讀能力佳",
+    "有 Spark / Airflow 經驗尤佳", "熟悉 Linux 環境", "具備雲端服務（AWS / GCP）使用經驗",
+]
+_EDU = ["大學", "碩士", "專科", "不拘"]
+_EXP = ["不拘", "1年以上", "2年以上", "3年以上", "5年以上"]
+
+
+def _rng(*parts: Any) -> random.Random:
+    digest = hashlib.sha256("|".join(map(str, parts)).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _job_no(keyword: str, area: str, indcat: str, page: int, i: int) -> str:
+    h = hashlib.sha1(f"{keyword}|{area}|{indcat}|{page}|{i}".encode("utf-8")).hexdigest()
+    return "m" + h[:7]
+
+
+def synthetic_search(keyword: str, area: str, indcat: str, page: int) -> Dict[str, Any]:
+    items: List[Dict[str, Any]] = []
+    if 1 <= page <= TOTAL_PAGES:
+        for i in range(JOBS_PER_PAGE):
+            job_no = _job_no(keyword, area, indcat, page, i)
+            r = _rng("item", job_no)
+            items.append(
+                {
+                    "jobNo": job_no,
+                    "jobName": f"{keyword} {r.choice(_TITLES)}".strip(),
+                    "custName": r.choice(_COMPANIES),
+                    "jobAddrNoDesc": r.choice(_AREAS),
+                    "salaryDesc": r.choice(_SALARIES),
+                    "appearDate": f"2025/{r.randint(1, 12):02d}/{r.randint(1, 28):02d}",
+                    "description": r.choice(_DUTIES),
+                    "link": {"job": f"//www.104.com.tw/job/{job_no}?jobsource=2018indexpoc"},
+                }
+            )
+    return {"data": {"list": items, "totalPage": TOTAL_PAGES, "totalCount": TOTAL_PAGES * JOBS_PER_PAGE}}
+
+
+def synthetic_detail(job_no: str) -> Dict[str, Any]:
+    r = _rng("detail", job_no)
+    duties = r.sample(_DUTIES, k=r.randint(4, 7))
+    reqs = r.sample(_REQS, k=r.randint(3, 5))
+    description = "工作內容：\n" + "\n".join(f"{n}. {d}" for n, d in enumerate(duties, 1))
+    return {
+        "data": {
+            "jobDetail": {"jobDescription": description},
+            "condition": {
+                "edu": r.choice(_EDU),
+                "workExp": r.choice(_EXP),
+                "specialty": [{"description": s} for s in reqs],
+                "other": "\n".join(reqs),
+            },
+        }
+    }
+
+
+class _Replay:
+    """從 http_cache.db（唯讀）找當初錄下的回應；key 是真 104 的完整 URL。"""
+
+    def __init__(self, path: str) -> None:
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+
+    def get(self, path_qs: str) -> Optional[Tuple[int, str, bytes]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body FROM http_cache WHERE url = ?", (REAL_BASE_URL + path_qs,)
+            ).fetchone()
+        if row is None or row[0] != 200:
+            return None
+        headers = json.loads(row[1] or "{}")
+        ctype = headers.get("content-type") or headers.get("Content-Type") or "application/json"
+        return 200, ctype, row[2] or b""
+
+
+class Mock104:
+    def __init__(
+        self,
+        *,
+        search_latency_ms: float = 80.0,
+        detail_latency_ms: float = 80.0,
+        jitter_ms: float = 40.0,
+        error_rate: float = 0.0,
+        error_statuses: Tuple[int, ...] = (429, 500, 503),
+        seed: int = 0,
+        replay: Optional[str] = None,
+    ) -> None:
+        self.search_latency_ms = search_latency_ms
+        self.detail_latency_ms = detail_latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses or (500,)
+        self.seed = seed
+        self.replay = _Replay(replay) if replay else None
+        self._lock = threading.Lock()
+        self._attempts: Dict[str, int] = {}
+        self._counters: Dict[str, int] = {}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def handle(self, path_qs: str) -> Tuple[int, str, bytes]:
+        """回 (status, content-type, body)；延遲在這裡睡。"""
+        parts = urlsplit(path_qs)
+        if parts.path.startswith("/jobs/search/list"):
+            endpoint, base_ms = "search", self.search_latency_ms
+        elif parts.path.startswith("/job/ajax/content/"):
+            endpoint, base_ms = "detail", self.detail_latency_ms
+        else:
+            return 404, "text/plain", b"not found"
+
+        with self._lock:
+            attempt = self._attempts.get(path_qs, 0)
+            self._attempts[path_qs] = attempt + 1
+        r = _rng(self.seed, path_qs, attempt)
+        delay_ms = max(0.0, base_ms + r.uniform(-self.jitter_ms, self.jitter_ms))
+        time.sleep(delay_ms / 1000)
+
+        if self.error_rate > 0 and r.random() < self.error_rate:
+            status = r.choice(self.error_statuses)
+            self._count(f"{endpoint}_{status}")
+            return status, "text/plain", b"injected error"
+
+        if self.replay is not None:
+            hit = self.replay.get(path_qs)
+            if hit is not None:
+                self._count(f"{endpoint}_200_replay")
+                return hit
+
+        if endpoint == "search":
+            q = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            payload = synthetic_search(q.get("keyword", ""), q.get("area", ""), q.get("indcat", ""), int(q.get("page", "1")))
+        else:
+            payload = synthetic_detail(parts.path.rstrip("/").rsplit("/", 1)[-1])
+        self._count(f"{endpoint}_200")
+        return 200, "application/json;charset=UTF-8", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _make_handler(mock: Mock104):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive，跟真 104 一樣可以重用連線
+
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path == "/__stats":
+                status, ctype, body = 200, "application/json", json.dumps(mock.stats()).encode("utf-8")
+            else:
+                status, ctype, body = mock.handle(self.path)
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+def start_mock_server(mock: Mock104, host: str = "127.0.0.1", port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """在背景執行緒啟動，回傳 (server, base_url)；port=0 由系統挑空的 port。用完呼叫 server.shutdown()。"""
+    server = ThreadingHTTPServer((host, port), _make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-104", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def add_mock_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--latency-ms", type=float, default=80.0, help="search / detail 的基本延遲")
+    ap.add_argument("--detail-latency-ms", type=float, default=None, help="detail 另外設（預設同 --latency-ms）")
+    ap.add_argument("--jitter-ms", type=float, default=40.0)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="回錯誤的機率（0~1）")
+    ap.add_argument("--error-statuses", default="429,500,503")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--replay", help="重播 http_cache.db 裡錄過的真實回應")
+
+
+def mock_from_args(args: argparse.Namespace) -> Mock104:
+    return Mock104(
+        search_latency_ms=args.latency_ms,
+        detail_latency_ms=args.latency_ms if args.detail_latency_ms is None else args.detail_latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_statuses=tuple(int(s) for s in args.error_statuses.split(",") if s.strip()),
+        seed=args.seed,
+        replay=args.replay,
+    )
+
+
+def main(argv: List[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="local stand-in for the 104 search / detail APIs")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8104)
+    add_mock_args(ap)
+    args = ap.parse_args(argv)
+
+    server, url = start_mock_server(mock_from_args(args), args.host, args.port)
+    print(f"[mock_104] serving on {url}  (RESUMATE_104_BASE_URL={url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
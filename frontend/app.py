@@ -1,8 +1,21 @@
 ﻿# frontend/app.py
+import time
+
 import streamlit as st
 import requests
 
 API_URL = "http://127.0.0.1:8000"
+# 送出媒合任務後輪詢進度的間隔 / 最久等多久（秒）
+POLL_INTERVAL_S = 1.0
+POLL_TIMEOUT_S = 600
+
+STAGE_LABELS = {
+    "queued": "排隊中…",
+    "parsing": "正在解析履歷…",
+    "crawling": "正在搜尋職缺…",
+    "ranking": "正在計算匹配分數…",
+    "saving": "正在儲存結果…",
+}
 
 st.set_page_config(page_title="ResuMate", page_icon="💼", layout="wide")
 
@@ -165,21 +178,63 @@ with bottom_left:
                 # 只有在使用者真的有輸入時，才把 keyword 丟給後端
                 if keyword.strip():
                      params["keyword"] = keyword.strip()
+                # 先送出任務拿 task_id，再輪詢進度（不會卡在一個很久的 request 上）
                 try:
-                    res = requests.post(f"{API_URL}/match", files=files, params=params, timeout=180)
+                    res = requests.post(f"{API_URL}/match/jobs", files=files, params=params, timeout=30)
                 except Exception as e:
                     st.error(f"❌ 無法連線到後端：{e}")
-                else:
-                    if res.status_code == 200:
-                        data = res.json()
-                        st.session_state["results"] = data.get("recommendations", [])
+                    res = None
+                if res is not None and res.status_code == 429:
+                    st.warning("⚠️ 目前使用人數較多，請稍後再試。")
+                elif res is not None and res.status_code != 202:
+                    try:
+                        detail = res.json().get("detail")
+                    except Exception:
+                        detail = res.text
+                    st.error(f"❌ 後端錯誤 {res.status_code}: {detail}")
+                elif res is not None:
+                    task_id = res.json()["task_id"]
+                    status_box = st.empty()
+                    progress_bar = st.progress(0)
+                    deadline = time.time() + POLL_TIMEOUT_S
+                    task = {}
+                    while time.time() < deadline:
+                        try:
+                            task = requests.get(f"{API_URL}/match/jobs/{task_id}", timeout=10).json()
+                        except Exception as e:
+                            status_box.warning(f"查詢進度失敗，重試中…（{e}）")
+                            time.sleep(POLL_INTERVAL_S)
+                            continue
+                        stage = task.get("stage")
+                        if stage in ("done", "error"):
+                            break
+                        prog = task.get("progress", {})
+                        seen = prog.get("jobs_seen", 0)
+                        encoded = prog.get("jobs_encoded", 0)
+                        msg = (
+                            f"{STAGE_LABELS.get(stage, stage)} "
+                            f"已爬 {prog.get('pages_crawled', 0)} 頁、{seen} 筆職缺，已分析 {encoded} 筆"
+                        )
+                        # 邊算邊顯示目前暫定的第一名
+                        if task.get("partial"):
+                            msg += f"（目前最符合：{task['partial'][0].get('job_title', '')}）"
+                        status_box.info(msg)
+                        progress_bar.progress(min(encoded / seen, 1.0) if seen else 0.0)
+                        time.sleep(POLL_INTERVAL_S)
+
+                    status_box.empty()
+                    progress_bar.empty()
+                    if task.get("stage") == "done":
+                        st.session_state["results"] = task.get("recommendations", [])
                         st.success(f"✅ 找到 {len(st.session_state['results'])} 個推薦職缺！")
+                        # 後端各階段耗時（爬取 / encode / 排序 / 寫入 DB ...）
+                        timings = task.get("timings_ms") or {}
+                        if timings:
+                            st.caption("耗時明細：" + " · ".join(f"{k} {v:.0f} ms" for k, v in timings.items()))
+                    elif task.get("stage") == "error":
+                        st.error(f"❌ 配對失敗：{task.get('error')}")
                     else:
-                        try:
-                            detail = res.json().get("detail")
-                        except Exception:
-                            detail = res.text
-                        st.error(f"❌ 後端錯誤 {res.status_code}: {detail}")
+                        st.error("❌ 等候逾時，請稍後再試。")
 
 # 右下：推薦職缺
 with bottom_right:
@@ -0,0 +1,43 @@
+# tests/test_vector_index.py
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from backend.nlp.vector_index import JobVectorIndex
+
+
+def _build(n=4000, dim=32, rare=30, common=600, seed=1):
+    rng = np.random.default_rng(seed)
+    vecs = rng.standard_normal((n, dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    areas = ["A"] * n
+    areas[:rare] = ["R"] * rare
+    areas[rare : rare + common] = ["S"] * common
+    index = JobVectorIndex(ivf_threshold=500, nprobe=2)
+    index.add([f"J{i}" for i in range(n)], vecs, areas, [None] * n)
+    return index, vecs, np.asarray(areas, dtype=object), rng
+
+
+def test_ivf_rare_area_is_exact():
+    index, vecs, areas, rng = _build()
+    assert index.is_ivf
+    rows = np.flatnonzero(areas == "R")
+    for _ in range(20):
+        q = rng.standard_normal(vecs.shape[1]).astype(np.float32)
+        q /= np.linalg.norm(q)
+        hits = index.search(q, 20, area="R")
+        assert len(hits) == min(20, rows.size)
+        best = rows[np.argsort(-(vecs[rows] @ q))[:20]]
+        assert [no for no, _ in hits] == [f"J{i}" for i in best]
+
+
+def test_ivf_filtered_search_returns_top_k():
+    index, vecs, areas, rng = _build()
+    n_common = int(np.count_nonzero(areas == "S"))
+    for _ in range(20):
+        q = rng.standard_normal(vecs.shape[1]).astype(np.float32)
+        q /= np.linalg.norm(q)
+        hits = index.search(q, 20, area="S")
+        assert len(hits) == min(20, n_common)
+        assert all(no in index._pos and areas[index._pos[no]] == "S" for no, _ in hits)
+        assert len(index.search(q, 20)) == 20
+        assert index.search(q, 20, area="nope") == []